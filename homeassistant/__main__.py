@@ -112,6 +112,10 @@ def get_arguments() -> argparse.Namespace:
         '--skip-pip',
         action='store_true',
         help='Skips pip install of required packages on startup')
+    parser.add_argument(
+        '--skip-startup-cache',
+        action='store_true',
+        help='Parse the configuration without the startup cache')
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -262,7 +266,8 @@ def setup_and_run_hass(config_dir: str,
         print('Config directory:', config_dir)
         hass = bootstrap.from_config_file(
             config_file, verbose=args.verbose, skip_pip=args.skip_pip,
-            log_rotate_days=args.log_rotate_days)
+            log_rotate_days=args.log_rotate_days,
+            use_startup_cache=not args.skip_startup_cache)
 
     if hass is None:
         return None
@@ -1,5 +1,6 @@
 """Provide methods to bootstrap a Home Assistant instance."""
 import asyncio
+from functools import partial
 import logging
 import logging.handlers
 import os
@@ -15,9 +16,11 @@ import homeassistant.components as core_components
 from homeassistant.components import persistent_notification
 import homeassistant.config as conf_util
 import homeassistant.core as core
-from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
-from homeassistant.setup import async_setup_component
+from homeassistant.const import DATA_SETUP_TIME, EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.setup import (
+    async_process_component_requirements, async_setup_component)
 import homeassistant.loader as loader
+from homeassistant import startup_cache
 from homeassistant.util.logging import AsyncHandler
 from homeassistant.util.yaml import clear_secret_cache
 from homeassistant.exceptions import HomeAssistantError
@@ -30,6 +33,13 @@ FIRST_INIT_COMPONENT = set((
     'recorder', 'mqtt', 'mqtt_eventstream', 'logger', 'introduction',
     'frontend', 'history'))
 
+# Components that all others wait for, the log levels and the recorder have
+# to be in place before the other components log and fire events
+GLOBAL_DEPENDENCIES = set(('logger', 'recorder'))
+
+# Number of the slowest component setups that are logged after startup
+SETUP_TIMES_LOGGED = 10
+
 
 def from_config_dict(config: Dict[str, Any],
                      hass: Optional[core.HomeAssistant]=None,
@@ -124,34 +134,74 @@ def async_from_config_dict(config: Dict[str, Any],
 
     _LOGGER.info('Home Assistant core initialized')
 
-    # stage 1
-    for component in components:
-        if component not in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
-
-    yield from hass.async_block_till_done()
-
-    # stage 2
-    for component in components:
-        if component in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
-
+    yield from _async_setup_components(hass, components, config)
     yield from hass.async_block_till_done()
 
     stop = time()
     _LOGGER.info('Home Assistant initialized in %.2fs', stop-start)
+    _async_log_setup_times(hass)
 
     async_register_signal_handling(hass)
     return hass
 
 
+@asyncio.coroutine
+def _async_setup_components(hass: core.HomeAssistant, components: set,
+                            config: Dict[str, Any]) -> None:
+    """Set up the components along their dependency graph.
+
+    Every component is loaded and gets its requirements installed right
+    away. Its setup starts once the GLOBAL_DEPENDENCIES are set up and
+    then only waits for its own dependencies. The FIRST_INIT_COMPONENT
+    components are started before the others.
+    """
+    global_tasks = [
+        hass.async_add_job(async_setup_component(hass, domain, config))
+        for domain in components & GLOBAL_DEPENDENCIES]
+
+    @asyncio.coroutine
+    def async_setup_when_ready(domain):
+        """Prepare a component and set it up after the global ones."""
+        component = loader.get_component(domain)
+
+        if component is not None and \
+                domain not in hass.config.components:
+            yield from async_process_component_requirements(
+                hass, domain, component)
+
+        if global_tasks:
+            yield from asyncio.wait(global_tasks, loop=hass.loop)
+
+        yield from async_setup_component(hass, domain, config)
+
+    others = sorted(components - GLOBAL_DEPENDENCIES,
+                    key=lambda domain: domain not in FIRST_INIT_COMPONENT)
+    tasks = global_tasks + [
+        hass.async_add_job(async_setup_when_ready(domain))
+        for domain in others]
+
+    if tasks:
+        yield from asyncio.wait(tasks, loop=hass.loop)
+
+
+@core.callback
+def _async_log_setup_times(hass: core.HomeAssistant) -> None:
+    """Log the components that took the longest to set up."""
+    setup_times = sorted(hass.data.get(DATA_SETUP_TIME, {}).items(),
+                         key=lambda item: item[1], reverse=True)
+
+    if setup_times:
+        _LOGGER.info('Slowest component setups: %s', ', '.join(
+            '{} {:.2f}s'.format(domain, seconds)
+            for domain, seconds in setup_times[:SETUP_TIMES_LOGGED]))
+
+
 def from_config_file(config_path: str,
                      hass: Optional[core.HomeAssistant]=None,
                      verbose: bool=False,
                      skip_pip: bool=True,
-                     log_rotate_days: Any=None):
+                     log_rotate_days: Any=None,
+                     use_startup_cache: bool=False):
     """Read the configuration file and try to start all the functionality.
 
     Will add functionality to 'hass' parameter if given,
@@ -163,7 +213,8 @@ def from_config_file(config_path: str,
     # run task
     hass = hass.loop.run_until_complete(
         async_from_config_file(
-            config_path, hass, verbose, skip_pip, log_rotate_days)
+            config_path, hass, verbose, skip_pip, log_rotate_days,
+            use_startup_cache)
     )
 
     return hass
@@ -174,10 +225,13 @@ def async_from_config_file(config_path: str,
                            hass: core.HomeAssistant,
                            verbose: bool=False,
                            skip_pip: bool=True,
-                           log_rotate_days: Any=None):
+                           log_rotate_days: Any=None,
+                           use_startup_cache: bool=False):
     """Read the configuration file and try to start all the functionality.
 
     Will add functionality to 'hass' parameter.
+    With use_startup_cache the parsed configuration and the component index
+    are reused from the last start when none of their sources changed.
     This method is a coroutine.
     """
     # Set config dir to directory holding config file
@@ -187,15 +241,23 @@ def async_from_config_file(config_path: str,
 
     async_enable_logging(hass, verbose, log_rotate_days)
 
+    if use_startup_cache:
+        load_config = startup_cache.load_config_file
+    else:
+        load_config = conf_util.load_yaml_config_file
+
     try:
-        config_dict = yield from hass.async_add_job(
-            conf_util.load_yaml_config_file, config_path)
+        config_dict = yield from hass.async_add_job(load_config, config_path)
     except HomeAssistantError as err:
         _LOGGER.error('Error loading %s: %s', config_path, err)
         return None
     finally:
         clear_secret_cache()
 
+    if use_startup_cache and not loader.PREPARED:
+        yield from hass.async_add_job(
+            partial(loader.prepare, hass, use_cache=True))
+
     hass = yield from async_from_config_dict(
         config_dict, hass, enable_log=False, skip_pip=skip_pip)
     return hass
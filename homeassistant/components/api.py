@@ -101,7 +101,7 @@ class APIEventStream(HomeAssistantView):
             if event.event_type == EVENT_HOMEASSISTANT_STOP:
                 data = stop_obj
             else:
-                data = json.dumps(event, cls=rem.JSONEncoder)
+                data = rem.event_to_json(event)
 
             yield from to_write.put(data)
 
@@ -183,7 +183,8 @@ class APIStatesView(HomeAssistantView):
     @ha.callback
     def get(self, request):
         """Get current states."""
-        return self.json(request.app['hass'].states.async_all())
+        return self.json_encoded(
+            rem.states_to_json(request.app['hass'].states.async_all()))
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -197,7 +198,7 @@ class APIEntityStateView(HomeAssistantView):
         """Retrieve state of entity."""
         state = request.app['hass'].states.get(entity_id)
         if state:
-            return self.json(state)
+            return self.json_encoded(rem.state_to_json(state))
         else:
             return self.json_message('Entity not found', HTTP_NOT_FOUND)
 
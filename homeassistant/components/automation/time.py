@@ -20,13 +20,21 @@ CONF_SECONDS = 'seconds'
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _time_pattern(maximum):
+    """Validate a number from 0 to maximum, or a /number interval."""
+    return vol.Any(
+        vol.All(vol.Coerce(int), vol.Range(min=0, max=maximum)),
+        vol.All(vol.Coerce(str), vol.Match(r'^/\d+$')))
+
+
 TRIGGER_SCHEMA = vol.All(vol.Schema({
     vol.Required(CONF_PLATFORM): 'time',
     CONF_AT: cv.time,
     CONF_AFTER: cv.time,
-    CONF_HOURS: vol.Any(vol.Coerce(int), vol.Coerce(str)),
-    CONF_MINUTES: vol.Any(vol.Coerce(int), vol.Coerce(str)),
-    CONF_SECONDS: vol.Any(vol.Coerce(int), vol.Coerce(str)),
+    CONF_HOURS: _time_pattern(23),
+    CONF_MINUTES: _time_pattern(59),
+    CONF_SECONDS: _time_pattern(59),
 }), cv.has_at_least_one_key(CONF_HOURS, CONF_MINUTES,
                             CONF_SECONDS, CONF_AT, CONF_AFTER))
 
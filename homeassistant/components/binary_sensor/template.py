@@ -21,7 +21,8 @@ from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.deprecation import get_deprecated
 from homeassistant.helpers.entity import async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_state_change, async_track_template_result)
 from homeassistant.helpers.restore_state import async_get_last_state
 
 _LOGGER = logging.getLogger(__name__)
@@ -46,8 +47,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
 
     for device, device_config in config[CONF_SENSORS].items():
         value_template = device_config[CONF_VALUE_TEMPLATE]
-        entity_ids = (device_config.get(ATTR_ENTITY_ID) or
-                      value_template.extract_entities())
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
         friendly_name = device_config.get(ATTR_FRIENDLY_NAME, device)
         device_class = get_deprecated(
             device_config, CONF_DEVICE_CLASS, CONF_SENSOR_CLASS)
@@ -95,11 +95,23 @@ class BinarySensorTemplate(BinarySensorDevice):
             """Handle the target device state changes."""
             self.hass.async_add_job(self.async_update_ha_state(True))
 
+        @callback
+        def template_bsensor_render_listener(entity, old_state, new_state,
+                                             render_info):
+            """Handle changes of the states read by the template."""
+            self.hass.async_add_job(self.async_update_ha_state(True))
+
         @callback
         def template_bsensor_startup(event):
             """Update template on startup."""
-            async_track_state_change(
-                self.hass, self._entities, template_bsensor_state_listener)
+            if self._entities is not None:
+                async_track_state_change(
+                    self.hass, self._entities, template_bsensor_state_listener)
+            else:
+                # Track the states that are read while rendering
+                async_track_template_result(
+                    self.hass, self._template,
+                    template_bsensor_render_listener)
 
             self.hass.async_add_job(self.async_update_ha_state(True))
 
@@ -21,7 +21,7 @@ import voluptuous as vol
 
 from homeassistant.core import callback
 from homeassistant.const import (ATTR_ENTITY_ID, ATTR_ENTITY_PICTURE)
-from homeassistant.config import load_yaml_config_file
+from homeassistant.config import DATA_CUSTOMIZE, load_yaml_config_file
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import Entity
@@ -45,6 +45,12 @@ STATE_STREAMING = 'streaming'
 STATE_IDLE = 'idle'
 
 DEFAULT_CONTENT_TYPE = 'image/jpeg'
+# Seconds between frames fetched for the streams of a camera
+ATTR_FRAME_INTERVAL = 'frame_interval'
+DEFAULT_FRAME_INTERVAL = 0.5
+FRAME_INTERVAL_SCHEMA = vol.All(
+    vol.Coerce(float), vol.Range(min=0, min_included=False))
+FETCH_TIMEOUT = 10
 ENTITY_IMAGE_URL = '/api/camera_proxy/{0}?token={1}'
 
 TOKEN_CHANGE_INTERVAL = timedelta(minutes=5)
@@ -99,10 +105,47 @@ def async_get_image(hass, entity_id, timeout=10):
         raise HomeAssistantError("Can't connect to {0}".format(url))
 
 
+@asyncio.coroutine
+def async_get_frame(hass, entity_id, timeout=10):
+    """Fetch a frame of a camera entity.
+
+    Cameras of this instance are read through their frame broker, which
+    shares the frames with the streams of the camera. Other cameras are
+    fetched over the API.
+    """
+    if hass.states.get(entity_id) is None:
+        raise HomeAssistantError(
+            "No entity '{0}' for grab a image".format(entity_id))
+
+    component = hass.data.get(DOMAIN)
+    camera = None if component is None else component.entities.get(entity_id)
+
+    if camera is None:
+        image = yield from async_get_image(hass, entity_id, timeout)
+        return image
+
+    try:
+        with async_timeout.timeout(timeout, loop=hass.loop):
+            image = yield from camera.frame_broker.async_get_frame()
+    except asyncio.TimeoutError:
+        raise HomeAssistantError(
+            "Timeout on grab a image from {0}".format(entity_id))
+    except Exception as err:  # pylint: disable=broad-except
+        raise HomeAssistantError(
+            "Error on grab a image from {0}: {1}".format(entity_id, err))
+
+    if not image:
+        raise HomeAssistantError(
+            "No image received from {0}".format(entity_id))
+
+    return image
+
+
 @asyncio.coroutine
 def async_setup(hass, config):
     """Set up the camera component."""
-    component = EntityComponent(_LOGGER, DOMAIN, hass, SCAN_INTERVAL)
+    component = hass.data[DOMAIN] = EntityComponent(
+        _LOGGER, DOMAIN, hass, SCAN_INTERVAL)
 
     hass.http.register_view(CameraImageView(component.entities))
     hass.http.register_view(CameraMjpegStream(component.entities))
@@ -161,6 +204,9 @@ def async_setup(hass, config):
 class Camera(Entity):
     """The base class for camera entities."""
 
+    _frame_broker = None
+    _invalid_frame_interval = None
+
     def __init__(self):
         """Initialize a camera."""
         self.is_streaming = False
@@ -198,6 +244,37 @@ class Camera(Entity):
         """Return the camera model."""
         return None
 
+    @property
+    def frame_interval(self):
+        """Return the seconds between the frames of a stream.
+
+        The interval of a camera can be set with the frame_interval
+        attribute of customize.
+        """
+        customize = self.hass.data.get(DATA_CUSTOMIZE)
+        if customize is None:
+            return DEFAULT_FRAME_INTERVAL
+
+        value = customize.get(self.entity_id).get(ATTR_FRAME_INTERVAL)
+        if value is None:
+            return DEFAULT_FRAME_INTERVAL
+
+        try:
+            return FRAME_INTERVAL_SCHEMA(value)
+        except vol.Invalid:
+            if value != self._invalid_frame_interval:
+                self._invalid_frame_interval = value
+                _LOGGER.error("Invalid %s for %s: %s", ATTR_FRAME_INTERVAL,
+                              self.entity_id, value)
+            return DEFAULT_FRAME_INTERVAL
+
+    @property
+    def frame_broker(self):
+        """Return the frame broker of the camera."""
+        if self._frame_broker is None:
+            self._frame_broker = FrameBroker(self.hass, self)
+        return self._frame_broker
+
     def camera_image(self):
         """Return bytes of camera image."""
         raise NotImplementedError()
@@ -230,32 +307,33 @@ class Camera(Entity):
                     self.content_type, len(img_bytes)),
                 'utf-8') + img_bytes + b'\r\n')
 
-        last_image = None
+        broker = self.frame_broker
+        sequence = broker.async_subscribe()
+        first_image = True
 
         try:
             while True:
-                img_bytes = yield from self.async_camera_image()
+                img_bytes, sequence = yield from broker.async_next_frame(
+                    sequence)
                 if not img_bytes:
                     break
 
-                if img_bytes and img_bytes != last_image:
-                    write(img_bytes)
+                write(img_bytes)
 
-                    # Chrome seems to always ignore first picture,
-                    # print it twice.
-                    if last_image is None:
-                        write(img_bytes)
-
-                    last_image = img_bytes
-                    yield from response.drain()
+                # Chrome seems to always ignore first picture,
+                # print it twice.
+                if first_image:
+                    write(img_bytes)
+                    first_image = False
 
-                yield from asyncio.sleep(.5)
+                yield from response.drain()
 
         except asyncio.CancelledError:
             _LOGGER.debug("Stream closed by frontend.")
             response = None
 
         finally:
+            broker.async_unsubscribe()
             if response is not None:
                 yield from response.write_eof()
 
@@ -311,6 +389,119 @@ class Camera(Entity):
                 _RND.getrandbits(256).to_bytes(32, 'little')).hexdigest())
 
 
+class FrameBroker(object):
+    """Fetch the frames of a camera once for all its viewers.
+
+    While streams are subscribed the frames are fetched every
+    frame_interval seconds of the camera. The latest frame is kept with a
+    sequence number that increases when the frame changes. Requests for a
+    single frame share a fetch that is in progress, or get the latest frame
+    of the streams when it is recent enough.
+    """
+
+    def __init__(self, hass, camera):
+        """Initialize the frame broker."""
+        self.hass = hass
+        self.camera = camera
+        self.frame = None
+        self.sequence = 0
+        self.fetched = None
+        self.subscribers = 0
+        self._fetch = None
+        self._task = None
+        self._new_frame = asyncio.Event(loop=hass.loop)
+
+    @callback
+    def async_subscribe(self):
+        """Start to receive frames, return the sequence to wait after."""
+        self.subscribers += 1
+
+        # Not tracked by hass, blocking till done would wait forever
+        if self._task is None:
+            self._task = self.hass.loop.create_task(
+                self._async_fetch_frames())
+
+        return self.sequence - 1 if self.frame else self.sequence
+
+    @callback
+    def async_unsubscribe(self):
+        """Stop to receive frames, stop fetching without subscribers."""
+        self.subscribers -= 1
+
+        if self.subscribers == 0 and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @asyncio.coroutine
+    def async_next_frame(self, sequence):
+        """Wait for a frame newer than sequence.
+
+        Returns the frame and its sequence, the frame is None when the
+        camera did not return an image.
+        """
+        while self.sequence == sequence:
+            yield from self._new_frame.wait()
+
+        return self.frame, self.sequence
+
+    @asyncio.coroutine
+    def async_get_frame(self):
+        """Return a recent frame, fetch it if needed."""
+        if (self._task is not None and self.frame and
+                self.hass.loop.time() - self.fetched <
+                self.camera.frame_interval):
+            return self.frame
+
+        if self._fetch is None:
+            self._fetch = self.hass.async_add_job(self._async_fetch())
+
+        # A cancelled request must not cancel the fetch of the others
+        frame = yield from asyncio.shield(self._fetch, loop=self.hass.loop)
+        return frame
+
+    @asyncio.coroutine
+    def _async_fetch(self):
+        """Fetch a frame from the camera."""
+        try:
+            image = yield from self.camera.async_camera_image()
+        finally:
+            self._fetch = None
+
+        self.fetched = self.hass.loop.time()
+
+        if not image or image != self.frame:
+            self._async_set_frame(image)
+
+        return image
+
+    @callback
+    def _async_set_frame(self, image):
+        """Store a new frame and wake up the subscribers."""
+        self.frame = image
+        self.sequence += 1
+        new_frame, self._new_frame = (
+            self._new_frame, asyncio.Event(loop=self.hass.loop))
+        new_frame.set()
+
+    @asyncio.coroutine
+    def _async_fetch_frames(self):
+        """Fetch frames until there are no subscribers."""
+        while True:
+            try:
+                with async_timeout.timeout(FETCH_TIMEOUT,
+                                           loop=self.hass.loop):
+                    yield from self.async_get_frame()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error fetching a frame of %s",
+                                  self.camera.entity_id)
+                self._async_set_frame(None)
+
+            yield from asyncio.sleep(self.camera.frame_interval,
+                                     loop=self.hass.loop)
+
+
 class CameraView(HomeAssistantView):
     """Base CameraView."""
 
@@ -355,7 +546,7 @@ class CameraImageView(CameraView):
         """Serve camera image."""
         with suppress(asyncio.CancelledError, asyncio.TimeoutError):
             with async_timeout.timeout(10, loop=request.app['hass'].loop):
-                image = yield from camera.async_camera_image()
+                image = yield from camera.frame_broker.async_get_frame()
 
             if image:
                 return web.Response(body=image,
@@ -184,6 +184,8 @@ def expand_entity_ids(hass, entity_ids):
     Async friendly.
     """
     found_ids = []
+    # Set of found_ids to keep the membership test constant time
+    found = set()
 
     for entity_id in entity_ids:
         if not isinstance(entity_id, str):
@@ -196,14 +198,15 @@ def expand_entity_ids(hass, entity_ids):
             domain, _ = ha.split_entity_id(entity_id)
 
             if domain == DOMAIN:
-                found_ids.extend(
-                    ent_id for ent_id
-                    in expand_entity_ids(hass, get_entity_ids(hass, entity_id))
-                    if ent_id not in found_ids)
-
-            else:
-                if entity_id not in found_ids:
-                    found_ids.append(entity_id)
+                for ent_id in expand_entity_ids(
+                        hass, get_entity_ids(hass, entity_id)):
+                    if ent_id not in found:
+                        found.add(ent_id)
+                        found_ids.append(ent_id)
+
+            elif entity_id not in found:
+                found.add(entity_id)
+                found_ids.append(entity_id)
 
         except AttributeError:
             # Raised by split_entity_id if entity_id is not a string
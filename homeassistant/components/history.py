@@ -8,7 +8,10 @@ import asyncio
 from collections import defaultdict
 from datetime import timedelta
 from itertools import groupby
+import json
 import logging
+import math
+import re
 import time
 
 import voluptuous as vol
@@ -20,6 +23,7 @@ from homeassistant.components import recorder, script
 from homeassistant.components.frontend import register_built_in_panel
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import ATTR_HIDDEN
+from homeassistant.components.recorder import statistics
 from homeassistant.components.recorder.util import session_scope, execute
 
 _LOGGER = logging.getLogger(__name__)
@@ -34,6 +38,12 @@ CONFIG_SCHEMA = vol.Schema({
 SIGNIFICANT_DOMAINS = ('thermostat', 'climate')
 IGNORE_DOMAINS = ('zone', 'scene',)
 
+# Number of rows fetched at once when streaming state values
+STATE_VALUES_BATCH_SIZE = 1000
+
+RESOLUTION_PATTERN = re.compile(r'^(\d+)([smhd])$')
+RESOLUTION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+
 
 def last_recorder_run(hass):
     """Retrieve the last closed recorder run from the database."""
@@ -82,6 +92,249 @@ def get_significant_states(hass, start_time, end_time=None, entity_id=None,
     return states_to_json(hass, states, start_time, entity_id, filters)
 
 
+def get_significant_state_values(hass, start_time, end_time=None,
+                                 entity_id=None, filters=None,
+                                 resolution=None):
+    """Return the state values during UTC period start_time - end_time.
+
+    Only the columns that are needed are selected and the rows are streamed
+    from the database. Attributes are only decoded for rows that could be
+    hidden, belong to a script or to one of the SIGNIFICANT_DOMAINS.
+
+    Without a resolution every state change is returned as a dict with the
+    state and last_changed. Like in get_significant_states every update of
+    the SIGNIFICANT_DOMAINS is returned, these also hold the attributes and
+    last_updated. With a resolution the states are downsampled into buckets
+    of that size holding the last state, the number of states and for
+    numeric states the min, mean and max value.
+    """
+    from homeassistant.components.recorder.models import (
+        States, process_timestamp)
+
+    entity_ids = (entity_id.lower(), ) if entity_id is not None else None
+    result = {}
+
+    with session_scope(hass=hass) as session:
+        # Get the states at the start time
+        for row_entity_id, state in _get_state_values_at(
+                hass, session, start_time, entity_ids, filters):
+            result[row_entity_id] = []
+            _add_state_value(result[row_entity_id], state, start_time,
+                             start_time, resolution)
+
+        query = session.query(
+            States.entity_id, States.domain, States.state,
+            States.attributes, States.last_changed,
+            States.last_updated).filter(
+                (States.domain.in_(SIGNIFICANT_DOMAINS) |
+                 (States.last_changed == States.last_updated)) &
+                (States.last_updated > start_time))
+
+        if filters:
+            query = filters.apply(query, entity_ids)
+        elif entity_ids is not None:
+            query = query.filter(States.entity_id.in_(entity_ids))
+
+        if end_time is not None:
+            query = query.filter(States.last_updated < end_time)
+
+        query = query.order_by(States.entity_id, States.last_updated) \
+                     .yield_per(STATE_VALUES_BATCH_SIZE)
+
+        # Append all changes to it
+        for row_entity_id, rows in groupby(query, lambda row: row[0]):
+            values = result.setdefault(row_entity_id, [])
+
+            for (_, domain, state, attributes, last_changed,
+                 last_updated) in rows:
+                if not _is_significant_row(domain, attributes):
+                    continue
+
+                if resolution is None and domain in SIGNIFICANT_DOMAINS:
+                    values.append({
+                        'state': state,
+                        'attributes': _decode_attributes(attributes),
+                        'last_changed': process_timestamp(last_changed),
+                        'last_updated': process_timestamp(last_updated),
+                    })
+                else:
+                    _add_state_value(values, state,
+                                     process_timestamp(last_updated),
+                                     start_time, resolution)
+
+            if not values:
+                result.pop(row_entity_id)
+
+    if resolution is not None:
+        for values in result.values():
+            for bucket in values:
+                _finish_bucket(bucket)
+
+    return result
+
+
+def get_statistics(hass, start_time, end_time=None, entity_id=None,
+                   filters=None, period=statistics.PERIOD_HOUR):
+    """Return the long-term statistics during UTC period start_time - end_time.
+
+    The statistics are hourly or daily rollups of numeric states that are
+    kept when the recorded states are purged. Each rollup holds the start of
+    the period, the number of states and the min, mean, max and last value.
+    """
+    from homeassistant.components.recorder.models import (
+        Statistics, process_timestamp)
+
+    entity_ids = (entity_id.lower(), ) if entity_id is not None else None
+    result = {}
+
+    with session_scope(hass=hass) as session:
+        query = session.query(
+            Statistics.entity_id, Statistics.start, Statistics.count,
+            Statistics.min, Statistics.mean, Statistics.max,
+            Statistics.last).filter(
+                (Statistics.period == period) &
+                (Statistics.start >= statistics.period_start(
+                    period, start_time)))
+
+        if filters:
+            query = filters.apply(query, entity_ids, Statistics)
+        elif entity_ids is not None:
+            query = query.filter(Statistics.entity_id.in_(entity_ids))
+
+        if end_time is not None:
+            query = query.filter(Statistics.start < end_time)
+
+        query = query.order_by(Statistics.entity_id, Statistics.start)
+
+        for row_entity_id, rows in groupby(query, lambda row: row[0]):
+            result[row_entity_id] = [{
+                'start': process_timestamp(start),
+                'count': count,
+                'min': min_value,
+                'mean': mean,
+                'max': max_value,
+                'last': last,
+            } for _, start, count, min_value, mean, max_value, last in rows]
+
+    return result
+
+
+def _get_state_values_at(hass, session, utc_point_in_time, entity_ids=None,
+                         filters=None):
+    """Return (entity_id, state) tuples at a specific point in time."""
+    from homeassistant.components.recorder.models import States
+    from sqlalchemy import func
+
+    run = recorder.run_information(hass, utc_point_in_time)
+
+    # History did not run before utc_point_in_time
+    if run is None:
+        return []
+
+    most_recent_state_ids = session.query(
+        func.max(States.state_id).label('max_state_id')
+    ).filter(
+        (States.created >= run.start) &
+        (States.created < utc_point_in_time) &
+        (~States.domain.in_(IGNORE_DOMAINS)))
+
+    if filters:
+        most_recent_state_ids = filters.apply(most_recent_state_ids,
+                                              entity_ids)
+    elif entity_ids is not None:
+        most_recent_state_ids = most_recent_state_ids.filter(
+            States.entity_id.in_(entity_ids))
+
+    most_recent_state_ids = most_recent_state_ids.group_by(
+        States.entity_id).subquery()
+
+    query = session.query(
+        States.entity_id, States.attributes, States.state).join(
+            most_recent_state_ids,
+            States.state_id == most_recent_state_ids.c.max_state_id)
+
+    return [(row_entity_id, state) for row_entity_id, attributes, state
+            in query if not _is_hidden_row(attributes)]
+
+
+def _is_hidden_row(attributes):
+    """Test if the raw attributes of a row mark the state as hidden."""
+    # Only decode the attributes if they might contain the hidden flag
+    if not attributes or '"{}"'.format(ATTR_HIDDEN) not in attributes:
+        return False
+
+    try:
+        return json.loads(attributes).get(ATTR_HIDDEN, False)
+    except ValueError:
+        return False
+
+
+def _decode_attributes(attributes):
+    """Decode the attributes of a row, an empty dict if they are invalid."""
+    try:
+        return json.loads(attributes) or {}
+    except (TypeError, ValueError):
+        return {}
+
+
+def _is_significant_row(domain, attributes):
+    """Test if a row is significant without decoding all attributes."""
+    if _is_hidden_row(attributes):
+        return False
+
+    if domain != 'script':
+        return True
+
+    # scripts that are not cancellable will never change state
+    try:
+        return json.loads(attributes).get(script.ATTR_CAN_CANCEL, False)
+    except (TypeError, ValueError):
+        return False
+
+
+def _add_state_value(values, state, last_changed, start_time, resolution):
+    """Add a state value or merge it into the bucket it belongs to."""
+    if resolution is None:
+        values.append({'state': state, 'last_changed': last_changed})
+        return
+
+    bucket_start = start_time + \
+        resolution * ((last_changed - start_time) // resolution)
+
+    if values and values[-1]['start'] == bucket_start:
+        bucket = values[-1]
+    else:
+        bucket = {'start': bucket_start, 'count': 0, 'min': None,
+                  'max': None, '_total': 0, '_numeric': 0}
+        values.append(bucket)
+
+    bucket['state'] = state
+    bucket['count'] += 1
+
+    try:
+        value = float(state)
+    except ValueError:
+        return
+
+    # nan and inf can not be aggregated and are not valid JSON
+    if not math.isfinite(value):
+        return
+
+    bucket['min'] = value if bucket['min'] is None else \
+        min(bucket['min'], value)
+    bucket['max'] = value if bucket['max'] is None else \
+        max(bucket['max'], value)
+    bucket['_total'] += value
+    bucket['_numeric'] += 1
+
+
+def _finish_bucket(bucket):
+    """Calculate the mean of a bucket and drop the running totals."""
+    total = bucket.pop('_total')
+    numeric = bucket.pop('_numeric')
+    bucket['mean'] = total / numeric if numeric else None
+
+
 def state_changes_during_period(hass, start_time, end_time=None,
                                 entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
@@ -233,14 +486,38 @@ class HistoryPeriodView(HomeAssistantView):
             end_time = start_time + one_day
         entity_id = request.query.get('filter_entity_id')
 
-        result = yield from request.app['hass'].async_add_job(
-            get_significant_states, request.app['hass'], start_time, end_time,
-            entity_id, self.filters)
-        result = result.values()
+        resolution = request.query.get('resolution')
+        if resolution:
+            resolution = _parse_resolution(resolution)
+            if resolution is None:
+                return self.json_message(
+                    'Invalid resolution', HTTP_BAD_REQUEST)
+
+        period = request.query.get('statistics')
+        if period is not None and period not in statistics.PERIODS:
+            return self.json_message(
+                'Invalid statistics period', HTTP_BAD_REQUEST)
+
+        if period is not None:
+            result = yield from request.app['hass'].async_add_job(
+                get_statistics, request.app['hass'], start_time, end_time,
+                entity_id, self.filters, period)
+            states_per_entity = result.values()
+        elif resolution or 'no_attributes' in request.query:
+            result = yield from request.app['hass'].async_add_job(
+                get_significant_state_values, request.app['hass'],
+                start_time, end_time, entity_id, self.filters, resolution)
+            states_per_entity = result.values()
+        else:
+            result = yield from request.app['hass'].async_add_job(
+                get_significant_states, request.app['hass'], start_time,
+                end_time, entity_id, self.filters)
+            result = states_per_entity = result.values()
+
         if _LOGGER.isEnabledFor(logging.DEBUG):
             elapsed = time.perf_counter() - timer_start
-            _LOGGER.debug(
-                'Extracted %d states in %fs', sum(map(len, result)), elapsed)
+            _LOGGER.debug('Extracted %d states in %fs',
+                          sum(map(len, states_per_entity)), elapsed)
         return self.json(result)
 
 
@@ -254,9 +531,12 @@ class Filters(object):
         self.included_entities = []
         self.included_domains = []
 
-    def apply(self, query, entity_ids=None):
+    def apply(self, query, entity_ids=None, table=None):
         """Apply the include/exclude filter on domains and entities on query.
 
+        The filter is applied on the domain and entity_id columns of table,
+        which defaults to the states table.
+
         Following rules apply:
         * only the include section is configured - just query the specified
           entities or domains.
@@ -267,40 +547,43 @@ class Filters(object):
         """
         from homeassistant.components.recorder.models import States
 
+        if table is None:
+            table = States
+
         # specific entities requested - do not in/exclude anything
         if entity_ids is not None:
-            return query.filter(States.entity_id.in_(entity_ids))
-        query = query.filter(~States.domain.in_(IGNORE_DOMAINS))
+            return query.filter(table.entity_id.in_(entity_ids))
+        query = query.filter(~table.domain.in_(IGNORE_DOMAINS))
 
         filter_query = None
         # filter if only excluded domain is configured
         if self.excluded_domains and not self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~table.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= States.entity_id.in_(self.included_entities)
+                filter_query &= table.entity_id.in_(self.included_entities)
         # filter if only included domain is configured
         elif not self.excluded_domains and self.included_domains:
-            filter_query = States.domain.in_(self.included_domains)
+            filter_query = table.domain.in_(self.included_domains)
             if self.included_entities:
-                filter_query |= States.entity_id.in_(self.included_entities)
+                filter_query |= table.entity_id.in_(self.included_entities)
         # filter if included and excluded domain is configured
         elif self.excluded_domains and self.included_domains:
-            filter_query = ~States.domain.in_(self.excluded_domains)
+            filter_query = ~table.domain.in_(self.excluded_domains)
             if self.included_entities:
-                filter_query &= (States.domain.in_(self.included_domains) |
-                                 States.entity_id.in_(self.included_entities))
+                filter_query &= (table.domain.in_(self.included_domains) |
+                                 table.entity_id.in_(self.included_entities))
             else:
-                filter_query &= (States.domain.in_(self.included_domains) & ~
-                                 States.domain.in_(self.excluded_domains))
+                filter_query &= (table.domain.in_(self.included_domains) & ~
+                                 table.domain.in_(self.excluded_domains))
         # no domain filter just included entities
         elif not self.excluded_domains and not self.included_domains and \
                 self.included_entities:
-            filter_query = States.entity_id.in_(self.included_entities)
+            filter_query = table.entity_id.in_(self.included_entities)
         if filter_query is not None:
             query = query.filter(filter_query)
         # finally apply excluded entities filter if configured
         if self.excluded_entities:
-            query = query.filter(~States.entity_id.in_(self.excluded_entities))
+            query = query.filter(~table.entity_id.in_(self.excluded_entities))
         return query
 
 
@@ -312,3 +595,13 @@ def _is_significant(state):
     # scripts that are not cancellable will never change state
     return (state.domain != 'script' or
             state.attributes.get(script.ATTR_CAN_CANCEL))
+
+
+def _parse_resolution(value):
+    """Parse a resolution like 30s, 5m, 1h or 1d into a timedelta."""
+    match = RESOLUTION_PATTERN.match(value)
+
+    if match is None or int(match.group(1)) == 0:
+        return None
+
+    return timedelta(**{RESOLUTION_UNITS[match.group(2)]: int(match.group(1))})
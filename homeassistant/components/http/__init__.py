@@ -5,6 +5,7 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/http/
 """
 import asyncio
+from collections import Counter
 import json
 import logging
 import ssl
@@ -20,7 +21,8 @@ import homeassistant.remote as rem
 import homeassistant.util as hass_util
 from homeassistant.const import (
     SERVER_PORT, CONTENT_TYPE_JSON, ALLOWED_CORS_HEADERS,
-    EVENT_HOMEASSISTANT_STOP, EVENT_HOMEASSISTANT_START)
+    EVENT_HOMEASSISTANT_STOP, EVENT_HOMEASSISTANT_START,
+    DATA_STATIC_CACHE_STATS)
 from homeassistant.core import is_callback
 from homeassistant.util.logging import HideSensitiveDataFilter
 
@@ -29,9 +31,10 @@ from .ban import ban_middleware
 from .const import (
     KEY_USE_X_FORWARDED_FOR, KEY_TRUSTED_NETWORKS,
     KEY_BANS_ENABLED, KEY_LOGIN_THRESHOLD,
-    KEY_DEVELOPMENT, KEY_AUTHENTICATED)
+    KEY_DEVELOPMENT, KEY_AUTHENTICATED, KEY_STATIC_CACHE)
 from .static import (
-    staticresource_middleware, CachingFileResponse, CachingStaticResource)
+    staticresource_middleware, async_serve_file, CachingStaticResource,
+    StaticAssetCache)
 from .util import get_real_ip
 
 REQUIREMENTS = ['aiohttp_cors==0.5.3']
@@ -194,6 +197,8 @@ class HomeAssistantWSGI(object):
         self.app[KEY_BANS_ENABLED] = is_ban_enabled
         self.app[KEY_LOGIN_THRESHOLD] = login_threshold
         self.app[KEY_DEVELOPMENT] = development
+        self.app[KEY_STATIC_CACHE] = StaticAssetCache(
+            stats=hass.data.setdefault(DATA_STATIC_CACHE_STATS, Counter()))
 
         self.hass = hass
         self.development = development
@@ -269,8 +274,8 @@ class HomeAssistantWSGI(object):
         if cache_headers:
             @asyncio.coroutine
             def serve_file(request):
-                """Serve file from disk."""
-                return CachingFileResponse(path)
+                """Serve file from the asset cache."""
+                return (yield from async_serve_file(request, path))
         else:
             @asyncio.coroutine
             def serve_file(request):
@@ -359,10 +364,14 @@ class HomeAssistantView(object):
     # pylint: disable=no-self-use
     def json(self, result, status_code=200):
         """Return a JSON response."""
-        msg = json.dumps(
-            result, sort_keys=True, cls=rem.JSONEncoder).encode('UTF-8')
+        msg = json.dumps(result, sort_keys=True, cls=rem.JSONEncoder)
+        return self.json_encoded(msg, status_code)
+
+    def json_encoded(self, msg, status_code=200):
+        """Return a JSON response of an already encoded message."""
         return web.Response(
-            body=msg, content_type=CONTENT_TYPE_JSON, status=status_code)
+            body=msg.encode('UTF-8'), content_type=CONTENT_TYPE_JSON,
+            status=status_code)
 
     def json_message(self, error, status_code=200):
         """Return a JSON message response."""
@@ -1,17 +1,52 @@
-"""Static file handling for HTTP component."""
+"""Static file handling for HTTP component.
+
+Files up to MAX_CACHED_FILE_SIZE are served from an in-memory cache of the
+least recently used assets. Every cached asset has a strong ETag based on
+its content and, when it is compressible, gzip and brotli variants that are
+selected with the Accept-Encoding header of the request. Variants that were
+built when the frontend was installed are read from disk, the others are
+compressed once in the executor. Brotli is only used when the brotli module
+is installed.
+"""
 import asyncio
+from collections import Counter, OrderedDict
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
 import re
 
 from aiohttp import hdrs
-from aiohttp.web import FileResponse
+from aiohttp.web import FileResponse, Response
 from aiohttp.web_exceptions import HTTPNotFound
 from aiohttp.web_urldispatcher import StaticResource
 from yarl import unquote
 
-from .const import KEY_DEVELOPMENT
+from .const import KEY_DEVELOPMENT, KEY_STATIC_CACHE
+
+_LOGGER = logging.getLogger(__name__)
 
 _FINGERPRINT = re.compile(r'^(.+)-[a-z0-9]{32}\.(\w+)$', re.IGNORECASE)
 
+CACHE_TIME = 31 * 86400  # = 1 month
+
+# Larger files are streamed from disk and are not kept in memory
+MAX_CACHED_FILE_SIZE = 1024 * 1024
+
+# Size in bytes of all the cached assets and their variants together
+MAX_CACHE_SIZE = 8 * 1024 * 1024
+
+# Smaller files do not get smaller by compressing them
+MIN_COMPRESS_SIZE = 256
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/xml', 'image/svg+xml')
+
+ENCODING_IDENTITY = 'identity'
+ENCODING_GZIP = 'gzip'
+ENCODING_BROTLI = 'br'
+
 
 class CachingStaticResource(StaticResource):
     """Static Resource handler that will add cache headers."""
@@ -36,7 +71,8 @@ class CachingStaticResource(StaticResource):
         if filepath.is_dir():
             return (yield from super()._handle(request))
         elif filepath.is_file():
-            return CachingFileResponse(filepath, chunk_size=self._chunk_size)
+            return (yield from async_serve_file(
+                request, filepath, chunk_size=self._chunk_size))
         else:
             raise HTTPNotFound
 
@@ -54,9 +90,8 @@ class CachingFileResponse(FileResponse):
         def sendfile(request, fobj, count):
             """Sendfile that includes a cache header."""
             if not request.app[KEY_DEVELOPMENT]:
-                cache_time = 31 * 86400  # = 1 month
                 self.headers[hdrs.CACHE_CONTROL] = "public, max-age={}".format(
-                    cache_time)
+                    CACHE_TIME)
 
             yield from orig_sendfile(request, fobj, count)
 
@@ -64,6 +99,234 @@ class CachingFileResponse(FileResponse):
         self._sendfile = sendfile
 
 
+@asyncio.coroutine
+def async_serve_file(request, filepath, chunk_size=256 * 1024):
+    """Serve a file from the asset cache, load it on a miss.
+
+    Files that are too large for the cache are streamed from disk.
+    """
+    try:
+        stat = os.stat(str(filepath))
+    except OSError as error:
+        raise HTTPNotFound() from error
+
+    if stat.st_size > MAX_CACHED_FILE_SIZE:
+        return CachingFileResponse(filepath, chunk_size=chunk_size)
+
+    cache = request.app[KEY_STATIC_CACHE]
+    key = (stat.st_mtime_ns, stat.st_size)
+    asset = cache.get(str(filepath), key)
+
+    if asset is None:
+        try:
+            asset = yield from request.app['hass'].async_add_job(
+                load_asset, str(filepath), key)
+        except OSError as error:
+            raise HTTPNotFound() from error
+        cache.put(str(filepath), asset)
+
+    return asset.response(request)
+
+
+def _compressors():
+    """Return the encoding, file extension and compress method to use."""
+    compressors = []
+
+    try:
+        import brotli
+        compressors.append((ENCODING_BROTLI, '.br', brotli.compress))
+    except ImportError:
+        pass
+
+    compressors.append((ENCODING_GZIP, '.gz', gzip.compress))
+    return compressors
+
+
+def _read_precompressed(path, mtime_ns):
+    """Return a variant built at install time, None if it is outdated."""
+    try:
+        if os.stat(path).st_mtime_ns < mtime_ns:
+            return None
+        with open(path, 'rb') as fil:
+            return fil.read()
+    except OSError:
+        return None
+
+
+def load_asset(path, key):
+    """Read a file and build its compressed variants.
+
+    key is the modification time and size of the file. This method does
+    I/O and compresses, it should run in the executor.
+    """
+    with open(path, 'rb') as fil:
+        content = fil.read()
+
+    content_type, encoding = mimetypes.guess_type(path)
+    variants = {ENCODING_IDENTITY: content}
+
+    if (encoding is None and content_type is not None and
+            content_type.startswith(COMPRESSIBLE_TYPES) and
+            len(content) >= MIN_COMPRESS_SIZE):
+        for encoding, extension, compress in _compressors():
+            variant = _read_precompressed(path + extension, key[0])
+            if variant is None:
+                variant = compress(content)
+            if len(variant) < len(content):
+                variants[encoding] = variant
+
+    return StaticAsset(key, hashlib.sha1(content).hexdigest(),
+                       content_type or 'application/octet-stream', variants)
+
+
+def _accepted_encodings(header):
+    """Return the content codings that the client accepts."""
+    accepted = set()
+
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        quality = 1
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+
+        coding = coding.strip().lower()
+        if coding and quality > 0:
+            accepted.add(coding)
+
+    return accepted
+
+
+def _etag_matches(header, etag):
+    """Return True if the If-None-Match header matches etag."""
+    for tag in header.split(','):
+        tag = tag.strip()
+        # If-None-Match uses the weak comparison
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in ('*', etag):
+            return True
+    return False
+
+
+class StaticAsset(object):
+    """A file in memory with its compressed variants."""
+
+    def __init__(self, key, digest, content_type, variants):
+        """Initialize the asset."""
+        self.key = key
+        self.digest = digest
+        self.content_type = content_type
+        self.variants = variants
+        self.size = sum(len(variant) for variant in variants.values())
+
+    def select_encoding(self, accept_encoding):
+        """Return the smallest variant that the client accepts."""
+        accepted = _accepted_encodings(accept_encoding)
+        encodings = sorted(self.variants,
+                           key=lambda encoding: len(self.variants[encoding]))
+
+        for encoding in encodings:
+            if encoding in accepted or '*' in accepted:
+                return encoding
+
+        return ENCODING_IDENTITY
+
+    def etag(self, encoding):
+        """Return the strong ETag of a variant."""
+        if encoding == ENCODING_IDENTITY:
+            return '"{}"'.format(self.digest)
+        return '"{}-{}"'.format(self.digest, encoding)
+
+    def response(self, request):
+        """Return the response to a request for the asset."""
+        encoding = self.select_encoding(
+            request.headers.get(hdrs.ACCEPT_ENCODING, ''))
+        etag = self.etag(encoding)
+
+        headers = {
+            hdrs.ETAG: etag,
+            hdrs.VARY: hdrs.ACCEPT_ENCODING,
+        }
+        if not request.app[KEY_DEVELOPMENT]:
+            headers[hdrs.CACHE_CONTROL] = "public, max-age={}".format(
+                CACHE_TIME)
+
+        if _etag_matches(request.headers.get(hdrs.IF_NONE_MATCH, ''), etag):
+            return Response(status=304, headers=headers)
+
+        if encoding != ENCODING_IDENTITY:
+            headers[hdrs.CONTENT_ENCODING] = encoding
+
+        return Response(body=self.variants[encoding], headers=headers,
+                        content_type=self.content_type)
+
+
+class StaticAssetCache(object):
+    """Least recently used assets, bounded by their size in bytes.
+
+    The hits, misses and evictions are counted in stats.
+    """
+
+    def __init__(self, max_size=MAX_CACHE_SIZE, stats=None):
+        """Initialize the asset cache."""
+        self.max_size = max_size
+        self.stats = Counter() if stats is None else stats
+        self.size = 0
+        self._assets = OrderedDict()
+
+    def __len__(self):
+        """Return the number of cached assets."""
+        return len(self._assets)
+
+    def get(self, path, key):
+        """Return the asset of path if it is still up to date, or None."""
+        asset = self._assets.get(path)
+
+        if asset is not None and asset.key != key:
+            self._remove(path)
+            asset = None
+
+        if asset is None:
+            self.stats['misses'] += 1
+            return None
+
+        self._assets.move_to_end(path)
+        self.stats['hits'] += 1
+        return asset
+
+    def put(self, path, asset):
+        """Store an asset, evict the least recently used to make room."""
+        if path in self._assets:
+            self._remove(path)
+
+        if asset.size > self.max_size:
+            return
+
+        self._assets[path] = asset
+        self.size += asset.size
+
+        while self.size > self.max_size:
+            self._remove(next(iter(self._assets)))
+            self.stats['evictions'] += 1
+
+        self._update_stats()
+
+    def _remove(self, path):
+        """Remove the asset of path."""
+        self.size -= self._assets.pop(path).size
+        self._update_stats()
+
+    def _update_stats(self):
+        """Store the number of assets and their size in stats."""
+        self.stats['assets'] = len(self._assets)
+        self.stats['size'] = self.size
+
+
 @asyncio.coroutine
 def staticresource_middleware(app, handler):
     """Middleware to strip out fingerprint from fingerprinted assets."""
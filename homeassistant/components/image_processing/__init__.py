@@ -129,7 +129,7 @@ class ImageProcessingEntity(Entity):
         image = None
 
         try:
-            image = yield from camera.async_get_image(
+            image = yield from camera.async_get_frame(
                 self.hass, self.camera_entity, timeout=self.timeout)
 
         except HomeAssistantError as err:
@@ -15,6 +15,7 @@ from homeassistant.const import (
     CONF_PORT, CONF_SSL, CONF_VERIFY_SSL, CONF_USERNAME, CONF_PASSWORD,
     CONF_EXCLUDE, CONF_INCLUDE, CONF_DOMAINS, CONF_ENTITIES)
 from homeassistant.helpers import state as state_helper
+from homeassistant.helpers.exporter import EXPORTER_SCHEMA, setup_exporter
 import homeassistant.helpers.config_validation as cv
 
 REQUIREMENTS = ['influxdb==3.0.0']
@@ -33,7 +34,7 @@ DOMAIN = 'influxdb'
 TIMEOUT = 5
 
 CONFIG_SCHEMA = vol.Schema({
-    DOMAIN: vol.Schema({
+    DOMAIN: EXPORTER_SCHEMA.extend({
         vol.Optional(CONF_HOST): cv.string,
         vol.Inclusive(CONF_USERNAME, 'authentication'): cv.string,
         vol.Inclusive(CONF_PASSWORD, 'authentication'): cv.string,
@@ -108,8 +109,18 @@ def setup(hass, config):
                       "the database exists and is READ/WRITE.", exc)
         return False
 
+    def write_points(batch):
+        """Write a batch of points, client errors are not retried."""
+        try:
+            influx.write_points(batch)
+        except exceptions.InfluxDBClientError:
+            _LOGGER.exception("Error saving %s points to InfluxDB",
+                              len(batch))
+
+    exporter = setup_exporter(hass, DOMAIN, write_points, conf)
+
     def influx_event_listener(event):
-        """Listen for new messages on the bus and sends them to Influx."""
+        """Listen for new messages on the bus and queue them for Influx."""
         state = event.data.get('new_state')
         if state is None or state.state in (
                 STATE_UNKNOWN, '', STATE_UNAVAILABLE) or \
@@ -174,10 +185,7 @@ def setup(hass, config):
 
         json_body[0]['tags'].update(tags)
 
-        try:
-            influx.write_points(json_body)
-        except exceptions.InfluxDBClientError:
-            _LOGGER.exception("Error saving event %s to InfluxDB", json_body)
+        exporter.put(json_body[0])
 
     hass.bus.listen(EVENT_STATE_CHANGED, influx_event_listener)
 
@@ -5,10 +5,12 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/logbook/
 """
 import asyncio
+import json
 import logging
 from datetime import timedelta
-from itertools import groupby
+from itertools import groupby, islice
 
+from aiohttp import web
 import voluptuous as vol
 
 from homeassistant.core import callback
@@ -20,8 +22,9 @@ from homeassistant.components.http import HomeAssistantView
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP, EVENT_STATE_CHANGED,
     STATE_NOT_HOME, STATE_OFF, STATE_ON, ATTR_HIDDEN, HTTP_BAD_REQUEST,
-    EVENT_LOGBOOK_ENTRY)
+    EVENT_LOGBOOK_ENTRY, CONTENT_TYPE_JSON)
 from homeassistant.core import State, split_entity_id, DOMAIN as HA_DOMAIN
+from homeassistant.remote import JSONEncoder
 
 DOMAIN = 'logbook'
 DEPENDENCIES = ['recorder', 'frontend']
@@ -50,6 +53,16 @@ CONFIG_SCHEMA = vol.Schema({
 
 GROUP_BY_MINUTES = 15
 
+# Event types that are shown in the logbook
+LOGBOOK_EVENTS = [EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP,
+                  EVENT_STATE_CHANGED, EVENT_LOGBOOK_ENTRY]
+
+# Number of events that are loaded from the database at once
+QUERY_BATCH_SIZE = 1000
+
+# Number of entries that are encoded per chunk of a streamed response
+STREAM_CHUNK_SIZE = 100
+
 CONTINUOUS_DOMAINS = ['proximity', 'sensor']
 
 ATTR_NAME = 'name'
@@ -121,7 +134,13 @@ class LogbookView(HomeAssistantView):
 
     @asyncio.coroutine
     def get(self, request, datetime=None):
-        """Retrieve logbook entries."""
+        """Retrieve logbook entries.
+
+        The entries between the datetime, or the start of today, and the
+        end_time, or one day later, are streamed as one JSON list. When a
+        limit is given, a page of at least limit entries is returned instead
+        and a Link header points to the next page.
+        """
         if datetime:
             datetime = dt_util.parse_datetime(datetime)
 
@@ -130,14 +149,79 @@ class LogbookView(HomeAssistantView):
         else:
             datetime = dt_util.start_of_local_day()
 
-        start_day = dt_util.as_utc(datetime)
-        end_day = start_day + timedelta(days=1)
+        start_time = dt_util.as_utc(datetime)
+
+        end_time = request.query.get('end_time')
+        if end_time:
+            end_time = dt_util.parse_datetime(end_time)
+            if end_time is None:
+                return self.json_message('Invalid end_time', HTTP_BAD_REQUEST)
+            end_time = dt_util.as_utc(end_time)
+        else:
+            end_time = start_time + timedelta(days=1)
+
+        cursor = request.query.get('cursor')
+        if cursor:
+            cursor = dt_util.parse_datetime(cursor)
+            if cursor is None:
+                return self.json_message('Invalid cursor', HTTP_BAD_REQUEST)
+            start_time = max(start_time, dt_util.as_utc(cursor))
+
+        limit = request.query.get('limit')
+        if limit:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = 0
+            if limit <= 0:
+                return self.json_message('Invalid limit', HTTP_BAD_REQUEST)
+
+        hass = request.app['hass']
+        groups = _get_entry_groups(hass, self.config, start_time, end_time)
+
+        if not limit:
+            return (yield from self._async_stream(request, groups))
+
+        entries, cursor = yield from hass.async_add_job(
+            _get_page, groups, limit)
+        response = self.json(entries)
+
+        if cursor is not None:
+            next_url = request.url.update_query(
+                cursor=dt_util.as_utc(cursor).isoformat())
+            response.headers['Link'] = '<{}>; rel="next"'.format(
+                next_url.path_qs)
+
+        return response
+
+    @asyncio.coroutine
+    def _async_stream(self, request, groups):
+        """Stream the entries of the groups as a JSON list."""
         hass = request.app['hass']
+        entries = (entry for _, group in groups for entry in group)
+
+        response = web.StreamResponse()
+        response.content_type = CONTENT_TYPE_JSON
+        response.enable_chunked_encoding()
+        yield from response.prepare(request)
+
+        response.write(b'[')
+        separator = b''
+
+        while True:
+            chunk = yield from hass.async_add_job(
+                _encode_entries, entries, STREAM_CHUNK_SIZE)
 
-        events = yield from hass.async_add_job(
-            _get_events, hass, start_day, end_day)
-        events = _exclude_events(events, self.config)
-        return self.json(humanify(events))
+            if not chunk:
+                break
+
+            response.write(separator + chunk)
+            separator = b','
+            yield from response.drain()
+
+        response.write(b']')
+        yield from response.write_eof()
+        return response
 
 
 class Entry(object):
@@ -169,127 +253,209 @@ def humanify(events):
     Will try to group events if possible:
     - if 2+ sensor updates in GROUP_BY_MINUTES, show last
     - if home assistant stop and start happen in same minute call it restarted
+
+    Events are consumed lazily, only one group is kept in memory.
     """
+    for _, entries in _humanify_groups(events):
+        yield from entries
+
+
+def _humanify_groups(events):
+    """Yield the last event and the entries of every group of events."""
     # Group events in batches of GROUP_BY_MINUTES
     for _, g_events in groupby(
             events,
             lambda event: event.time_fired.minute // GROUP_BY_MINUTES):
 
         events_batch = list(g_events)
+        yield events_batch[-1], list(_humanify_batch(events_batch))
 
-        # Keep track of last sensor states
-        last_sensor_event = {}
 
-        # Group HA start/stop events
-        # Maps minute of event to 1: stop, 2: stop + start
-        start_stop_events = {}
+def _humanify_batch(events_batch):
+    """Convert a group of events into Entry objects."""
+    # Keep track of last sensor states
+    last_sensor_event = {}
 
-        # Process events
-        for event in events_batch:
-            if event.event_type == EVENT_STATE_CHANGED:
-                entity_id = event.data.get('entity_id')
+    # Group HA start/stop events
+    # Maps minute of event to 1: stop, 2: stop + start
+    start_stop_events = {}
 
-                if entity_id is None:
-                    continue
+    # Process events
+    for event in events_batch:
+        if event.event_type == EVENT_STATE_CHANGED:
+            entity_id = event.data.get('entity_id')
 
-                if entity_id.startswith(tuple('{}.'.format(
-                        domain) for domain in CONTINUOUS_DOMAINS)):
-                    last_sensor_event[entity_id] = event
+            if entity_id is None:
+                continue
 
-            elif event.event_type == EVENT_HOMEASSISTANT_STOP:
-                if event.time_fired.minute in start_stop_events:
-                    continue
+            if entity_id.startswith(tuple('{}.'.format(
+                    domain) for domain in CONTINUOUS_DOMAINS)):
+                last_sensor_event[entity_id] = event
 
-                start_stop_events[event.time_fired.minute] = 1
+        elif event.event_type == EVENT_HOMEASSISTANT_STOP:
+            if event.time_fired.minute in start_stop_events:
+                continue
 
-            elif event.event_type == EVENT_HOMEASSISTANT_START:
-                if event.time_fired.minute not in start_stop_events:
-                    continue
+            start_stop_events[event.time_fired.minute] = 1
 
-                start_stop_events[event.time_fired.minute] = 2
+        elif event.event_type == EVENT_HOMEASSISTANT_START:
+            if event.time_fired.minute not in start_stop_events:
+                continue
 
-        # Yield entries
-        for event in events_batch:
-            if event.event_type == EVENT_STATE_CHANGED:
+            start_stop_events[event.time_fired.minute] = 2
 
-                to_state = State.from_dict(event.data.get('new_state'))
+    # Yield entries
+    for event in events_batch:
+        if event.event_type == EVENT_STATE_CHANGED:
 
-                # If last_changed != last_updated only attributes have changed
-                # we do not report on that yet. Also filter auto groups.
-                if not to_state or \
-                   to_state.last_changed != to_state.last_updated or \
-                   to_state.domain == 'group' and \
-                   to_state.attributes.get('auto', False):
-                    continue
+            to_state = State.from_dict(event.data.get('new_state'))
+
+            # If last_changed != last_updated only attributes have changed
+            # we do not report on that yet. Also filter auto groups.
+            if not to_state or \
+               to_state.last_changed != to_state.last_updated or \
+               to_state.domain == 'group' and \
+               to_state.attributes.get('auto', False):
+                continue
 
-                domain = to_state.domain
+            domain = to_state.domain
 
-                # Skip all but the last sensor state
-                if domain in CONTINUOUS_DOMAINS and \
-                   event != last_sensor_event[to_state.entity_id]:
-                    continue
+            # Skip all but the last sensor state
+            if domain in CONTINUOUS_DOMAINS and \
+               event != last_sensor_event[to_state.entity_id]:
+                continue
 
-                # Don't show continuous sensor value changes in the logbook
-                if domain in CONTINUOUS_DOMAINS and \
-                   to_state.attributes.get('unit_of_measurement'):
-                    continue
+            # Don't show continuous sensor value changes in the logbook
+            if domain in CONTINUOUS_DOMAINS and \
+               to_state.attributes.get('unit_of_measurement'):
+                continue
 
-                yield Entry(
-                    event.time_fired,
-                    name=to_state.name,
-                    message=_entry_message_from_state(domain, to_state),
-                    domain=domain,
-                    entity_id=to_state.entity_id)
+            yield Entry(
+                event.time_fired,
+                name=to_state.name,
+                message=_entry_message_from_state(domain, to_state),
+                domain=domain,
+                entity_id=to_state.entity_id)
 
-            elif event.event_type == EVENT_HOMEASSISTANT_START:
-                if start_stop_events.get(event.time_fired.minute) == 2:
-                    continue
+        elif event.event_type == EVENT_HOMEASSISTANT_START:
+            if start_stop_events.get(event.time_fired.minute) == 2:
+                continue
+
+            yield Entry(
+                event.time_fired, "Home Assistant", "started",
+                domain=HA_DOMAIN)
+
+        elif event.event_type == EVENT_HOMEASSISTANT_STOP:
+            if start_stop_events.get(event.time_fired.minute) == 2:
+                action = "restarted"
+            else:
+                action = "stopped"
+
+            yield Entry(
+                event.time_fired, "Home Assistant", action,
+                domain=HA_DOMAIN)
 
-                yield Entry(
-                    event.time_fired, "Home Assistant", "started",
-                    domain=HA_DOMAIN)
-
-            elif event.event_type == EVENT_HOMEASSISTANT_STOP:
-                if start_stop_events.get(event.time_fired.minute) == 2:
-                    action = "restarted"
-                else:
-                    action = "stopped"
-
-                yield Entry(
-                    event.time_fired, "Home Assistant", action,
-                    domain=HA_DOMAIN)
-
-            elif event.event_type == EVENT_LOGBOOK_ENTRY:
-                domain = event.data.get(ATTR_DOMAIN)
-                entity_id = event.data.get(ATTR_ENTITY_ID)
-                if domain is None and entity_id is not None:
-                    try:
-                        domain = split_entity_id(str(entity_id))[0]
-                    except IndexError:
-                        pass
-
-                yield Entry(
-                    event.time_fired, event.data.get(ATTR_NAME),
-                    event.data.get(ATTR_MESSAGE), domain,
-                    entity_id)
-
-
-def _get_events(hass, start_day, end_day):
-    """Get events for a period of time."""
-    from homeassistant.components.recorder.models import Events
-    from homeassistant.components.recorder.util import (
-        execute, session_scope)
-
-    with session_scope(hass=hass) as session:
-        query = session.query(Events).order_by(
-            Events.time_fired).filter(
-                (Events.time_fired > start_day) &
+        elif event.event_type == EVENT_LOGBOOK_ENTRY:
+            domain = event.data.get(ATTR_DOMAIN)
+            entity_id = event.data.get(ATTR_ENTITY_ID)
+            if domain is None and entity_id is not None:
+                try:
+                    domain = split_entity_id(str(entity_id))[0]
+                except IndexError:
+                    pass
+
+            yield Entry(
+                event.time_fired, event.data.get(ATTR_NAME),
+                event.data.get(ATTR_MESSAGE), domain,
+                entity_id)
+
+
+def _get_events(hass, start_day, end_day, config=None):
+    """Get the logbook events of a period of time.
+
+    Events are loaded in batches of QUERY_BATCH_SIZE, each batch continues
+    after the last event of the previous one. The configured include and
+    exclude filters are applied to the state changes in the query.
+    """
+    from homeassistant.components.recorder.models import Events, States
+    from homeassistant.components.recorder.util import session_scope
+
+    entity_filter = _entity_filter_query(config or {}, States)
+    last = None
+
+    while True:
+        with session_scope(hass=hass) as session:
+            query = session.query(Events).filter(
+                Events.event_type.in_(LOGBOOK_EVENTS) &
                 (Events.time_fired < end_day))
-        return execute(query)
 
+            if entity_filter is not None:
+                query = query.outerjoin(
+                    States, States.event_id == Events.event_id).filter(
+                        (Events.event_type != EVENT_STATE_CHANGED) |
+                        entity_filter)
 
-def _exclude_events(events, config):
-    """Get lists of excluded entities and platforms."""
+            if last is None:
+                query = query.filter(Events.time_fired > start_day)
+            else:
+                last_time_fired, last_event_id = last
+                query = query.filter(
+                    (Events.time_fired > last_time_fired) |
+                    ((Events.time_fired == last_time_fired) &
+                     (Events.event_id > last_event_id)))
+
+            rows = query.order_by(
+                Events.time_fired, Events.event_id).limit(
+                    QUERY_BATCH_SIZE).all()
+
+            if not rows:
+                return
+
+            last = (rows[-1].time_fired, rows[-1].event_id)
+            events = [row.to_native() for row in rows]
+
+        yield from (event for event in events if event is not None)
+
+        if len(events) < QUERY_BATCH_SIZE:
+            return
+
+
+def _get_entry_groups(hass, config, start_time, end_time):
+    """Return a lazy iterator of the entries of a period of time.
+
+    Every item holds the last event and the entries of a group of events,
+    nothing is loaded from the database before the iteration starts.
+    """
+    events = _get_events(hass, start_time, end_time, config)
+    return _humanify_groups(_exclude_events(events, config))
+
+
+def _get_page(groups, limit):
+    """Return the entries of groups until there are at least limit.
+
+    The time of the last event that was read is returned as the cursor of
+    the next page, or None when there are no more events.
+    """
+    entries = []
+
+    for last_event, group in groups:
+        entries.extend(group)
+
+        if len(entries) >= limit:
+            return entries, last_event.time_fired
+
+    return entries, None
+
+
+def _encode_entries(entries, count):
+    """Encode the next count entries as a JSON list without brackets."""
+    return ','.join(
+        json.dumps(entry.as_dict(), sort_keys=True, cls=JSONEncoder)
+        for entry in islice(entries, count)).encode('UTF-8')
+
+
+def _get_filter_lists(config):
+    """Return the excluded and included entities and domains."""
     excluded_entities = []
     excluded_domains = []
     included_entities = []
@@ -303,7 +469,63 @@ def _exclude_events(events, config):
         included_entities = include[CONF_ENTITIES]
         included_domains = include[CONF_DOMAINS]
 
-    filtered_events = []
+    return (excluded_entities, excluded_domains, included_entities,
+            included_domains)
+
+
+def _entity_filter_query(config, table):
+    """Return the SQL version of the filter of _exclude_events.
+
+    The filter is applied to the domain and entity_id columns of table.
+    Returns None if nothing is filtered.
+    """
+    excluded_entities, excluded_domains, included_entities, \
+        included_domains = _get_filter_lists(config)
+
+    filter_query = None
+    included = None
+    if included_entities:
+        included = table.entity_id.in_(included_entities)
+
+    # filter if only excluded is configured for this domain
+    if excluded_domains and not included_domains:
+        filter_query = ~table.domain.in_(excluded_domains)
+        if included is not None:
+            filter_query |= included
+    # filter if only included is configured for this domain
+    elif not excluded_domains and included_domains:
+        filter_query = table.domain.in_(included_domains)
+        if included is not None:
+            filter_query |= included
+    # filter if included and excluded is configured for this domain
+    elif excluded_domains and included_domains:
+        filter_query = table.domain.in_(included_domains)
+        if included is not None:
+            filter_query |= included
+        filter_query &= ~table.domain.in_(excluded_domains)
+    # filter if only included is configured for this entity
+    elif included is not None:
+        filter_query = included
+
+    # check if logbook entry is excluded for this entity
+    if excluded_entities:
+        excluded = ~table.entity_id.in_(excluded_entities)
+        if filter_query is None:
+            filter_query = excluded
+        else:
+            filter_query &= excluded
+
+    return filter_query
+
+
+def _exclude_events(events, config):
+    """Filter out the events of excluded entities and domains.
+
+    Events are consumed lazily.
+    """
+    excluded_entities, excluded_domains, included_entities, \
+        included_domains = _get_filter_lists(config)
+
     for event in events:
         domain, entity_id = None, None
 
@@ -356,8 +578,7 @@ def _exclude_events(events, config):
             # check if logbook entry is excluded for this entity
             if entity_id in excluded_entities:
                 continue
-        filtered_events.append(event)
-    return filtered_events
+        yield event
 
 
 # pylint: disable=too-many-return-statements
@@ -10,7 +10,6 @@ import os
 import socket
 import time
 import ssl
-import re
 import requests.certs
 
 import voluptuous as vol
@@ -36,6 +35,7 @@ _LOGGER = logging.getLogger(__name__)
 DOMAIN = 'mqtt'
 
 DATA_MQTT = 'mqtt'
+DATA_MQTT_ROUTER = 'mqtt_router'
 
 SERVICE_PUBLISH = 'publish'
 SIGNAL_MQTT_MESSAGE_RECEIVED = 'mqtt_message_received'
@@ -204,29 +204,14 @@ def publish_template(hass, topic, payload_template, qos=None, retain=None):
 def async_subscribe(hass, topic, msg_callback, qos=DEFAULT_QOS,
                     encoding='utf-8'):
     """Subscribe to an MQTT topic."""
-    @callback
-    def async_mqtt_topic_subscriber(dp_topic, dp_payload, dp_qos):
-        """Match subscribed MQTT topic."""
-        if not _match_topic(topic, dp_topic):
-            return
+    router = hass.data.get(DATA_MQTT_ROUTER)
 
-        if encoding is not None:
-            try:
-                payload = dp_payload.decode(encoding)
-                _LOGGER.debug("Received message on %s: %s", dp_topic, payload)
-            except (AttributeError, UnicodeDecodeError):
-                _LOGGER.error("Illegal payload encoding %s from "
-                              "MQTT topic: %s, Payload: %s",
-                              encoding, dp_topic, dp_payload)
-                return
-        else:
-            _LOGGER.debug("Received binary message on %s", dp_topic)
-            payload = dp_payload
+    if router is None:
+        router = hass.data[DATA_MQTT_ROUTER] = TopicRouter(hass)
+        async_dispatcher_connect(
+            hass, SIGNAL_MQTT_MESSAGE_RECEIVED, router.async_route)
 
-        hass.async_run_job(msg_callback, dp_topic, payload, dp_qos)
-
-    async_remove = async_dispatcher_connect(
-        hass, SIGNAL_MQTT_MESSAGE_RECEIVED, async_mqtt_topic_subscriber)
+    async_remove = router.async_add(topic, msg_callback, encoding)
 
     yield from hass.data[DATA_MQTT].async_subscribe(topic, qos)
     return async_remove
@@ -638,22 +623,124 @@ def _raise_on_error(result):
             'Error talking to MQTT: {}'.format(mqtt.error_string(result)))
 
 
-def _match_topic(subscription, topic):
-    """Test if topic matches subscription."""
-    reg_ex_parts = []
-    suffix = ""
-    if subscription.endswith('#'):
-        subscription = subscription[:-2]
-        suffix = "(.*)"
-    sub_parts = subscription.split('/')
-    for sub_part in sub_parts:
-        if sub_part == "+":
-            reg_ex_parts.append(r"([^\/]+)")
-        else:
-            reg_ex_parts.append(re.escape(sub_part))
+class _TopicNode(object):
+    """A level of the subscription topic trie."""
+
+    __slots__ = ['children', 'subscriptions']
+
+    def __init__(self):
+        """Initialize the topic level."""
+        self.children = {}
+        self.subscriptions = []
 
-    reg_ex = "^" + (r'\/'.join(reg_ex_parts)) + suffix + "$"
 
-    reg = re.compile(reg_ex)
+class TopicRouter(object):
+    """Route received MQTT messages to the matching subscriptions.
+
+    The subscriptions are stored in a trie keyed by topic level, a received
+    topic walks the trie once and only visits the levels that can match,
+    taking the ``+`` and ``#`` wildcards into account.
+    """
+
+    def __init__(self, hass):
+        """Initialize the topic router."""
+        self.hass = hass
+        self._root = _TopicNode()
+
+    @callback
+    def async_add(self, topic, msg_callback, encoding):
+        """Add a subscription and return a function to remove it.
+
+        This method must be run in the event loop.
+        """
+        subscription = (msg_callback, encoding)
+        levels = topic.split('/')
+        node = self._root
+
+        for level in levels:
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TopicNode()
+            node = child
+
+        node.subscriptions.append(subscription)
+
+        @callback
+        def async_remove():
+            """Remove the subscription from the trie."""
+            path = [self._root]
+            for level in levels:
+                child = path[-1].children.get(level)
+                if child is None:
+                    return
+                path.append(child)
 
-    return reg.match(topic) is not None
+            try:
+                path[-1].subscriptions.remove(subscription)
+            except ValueError:
+                return
+
+            # Prune the levels that no longer lead to a subscription
+            for level, parent, child in zip(
+                    reversed(levels), reversed(path[:-1]), reversed(path)):
+                if child.subscriptions or child.children:
+                    break
+                parent.children.pop(level)
+
+        return async_remove
+
+    def match(self, topic):
+        """Return the subscriptions matching a topic."""
+        matches = []
+        self._match(self._root, topic.split('/'), 0, matches)
+        return matches
+
+    def _match(self, node, levels, index, matches):
+        """Collect the subscriptions under node matching levels[index:]."""
+        # Multi-level wildcard also matches the parent level
+        wildcard = node.children.get('#')
+        if wildcard is not None:
+            matches.extend(wildcard.subscriptions)
+
+        if index == len(levels):
+            matches.extend(node.subscriptions)
+            return
+
+        child = node.children.get(levels[index])
+        if child is not None:
+            self._match(child, levels, index + 1, matches)
+
+        child = node.children.get('+')
+        if child is not None:
+            self._match(child, levels, index + 1, matches)
+
+    @callback
+    def async_route(self, topic, payload, qos):
+        """Route a received message to the matching subscriptions.
+
+        The payload is decoded only once per requested encoding.
+
+        This method must be run in the event loop.
+        """
+        decoded = {}
+
+        for msg_callback, encoding in self.match(topic):
+            if encoding is None:
+                _LOGGER.debug("Received binary message on %s", topic)
+                self.hass.async_run_job(msg_callback, topic, payload, qos)
+                continue
+
+            if encoding not in decoded:
+                try:
+                    decoded[encoding] = payload.decode(encoding)
+                    _LOGGER.debug("Received message on %s: %s",
+                                  topic, decoded[encoding])
+                except (AttributeError, UnicodeDecodeError):
+                    _LOGGER.error("Illegal payload encoding %s from "
+                                  "MQTT topic: %s, Payload: %s",
+                                  encoding, topic, payload)
+                    decoded[encoding] = None
+
+            if decoded[encoding] is not None:
+                self.hass.async_run_job(
+                    msg_callback, topic, decoded[encoding], qos)
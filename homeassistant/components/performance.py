@@ -0,0 +1,374 @@
+"""
+Component to instrument the event loop and the executor.
+
+When instrumentation is enabled, every job that is added to Home Assistant is
+timed. This includes event listeners, callbacks, coroutines and executor
+jobs like Entity.update. Event loop lag is tracked too and the report shows
+the saturation of every executor pool, the poll latency of every entity
+platform and the queues of the exporters. While instrumentation is disabled
+the core is not touched at all.
+
+For more details about this component, please refer to the documentation at
+https://home-assistant.io/components/performance/
+"""
+import asyncio
+import cProfile
+from functools import partial
+import logging
+import os
+import threading
+import time
+from timeit import default_timer as timer
+
+import voluptuous as vol
+
+from homeassistant.config import load_yaml_config_file
+from homeassistant.const import (
+    DATA_EXPORTERS, DATA_POLL_LATENCY, DATA_SETUP_TIME,
+    DATA_STATIC_CACHE_STATS, DATA_SUPPRESSED_UPDATES,
+    DATA_TEMPLATE_CACHE_STATS, DATA_TTS_CACHE_STATS)
+from homeassistant.core import callback, is_callback
+from homeassistant.components.http import HomeAssistantView
+import homeassistant.helpers.config_validation as cv
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = 'performance'
+DEPENDENCIES = ['http']
+
+DATA_PERFORMANCE = 'performance'
+
+URL_API_PERFORMANCE = '/api/diagnostics/performance'
+
+CONF_INSTRUMENT = 'instrument'
+
+ATTR_ENABLED = 'enabled'
+ATTR_SECONDS = 'seconds'
+
+SERVICE_INSTRUMENT = 'instrument'
+SERVICE_PROFILE = 'profile'
+
+DEFAULT_PROFILE_SECONDS = 60
+
+# Interval in seconds at which the loop lag is measured
+LAG_INTERVAL = 1
+
+# Number of jobs reported by the diagnostics endpoint
+REPORTED_JOBS = 50
+
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.Schema({
+        vol.Optional(CONF_INSTRUMENT, default=False): cv.boolean,
+    }),
+}, extra=vol.ALLOW_EXTRA)
+
+INSTRUMENT_SERVICE_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENABLED): cv.boolean,
+})
+
+PROFILE_SERVICE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_SECONDS, default=DEFAULT_PROFILE_SECONDS):
+        vol.All(vol.Coerce(float), vol.Range(min=0)),
+})
+
+
+@asyncio.coroutine
+def async_setup(hass, config):
+    """Set up the performance component."""
+    conf = config.get(DOMAIN, {})
+    instrumentation = hass.data[DATA_PERFORMANCE] = Instrumentation(hass)
+
+    if conf.get(CONF_INSTRUMENT):
+        instrumentation.async_enable()
+
+    @callback
+    def async_handle_instrument(service):
+        """Enable or disable the instrumentation."""
+        if service.data[ATTR_ENABLED]:
+            instrumentation.async_enable()
+        else:
+            instrumentation.async_disable()
+
+    @asyncio.coroutine
+    def async_handle_profile(service):
+        """Profile the event loop and write the result to a file."""
+        yield from instrumentation.async_profile(service.data[ATTR_SECONDS])
+
+    descriptions = yield from hass.async_add_job(
+        load_yaml_config_file, os.path.join(
+            os.path.dirname(__file__), 'services.yaml'))
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_INSTRUMENT, async_handle_instrument,
+        descriptions[DOMAIN][SERVICE_INSTRUMENT],
+        schema=INSTRUMENT_SERVICE_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_handle_profile,
+        descriptions[DOMAIN][SERVICE_PROFILE],
+        schema=PROFILE_SERVICE_SCHEMA)
+
+    hass.http.register_view(PerformanceView)
+
+    return True
+
+
+def _job_name(target):
+    """Return a name that identifies the code of a job."""
+    while isinstance(target, partial):
+        target = target.func
+
+    name = getattr(target, '__qualname__', None) or type(target).__qualname__
+    module = getattr(target, '__module__', None)
+
+    if module is None:
+        # Coroutine objects do not know their module, their frame does
+        frame = getattr(target, 'gi_frame', None) or \
+            getattr(target, 'cr_frame', None)
+        if frame is not None:
+            module = frame.f_globals.get('__name__')
+
+    return '{}.{}'.format(module, name) if module else name
+
+
+class JobStats(object):
+    """Statistics of all runs of a job."""
+
+    __slots__ = ['count', 'total_time', 'max_time', 'total_wait', 'max_wait']
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.count = 0
+        self.total_time = 0
+        self.max_time = 0
+        self.total_wait = 0
+        self.max_wait = 0
+
+    def add(self, wait, duration):
+        """Add a run of the job."""
+        self.count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self):
+        """Return a dict representation of the statistics."""
+        return {
+            'count': self.count,
+            'total_time': self.total_time,
+            'mean_time': self.total_time / self.count if self.count else 0,
+            'max_time': self.max_time,
+            'mean_wait': self.total_wait / self.count if self.count else 0,
+            'max_wait': self.max_wait,
+        }
+
+
+class Instrumentation(object):
+    """Time the jobs of Home Assistant.
+
+    While enabled, async_add_job and async_run_job of the Home Assistant
+    instance are replaced by versions that wrap every job with a timer.
+    """
+
+    def __init__(self, hass):
+        """Initialize the instrumentation."""
+        self.hass = hass
+        self.enabled = False
+        self.enabled_since = None
+        self.jobs = {}
+        self.profiling = False
+        self.loop_lag = JobStats()
+        self._lock = threading.Lock()
+        self._lag_handle = None
+        self._overridden = None
+
+    @callback
+    def async_enable(self):
+        """Start timing the jobs."""
+        if self.enabled:
+            return
+
+        hass = self.hass
+        add_job = hass.async_add_job
+        run_job = hass.async_run_job
+        # Methods that were already overridden on the instance are restored
+        self._overridden = {
+            name: vars(hass)[name] for name in ('async_add_job',
+                                                'async_run_job')
+            if name in vars(hass)}
+
+        @callback
+        def async_add_job(target, *args):
+            """Add a timed job."""
+            return add_job(self._wrap(target, args), *args)
+
+        @callback
+        def async_run_job(target, *args):
+            """Run a timed job."""
+            if asyncio.iscoroutine(target) or not is_callback(target):
+                # Jobs that are not run inline are passed to async_add_job
+                return async_add_job(target, *args)
+
+            return run_job(self._wrap(target, args), *args)
+
+        hass.async_add_job = async_add_job
+        hass.async_run_job = async_run_job
+
+        self.enabled = True
+        self.enabled_since = time.time()
+        self._lag_handle = hass.loop.call_later(
+            LAG_INTERVAL, self._async_measure_lag,
+            hass.loop.time() + LAG_INTERVAL)
+        _LOGGER.info("Instrumentation enabled")
+
+    @callback
+    def async_disable(self):
+        """Stop timing the jobs and restore the original methods."""
+        if not self.enabled:
+            return
+
+        for name in ('async_add_job', 'async_run_job'):
+            if name in self._overridden:
+                setattr(self.hass, name, self._overridden[name])
+            else:
+                delattr(self.hass, name)
+        self._overridden = None
+        self._lag_handle.cancel()
+        self._lag_handle = None
+        self.enabled = False
+        _LOGGER.info("Instrumentation disabled")
+
+    def _wrap(self, target, args):
+        """Wrap a job so that its run gets recorded."""
+        scheduled = timer()
+
+        if asyncio.iscoroutine(target):
+            return self._time_coroutine(_job_name(target), target, scheduled)
+
+        if is_callback(target):
+            @callback
+            def timed_callback(*args):
+                """Time the callback."""
+                start = timer()
+                try:
+                    return target(*args)
+                finally:
+                    self._record(target, start - scheduled, timer() - start)
+
+            return timed_callback
+
+        if asyncio.iscoroutinefunction(target):
+            return self._time_coroutine(
+                _job_name(target), target(*args), scheduled)
+
+        def timed_executor_job(*args):
+            """Time the executor job."""
+            start = timer()
+            try:
+                return target(*args)
+            finally:
+                self._record(target, start - scheduled, timer() - start)
+
+        # Keep the routing of the job to its executor pool
+        timed_executor_job.__module__ = getattr(target, '__module__', None)
+
+        return timed_executor_job
+
+    @asyncio.coroutine
+    def _time_coroutine(self, name, coro, scheduled):
+        """Time a coroutine from its first step till it is done."""
+        start = timer()
+        try:
+            return (yield from coro)
+        finally:
+            self._record(name, start - scheduled, timer() - start)
+
+    def _record(self, target, wait, duration):
+        """Record a run of a job, may be called from any thread."""
+        name = target if isinstance(target, str) else _job_name(target)
+
+        with self._lock:
+            stats = self.jobs.get(name)
+            if stats is None:
+                stats = self.jobs[name] = JobStats()
+            stats.add(wait, duration)
+
+    @callback
+    def _async_measure_lag(self, expected):
+        """Measure how late the event loop ran this callback."""
+        now = self.hass.loop.time()
+        self.loop_lag.add(0, max(0, now - expected))
+        self._lag_handle = self.hass.loop.call_later(
+            LAG_INTERVAL, self._async_measure_lag, now + LAG_INTERVAL)
+
+    @asyncio.coroutine
+    def async_profile(self, seconds):
+        """Profile the event loop thread for a number of seconds."""
+        if self.profiling:
+            _LOGGER.warning("Profiler is already running")
+            return
+
+        path = self.hass.config.path(
+            'profile.{}.cprof'.format(int(time.time())))
+        profiler = cProfile.Profile()
+        self.profiling = True
+
+        try:
+            profiler.enable()
+            yield from asyncio.sleep(seconds, loop=self.hass.loop)
+        finally:
+            profiler.disable()
+            self.profiling = False
+
+        yield from self.hass.async_add_job(profiler.dump_stats, path)
+        _LOGGER.info("Profile of %s seconds written to %s", seconds, path)
+
+    @callback
+    def async_report(self):
+        """Return a report of the collected statistics."""
+        with self._lock:
+            jobs = sorted(self.jobs.items(),
+                          key=lambda item: item[1].total_time, reverse=True)
+            jobs = [dict(stats.as_dict(), name=name)
+                    for name, stats in jobs[:REPORTED_JOBS]]
+
+        return {
+            'enabled': self.enabled,
+            'enabled_since': self.enabled_since,
+            'profiling': self.profiling,
+            'jobs': jobs,
+            'executors': {name: pool.stats() for name, pool
+                          in self.hass.executors.items()},
+            'loop_lag': {
+                'count': self.loop_lag.count,
+                'mean': self.loop_lag.as_dict()['mean_time'],
+                'max': self.loop_lag.max_time,
+            },
+            'suppressed_updates': dict(
+                self.hass.data.get(DATA_SUPPRESSED_UPDATES, {})),
+            'template_cache': dict(
+                self.hass.data.get(DATA_TEMPLATE_CACHE_STATS, {})),
+            'tts_cache': dict(self.hass.data.get(DATA_TTS_CACHE_STATS, {})),
+            'static_cache': dict(
+                self.hass.data.get(DATA_STATIC_CACHE_STATS, {})),
+            'setup_times': dict(self.hass.data.get(DATA_SETUP_TIME, {})),
+            'poll_latency': {
+                name: histogram.as_dict() for name, histogram
+                in self.hass.data.get(DATA_POLL_LATENCY, {}).items()},
+            'exporters': {
+                name: exporter.stats() for name, exporter
+                in self.hass.data.get(DATA_EXPORTERS, {}).items()},
+        }
+
+
+class PerformanceView(HomeAssistantView):
+    """View to report the performance statistics."""
+
+    url = URL_API_PERFORMANCE
+    name = 'api:diagnostics:performance'
+
+    @callback
+    def get(self, request):
+        """Return the performance statistics."""
+        instrumentation = request.app['hass'].data[DATA_PERFORMANCE]
+        return self.json(instrumentation.async_report())
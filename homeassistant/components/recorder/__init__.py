@@ -14,7 +14,7 @@ import queue
 import threading
 import time
 from datetime import timedelta, datetime
-from typing import Optional, Dict
+from typing import Any, Dict, List, Optional  # NOQA
 
 import voluptuous as vol
 
@@ -29,7 +29,7 @@ from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
 
-from . import purge, migration
+from . import purge, migration, snapshot, statistics
 from .const import DATA_INSTANCE
 from .util import session_scope
 
@@ -45,6 +45,11 @@ DEFAULT_DB_FILE = 'home-assistant_v2.db'
 CONF_DB_URL = 'db_url'
 CONF_PURGE_DAYS = 'purge_days'
 CONF_EVENT_TYPES = 'event_types'
+CONF_COMMIT_INTERVAL = 'commit_interval'
+CONF_COMMIT_MAX_EVENTS = 'commit_max_events'
+
+DEFAULT_COMMIT_INTERVAL = 1
+DEFAULT_COMMIT_MAX_EVENTS = 1000
 
 CONNECT_RETRY_WAIT = 3
 
@@ -68,6 +73,11 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_PURGE_DAYS):
             vol.All(vol.Coerce(int), vol.Range(min=1)),
         vol.Optional(CONF_DB_URL): cv.string,
+        vol.Optional(CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL):
+            vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_COMMIT_MAX_EVENTS,
+                     default=DEFAULT_COMMIT_MAX_EVENTS):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
     })
 }, extra=vol.ALLOW_EXTRA)
 
@@ -107,6 +117,9 @@ def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the recorder."""
     conf = config.get(DOMAIN, {})
     purge_days = conf.get(CONF_PURGE_DAYS)
+    commit_interval = conf.get(CONF_COMMIT_INTERVAL, DEFAULT_COMMIT_INTERVAL)
+    commit_max_events = conf.get(
+        CONF_COMMIT_MAX_EVENTS, DEFAULT_COMMIT_MAX_EVENTS)
 
     db_url = conf.get(CONF_DB_URL, None)
     if not db_url:
@@ -117,7 +130,8 @@ def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     exclude = conf.get(CONF_EXCLUDE, {})
     instance = hass.data[DATA_INSTANCE] = Recorder(
         hass, purge_days=purge_days, uri=db_url, include=include,
-        exclude=exclude)
+        exclude=exclude, commit_interval=commit_interval,
+        commit_max_events=commit_max_events)
     instance.async_initialize()
     instance.start()
 
@@ -128,12 +142,16 @@ class Recorder(threading.Thread):
     """A threaded recorder class."""
 
     def __init__(self, hass: HomeAssistant, purge_days: int, uri: str,
-                 include: Dict, exclude: Dict) -> None:
+                 include: Dict, exclude: Dict,
+                 commit_interval: float=DEFAULT_COMMIT_INTERVAL,
+                 commit_max_events: int=DEFAULT_COMMIT_MAX_EVENTS) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name='Recorder')
 
         self.hass = hass
         self.purge_days = purge_days
+        self.commit_interval = commit_interval
+        self.commit_max_events = commit_max_events
         self.queue = queue.Queue()  # type: Any
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -149,6 +167,31 @@ class Recorder(threading.Thread):
 
         self.get_session = None
 
+        # Events and states that are added to the open transaction
+        self._pending = []  # type: List[Any]
+        self._commit_deadline = None  # type: Optional[float]
+
+        # The purge that is in progress
+        self.purge_job = None  # type: Any
+
+        # Last recorded states that still have to be written to last_states
+        self.snapshot = snapshot.StateSnapshot()
+
+        # Metrics about the batches that got committed
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.commit_count = 0
+
+    @property
+    def queue_depth(self):
+        """Return the number of events waiting to be processed."""
+        return self.queue.qsize()
+
+    @property
+    def pending_events(self):
+        """Return the number of events in the open transaction."""
+        return len(self._pending)
+
     @callback
     def async_initialize(self):
         """Initialize the recorder."""
@@ -189,7 +232,6 @@ class Recorder(threading.Thread):
             self.hass.add_job(connection_failed)
             return
 
-        purge_task = object()
         shutdown_task = object()
         hass_started = concurrent.futures.Future()
 
@@ -223,7 +265,7 @@ class Recorder(threading.Thread):
                 @callback
                 def do_purge(now):
                     """Event listener for purging data."""
-                    self.queue.put(purge_task)
+                    self.queue.put(purge.PurgeJob(self.purge_days))
 
                 async_track_time_interval(self.hass, do_purge,
                                           timedelta(days=2))
@@ -236,15 +278,31 @@ class Recorder(threading.Thread):
             return
 
         while True:
-            event = self.queue.get()
+            if self._pending:
+                wait = max(0, self._commit_deadline - time.monotonic())
+            else:
+                wait = None
+
+            try:
+                event = self.queue.get(timeout=wait)
+            except queue.Empty:
+                self._commit_pending()
+                continue
 
             if event is None:
+                self._commit_pending()
+                self._write_snapshot(final=True)
                 self._close_run()
                 self._close_connection()
                 self.queue.task_done()
                 return
-            elif event is purge_task:
-                purge.purge_old_data(self, self.purge_days)
+            elif isinstance(event, purge.PurgeJob):
+                self._run_purge_chunk(event)
+                self.queue.task_done()
+                # The requeued job keeps the queue busy, commit when due
+                if self._pending and \
+                        time.monotonic() >= self._commit_deadline:
+                    self._commit_pending()
                 continue
             elif event.event_type == EVENT_TIME_CHANGED:
                 self.queue.task_done()
@@ -273,17 +331,103 @@ class Recorder(threading.Thread):
                     self.queue.task_done()
                     continue
 
-            with session_scope(session=self.get_session()) as session:
-                dbevent = Events.from_event(event)
-                session.add(dbevent)
+            dbevent = Events.from_event(event)
 
-                if event.event_type == EVENT_STATE_CHANGED:
-                    dbstate = States.from_event(event)
-                    dbstate.event_id = dbevent.event_id
-                    session.add(dbstate)
+            if event.event_type == EVENT_STATE_CHANGED:
+                dbstate = States.from_event(event)
+            else:
+                dbstate = None
+
+            if not self._pending:
+                self._commit_deadline = \
+                    time.monotonic() + self.commit_interval
+            self._pending.append((dbevent, dbstate))
 
+            if len(self._pending) >= self.commit_max_events or \
+                    time.monotonic() >= self._commit_deadline:
+                self._commit_pending()
+
+    def _run_purge_chunk(self, job):
+        """Run a chunk of the purge and queue the job again if unfinished.
+
+        The job goes to the back of the queue, so the events recorded in
+        the meantime are processed before the next chunk.
+        """
+        if self.purge_job is not None and self.purge_job is not job:
+            _LOGGER.debug("Purge already in progress, skipping")
+            return
+
+        try:
+            finished = job.run_chunk(self)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error purging old data")
+            finished = True
+
+        if finished:
+            self.purge_job = None
+        else:
+            self.purge_job = job
+            self.queue.put(job)
+
+    def _commit_pending(self):
+        """Write all pending events and states in a single transaction.
+
+        The numeric states are rolled up into the long-term statistics
+        and collected for the state snapshot after the commit. The queue
+        tasks of the pending events are only marked as done after that, so
+        that block_till_done waits for the data to be stored.
+        """
+        pending = self._pending
+        self._pending = []
+
+        if not pending:
+            return
+
+        session = self.get_session()
+
+        try:
+            session.add_all([dbevent for dbevent, _ in pending])
+            # Flush the events first so the states can refer to them
+            session.flush()
+
+            dbstates = []
+            for dbevent, dbstate in pending:
+                if dbstate is not None:
+                    dbstate.event_id = dbevent.event_id
+                    dbstates.append(dbstate)
+
+            # States do not need their primary key back, insert in bulk
+            session.bulk_save_objects(dbstates)
+            session.commit()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Error saving %s events: %s", len(pending), err)
+            session.rollback()
+            dbstates = []
+        finally:
+            session.close()
+
+        try:
+            statistics.compile_statistics(self, dbstates)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error compiling statistics")
+
+        self.snapshot.add(dbstates)
+        self._write_snapshot()
+
+        self.last_batch_size = len(pending)
+        self.max_batch_size = max(self.max_batch_size, len(pending))
+        self.commit_count += 1
+
+        for _ in pending:
             self.queue.task_done()
 
+    def _write_snapshot(self, final=False):
+        """Write the last recorded states to the snapshot if it is due."""
+        try:
+            self.snapshot.write(self, final)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error writing the state snapshot")
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
@@ -307,11 +451,14 @@ class Recorder(threading.Thread):
         # pylint: disable=unused-variable
         @event.listens_for(Engine, "connect")
         def set_sqlite_pragma(dbapi_connection, connection_record):
-            """Set sqlite's WAL mode."""
+            """Set sqlite's WAL mode and incremental vacuum."""
             if self.db_url.startswith("sqlite://"):
                 old_isolation = dbapi_connection.isolation_level
                 dbapi_connection.isolation_level = None
                 cursor = dbapi_connection.cursor()
+                # Only applies to new databases, existing ones keep
+                # reusing their free pages
+                cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
                 cursor.execute("PRAGMA journal_mode=WAL")
                 cursor.close()
                 dbapi_connection.isolation_level = old_isolation
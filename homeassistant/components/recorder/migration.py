@@ -54,6 +54,16 @@ def _create_index(engine, table_name, index_name):
     _LOGGER.debug("Finished creating %s", index_name)
 
 
+def _create_table(engine, table_name):
+    """Create a table if it does not exist yet."""
+    from . import models
+
+    table = models.Base.metadata.tables[table_name]
+    _LOGGER.debug("Creating %s table", table_name)
+    table.create(engine, checkfirst=True)
+    _LOGGER.debug("Finished creating %s", table_name)
+
+
 def _apply_update(engine, new_version):
     """Perform operations to bring schema up to date."""
     if new_version == 1:
@@ -66,6 +76,12 @@ def _apply_update(engine, new_version):
         _create_index(engine, "states", "ix_states_entity_id_created")
     elif new_version == 3:
         _create_index(engine, "states", "ix_states_created_domain")
+    elif new_version == 4:
+        _create_table(engine, "statistics")
+    elif new_version == 5:
+        _create_index(engine, "states", "ix_states_event_id")
+    elif new_version == 6:
+        _create_table(engine, "last_states")
     else:
         raise ValueError("No schema migration defined for version {}"
                          .format(new_version))
@@ -4,8 +4,8 @@ from datetime import datetime
 import logging
 
 from sqlalchemy import (
-    Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text,
-    distinct)
+    Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String,
+    Text, distinct)
 from sqlalchemy.ext.declarative import declarative_base
 
 import homeassistant.util.dt as dt_util
@@ -16,7 +16,7 @@ from homeassistant.remote import JSONEncoder
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 3
+SCHEMA_VERSION = 6
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,7 +47,7 @@ class Events(Base):  # type: ignore
                 self.event_type,
                 json.loads(self.event_data),
                 EventOrigin(self.origin),
-                _process_timestamp(self.time_fired)
+                process_timestamp(self.time_fired)
             )
         except ValueError:
             # When json.loads fails
@@ -77,7 +77,8 @@ class States(Base):   # type: ignore
                       Index('ix_states_entity_id_created',
                             'entity_id', 'created'),
                       Index('ix_states_created_domain',
-                            'created', 'domain'),)
+                            'created', 'domain'),
+                      Index('ix_states_event_id', 'event_id'),)
 
     @staticmethod
     def from_event(event):
@@ -110,8 +111,8 @@ class States(Base):   # type: ignore
             return State(
                 self.entity_id, self.state,
                 json.loads(self.attributes),
-                _process_timestamp(self.last_changed),
-                _process_timestamp(self.last_updated)
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated)
             )
         except ValueError:
             # When json.loads fails
@@ -119,6 +120,67 @@ class States(Base):   # type: ignore
             return None
 
 
+class LastStates(Base):   # type: ignore
+    """Snapshot of the last recorded state of every entity."""
+
+    __tablename__ = 'last_states'
+    entity_id = Column(String(255), primary_key=True)
+    run_id = Column(Integer, ForeignKey('recorder_runs.run_id'), index=True)
+    domain = Column(String(64))
+    state = Column(String(255))
+    attributes = Column(Text)
+    last_changed = Column(DateTime(timezone=True))
+    last_updated = Column(DateTime(timezone=True))
+    created = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    @staticmethod
+    def from_state(dbstate, run_id):
+        """Create a snapshot row from a recorded state."""
+        return LastStates(entity_id=dbstate.entity_id,
+                          run_id=run_id,
+                          domain=dbstate.domain,
+                          state=dbstate.state,
+                          attributes=dbstate.attributes,
+                          last_changed=dbstate.last_changed,
+                          last_updated=dbstate.last_updated,
+                          created=datetime.utcnow())
+
+    def to_native(self):
+        """Convert to an HA state object."""
+        try:
+            return State(
+                self.entity_id, self.state,
+                json.loads(self.attributes),
+                process_timestamp(self.last_changed),
+                process_timestamp(self.last_updated)
+            )
+        except ValueError:
+            # When json.loads fails
+            _LOGGER.exception("Error converting row to state: %s", self)
+            return None
+
+
+class Statistics(Base):   # type: ignore
+    """Hourly and daily rollups of numeric states."""
+
+    __tablename__ = 'statistics'
+    id = Column(Integer, primary_key=True)
+    period = Column(String(8))
+    domain = Column(String(64))
+    entity_id = Column(String(255))
+    start = Column(DateTime(timezone=True))
+    min = Column(Float)
+    max = Column(Float)
+    mean = Column(Float)
+    last = Column(Float)
+    count = Column(Integer)
+
+    __table_args__ = (Index('ix_statistics_period_entity_id_start',
+                            'period', 'entity_id', 'start'),
+                      Index('ix_statistics_period_start',
+                            'period', 'start'),)
+
+
 class RecorderRuns(Base):   # type: ignore
     """Representation of recorder run."""
 
@@ -167,7 +229,7 @@ class SchemaChanges(Base):   # type: ignore
     changed = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
-def _process_timestamp(ts):
+def process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
         return None
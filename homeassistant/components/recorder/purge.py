@@ -1,6 +1,7 @@
 """Purge old data helper."""
 from datetime import timedelta
 import logging
+import time
 
 import homeassistant.util.dt as dt_util
 
@@ -8,24 +9,137 @@ from .util import session_scope
 
 _LOGGER = logging.getLogger(__name__)
 
+# Maximum range of primary keys that is deleted in a single chunk
+PURGE_CHUNK_SIZE = 10000
+
+# Number of free pages that are released by a single incremental vacuum
+VACUUM_CHUNK_PAGES = 2000
+
+# Value of PRAGMA auto_vacuum when incremental vacuum is enabled
+SQLITE_AUTO_VACUUM_INCREMENTAL = 2
+
 
 def purge_old_data(instance, purge_days):
-    """Purge events and states older than purge_days ago."""
-    from .models import States, Events
-    purge_before = dt_util.utcnow() - timedelta(days=purge_days)
+    """Purge events and states older than purge_days ago.
+
+    The long-term statistics are compiled when the states are recorded and
+    are kept, so they remain available after the raw rows are gone.
+    """
+    job = PurgeJob(purge_days)
+
+    while not job.run_chunk(instance):
+        pass
+
+
+class PurgeJob(object):
+    """A resumable purge that deletes the old rows in chunks.
+
+    Every call to run_chunk does a bounded amount of work, so the recorder
+    can process the queued events between the chunks.
+    """
+
+    def __init__(self, purge_days):
+        """Initialize the purge job."""
+        self.purge_before = dt_util.utcnow() - timedelta(days=purge_days)
+        self.started = time.monotonic()
+        self.deleted_states = 0
+        self.deleted_events = 0
+        self.vacuumed_pages = 0
+        self._steps = [self._purge_states, self._purge_events, self._vacuum]
+
+    @property
+    def elapsed(self):
+        """Return the number of seconds since the purge started."""
+        return time.monotonic() - self.started
+
+    def run_chunk(self, instance):
+        """Run the next chunk of the purge, return True when finished."""
+        if self._steps[0](instance):
+            self._steps.pop(0)
+
+        if self._steps:
+            _LOGGER.debug("Purge in progress: deleted %s states and %s "
+                          "events in %.1f seconds", self.deleted_states,
+                          self.deleted_events, self.elapsed)
+            return False
+
+        _LOGGER.info("Purged %s states and %s events older than %s in %.1f "
+                     "seconds", self.deleted_states, self.deleted_events,
+                     self.purge_before, self.elapsed)
+        return True
+
+    def _purge_states(self, instance):
+        """Delete a chunk of old states, return True when none are left."""
+        from .models import States
+
+        deleted = _purge_chunk(instance, States, States.state_id,
+                               States.created < self.purge_before)
+        self.deleted_states += deleted
+        return deleted == 0
 
+    def _purge_events(self, instance):
+        """Delete a chunk of old events, return True when none are left."""
+        from .models import Events
+
+        deleted = _purge_chunk(instance, Events, Events.event_id,
+                               Events.created < self.purge_before)
+        self.deleted_events += deleted
+        return deleted == 0
+
+    def _vacuum(self, instance):
+        """Release free pages to the file system, return True when done."""
+        if instance.engine.dialect.name != 'sqlite' or \
+                not (self.deleted_states or self.deleted_events):
+            return True
+
+        auto_vacuum = instance.engine.execute(
+            "PRAGMA auto_vacuum").scalar()
+
+        if auto_vacuum != SQLITE_AUTO_VACUUM_INCREMENTAL:
+            # Databases created without incremental vacuum would need a
+            # full VACUUM, which blocks the recorder for minutes on large
+            # databases. SQLite reuses the free pages for new rows instead.
+            _LOGGER.debug("Incremental vacuum is not enabled, skipping")
+            return True
+
+        free_pages = instance.engine.execute(
+            "PRAGMA freelist_count").scalar()
+
+        if not free_pages:
+            return True
+
+        _incremental_vacuum(instance.engine, VACUUM_CHUNK_PAGES)
+        self.vacuumed_pages += min(free_pages, VACUUM_CHUNK_PAGES)
+        return free_pages <= VACUUM_CHUNK_PAGES
+
+
+def _purge_chunk(instance, table, primary_key, criteria):
+    """Delete the matching rows in the next range of primary keys."""
     with session_scope(session=instance.get_session()) as session:
-        deleted_rows = session.query(States) \
-                              .filter((States.created < purge_before)) \
-                              .delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s states", deleted_rows)
-
-        deleted_rows = session.query(Events) \
-                              .filter((Events.created < purge_before)) \
-                              .delete(synchronize_session=False)
-        _LOGGER.debug("Deleted %s events", deleted_rows)
-
-    # Execute sqlite vacuum command to free up space on disk
-    if instance.engine.driver == 'sqlite':
-        _LOGGER.info("Vacuuming SQLite to free space")
-        instance.engine.execute("VACUUM")
+        first_id = session.query(primary_key).filter(criteria) \
+                          .order_by(primary_key).limit(1).scalar()
+
+        if first_id is None:
+            return 0
+
+        return session.query(table) \
+                      .filter(criteria &
+                              (primary_key < first_id + PURGE_CHUNK_SIZE)) \
+                      .delete(synchronize_session=False)
+
+
+def _incremental_vacuum(engine, pages):
+    """Release up to pages free pages of a SQLite database.
+
+    SQLite frees a single page per step of the statement, so the results
+    have to be fetched for the whole vacuum to run.
+    """
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("PRAGMA incremental_vacuum({})".format(pages))
+        cursor.fetchall()
+        cursor.close()
+        connection.commit()
+    finally:
+        connection.close()
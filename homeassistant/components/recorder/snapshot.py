@@ -0,0 +1,101 @@
+"""Snapshot of the last recorded state of every entity."""
+import logging
+import time
+
+from .util import session_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between writes of the changed states to the snapshot
+SNAPSHOT_INTERVAL = 300
+
+# Number of entities that are removed from the snapshot per query
+DELETE_CHUNK_SIZE = 500
+
+
+class StateSnapshot(object):
+    """Keep the last_states table up to date with the recorded states.
+
+    The states of a committed batch are collected in memory and written
+    to the table at most once per SNAPSHOT_INTERVAL and when the recorder
+    shuts down. Only entities that changed since the previous write are
+    written.
+    """
+
+    def __init__(self, interval=SNAPSHOT_INTERVAL):
+        """Initialize the snapshot."""
+        self.interval = interval
+        self.pending = {}
+        self._last_write = time.monotonic()
+
+    def add(self, dbstates):
+        """Collect the states of a committed batch."""
+        for dbstate in dbstates:
+            self.pending[dbstate.entity_id] = dbstate
+
+    def write(self, instance, final=False):
+        """Write the collected states if the interval has passed.
+
+        The final write at shutdown also removes the entities that were
+        not recorded during the current run.
+        """
+        from .models import LastStates
+
+        if not final and (
+                not self.pending or
+                time.monotonic() - self._last_write < self.interval):
+            return
+
+        pending = self.pending
+        self.pending = {}
+        self._last_write = time.monotonic()
+        run_id = instance.run_info.run_id
+
+        with session_scope(session=instance.get_session()) as session:
+            entity_ids = list(pending)
+            # Stay below the limit of bound parameters of SQLite
+            for idx in range(0, len(entity_ids), DELETE_CHUNK_SIZE):
+                session.query(LastStates).filter(LastStates.entity_id.in_(
+                    entity_ids[idx:idx + DELETE_CHUNK_SIZE])).delete(
+                        synchronize_session=False)
+
+            if pending:
+                session.bulk_save_objects([
+                    LastStates.from_state(dbstate, run_id)
+                    for dbstate in pending.values()])
+
+            if final:
+                session.query(LastStates).filter(
+                    LastStates.run_id != run_id).delete(
+                        synchronize_session=False)
+
+        _LOGGER.debug("Wrote %s states to the snapshot", len(pending))
+
+
+def get_snapshot_states(hass, run, utc_point_in_time):
+    """Return the last states of a run, or None if it has no snapshot.
+
+    The snapshot is completed with the states that were recorded after it
+    was written and before utc_point_in_time, which only happens when the
+    run did not shut down cleanly.
+    """
+    from .models import LastStates, States
+
+    with session_scope(hass=hass) as session:
+        rows = session.query(LastStates).filter(
+            LastStates.run_id == run.run_id).all()
+
+        if not rows:
+            return None
+
+        written = max(row.created for row in rows)
+        states = {row.entity_id: row.to_native() for row in rows}
+
+        query = session.query(States).filter(
+            (States.created >= written) &
+            (States.created < utc_point_in_time)).order_by(States.state_id)
+
+        for row in query:
+            states[row.entity_id] = row.to_native()
+
+    return [state for state in states.values() if state is not None]
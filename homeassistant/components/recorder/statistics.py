@@ -0,0 +1,118 @@
+"""Long-term statistics of numeric states."""
+import logging
+import math
+
+from .util import session_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_HOUR = 'hour'
+PERIOD_DAY = 'day'
+PERIODS = (PERIOD_HOUR, PERIOD_DAY)
+
+# Only states of these domains are aggregated
+STATISTICS_DOMAINS = ('sensor',)
+
+
+def period_start(period, utc_time):
+    """Return the start of the period that contains utc_time."""
+    start = utc_time.replace(minute=0, second=0, microsecond=0)
+
+    if period == PERIOD_DAY:
+        start = start.replace(hour=0)
+
+    return start
+
+
+def compile_statistics(instance, dbstates):
+    """Merge the numeric states of a committed batch into the rollups.
+
+    The rows of all periods touched by the batch are loaded with a single
+    query per period and updated in one transaction.
+    """
+    buckets = _aggregate(dbstates)
+
+    if not buckets:
+        return
+
+    with session_scope(session=instance.get_session()) as session:
+        for period in PERIODS:
+            _merge_period(session, period, {
+                key[1:]: bucket for key, bucket in buckets.items()
+                if key[0] == period})
+
+
+def _aggregate(dbstates):
+    """Aggregate the numeric states per period, entity and period start."""
+    from .models import process_timestamp
+
+    buckets = {}
+
+    for dbstate in dbstates:
+        if dbstate.domain not in STATISTICS_DOMAINS:
+            continue
+
+        try:
+            value = float(dbstate.state)
+        except (TypeError, ValueError):
+            continue
+
+        if not math.isfinite(value):
+            continue
+
+        last_updated = process_timestamp(dbstate.last_updated)
+
+        for period in PERIODS:
+            key = (period, dbstate.entity_id,
+                   period_start(period, last_updated))
+            bucket = buckets.get(key)
+
+            if bucket is None:
+                buckets[key] = {
+                    'domain': dbstate.domain, 'min': value, 'max': value,
+                    'total': value, 'last': value, 'count': 1}
+                continue
+
+            bucket['min'] = min(bucket['min'], value)
+            bucket['max'] = max(bucket['max'], value)
+            bucket['total'] += value
+            bucket['last'] = value
+            bucket['count'] += 1
+
+    return buckets
+
+
+def _merge_period(session, period, buckets):
+    """Merge the buckets of a single period into the stored rows."""
+    from .models import Statistics, process_timestamp
+
+    if not buckets:
+        return
+
+    starts = [start for _, start in buckets]
+    query = session.query(Statistics).filter(
+        (Statistics.period == period) &
+        (Statistics.entity_id.in_({entity_id for entity_id, _ in buckets})) &
+        (Statistics.start >= min(starts)) &
+        (Statistics.start <= max(starts)))
+
+    rows = {(row.entity_id, process_timestamp(row.start)): row
+            for row in query}
+
+    for (entity_id, start), bucket in buckets.items():
+        row = rows.get((entity_id, start))
+
+        if row is None:
+            session.add(Statistics(
+                period=period, domain=bucket['domain'], entity_id=entity_id,
+                start=start, min=bucket['min'], max=bucket['max'],
+                mean=bucket['total'] / bucket['count'], last=bucket['last'],
+                count=bucket['count']))
+            continue
+
+        count = row.count + bucket['count']
+        row.mean = (row.mean * row.count + bucket['total']) / count
+        row.min = min(row.min, bucket['min'])
+        row.max = max(row.max, bucket['max'])
+        row.last = bucket['last']
+        row.count = count
@@ -15,8 +15,8 @@ import homeassistant.helpers.config_validation as cv
 import homeassistant.util.dt as dt_util
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.const import (
-    CONF_NAME, CONF_ENTITY_ID, CONF_STATE, CONF_TYPE,
-    EVENT_HOMEASSISTANT_START)
+    ATTR_UNIT_OF_MEASUREMENT, CONF_NAME, CONF_ENTITY_ID, CONF_STATE,
+    CONF_TYPE, EVENT_HOMEASSISTANT_START)
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.event import track_state_change
@@ -34,7 +34,12 @@ CONF_PERIOD_KEYS = [CONF_START, CONF_END, CONF_DURATION]
 CONF_TYPE_TIME = 'time'
 CONF_TYPE_RATIO = 'ratio'
 CONF_TYPE_COUNT = 'count'
-CONF_TYPE_KEYS = [CONF_TYPE_TIME, CONF_TYPE_RATIO, CONF_TYPE_COUNT]
+CONF_TYPE_MIN = 'min'
+CONF_TYPE_MEAN = 'mean'
+CONF_TYPE_MAX = 'max'
+CONF_TYPE_NUMERIC_KEYS = [CONF_TYPE_MIN, CONF_TYPE_MEAN, CONF_TYPE_MAX]
+CONF_TYPE_KEYS = [CONF_TYPE_TIME, CONF_TYPE_RATIO, CONF_TYPE_COUNT] + \
+    CONF_TYPE_NUMERIC_KEYS
 
 DEFAULT_NAME = 'unnamed statistics'
 UNITS = {
@@ -46,6 +51,9 @@ ICON = 'mdi:chart-line'
 
 ATTR_VALUE = 'value'
 
+# Periods of at least this length are read from the recorder statistics
+STATISTICS_MIN_DURATION = datetime.timedelta(days=1)
+
 
 def exactly_two_period_keys(conf):
     """Ensure exactly 2 of CONF_PERIOD_KEYS are provided."""
@@ -61,15 +69,24 @@ def exactly_two_period_keys(conf):
     return conf
 
 
+def state_for_state_types(conf):
+    """Ensure a state is provided for the types that measure a state."""
+    if conf[CONF_TYPE] not in CONF_TYPE_NUMERIC_KEYS and \
+            conf[CONF_STATE] is None:
+        raise vol.Invalid('You must provide a state for type {}'
+                          .format(conf[CONF_TYPE]))
+    return conf
+
+
 PLATFORM_SCHEMA = vol.All(PLATFORM_SCHEMA.extend({
     vol.Required(CONF_ENTITY_ID): cv.entity_id,
-    vol.Required(CONF_STATE): cv.string,
+    vol.Optional(CONF_STATE, default=None): cv.string,
     vol.Optional(CONF_START, default=None): cv.template,
     vol.Optional(CONF_END, default=None): cv.template,
     vol.Optional(CONF_DURATION, default=None): cv.time_period,
     vol.Optional(CONF_TYPE, default=CONF_TYPE_TIME): vol.In(CONF_TYPE_KEYS),
     vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
-}), exactly_two_period_keys)
+}), exactly_two_period_keys, state_for_state_types)
 
 
 # noinspection PyUnusedLocal
@@ -109,7 +126,7 @@ class HistoryStatsSensor(Entity):
         self._end = end
         self._type = sensor_type
         self._name = name
-        self._unit_of_measurement = UNITS[sensor_type]
+        self._unit_of_measurement = UNITS.get(sensor_type)
 
         self._period = (datetime.datetime.now(), datetime.datetime.now())
         self.value = 0
@@ -133,7 +150,8 @@ class HistoryStatsSensor(Entity):
     @property
     def state(self):
         """Return the state of the sensor."""
-        if self._type == CONF_TYPE_TIME:
+        if self._type == CONF_TYPE_TIME or \
+                self._type in CONF_TYPE_NUMERIC_KEYS:
             return round(self.value, 2)
 
         if self._type == CONF_TYPE_RATIO:
@@ -145,6 +163,12 @@ class HistoryStatsSensor(Entity):
     @property
     def unit_of_measurement(self):
         """Return the unit the value is expressed in."""
+        if self._type in CONF_TYPE_NUMERIC_KEYS:
+            state = self._hass.states.get(self._entity_id)
+            if state is None:
+                return None
+            return state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+
         return self._unit_of_measurement
 
     @property
@@ -155,6 +179,9 @@ class HistoryStatsSensor(Entity):
     @property
     def device_state_attributes(self):
         """Return the state attributes of the sensor."""
+        if self._type in CONF_TYPE_NUMERIC_KEYS:
+            return None
+
         hsh = HistoryStatsHelper
         return {
             ATTR_VALUE: hsh.pretty_duration(self.value),
@@ -195,6 +222,10 @@ class HistoryStatsSensor(Entity):
             # Don't compute anything as the value cannot have changed
             return
 
+        if self._type in CONF_TYPE_NUMERIC_KEYS:
+            self.update_numeric(start, end)
+            return
+
         # Get history between start and end
         history_list = history.state_changes_during_period(
             self.hass, start, end, str(self._entity_id))
@@ -234,6 +265,48 @@ class HistoryStatsSensor(Entity):
         # Save counter
         self.count = count
 
+    def update_numeric(self, start, end):
+        """Compute the min, mean or max value of the entity in the period.
+
+        Long periods are read from the hourly statistics of the recorder,
+        these are also available after the recorded states are purged.
+        """
+        if end - start >= STATISTICS_MIN_DURATION:
+            rollups = history.get_statistics(
+                self.hass, start, end, self._entity_id).get(self._entity_id)
+
+            if not rollups:
+                return
+
+            count = sum(rollup['count'] for rollup in rollups)
+            values = {
+                CONF_TYPE_MIN: min(rollup['min'] for rollup in rollups),
+                CONF_TYPE_MEAN: sum(rollup['mean'] * rollup['count']
+                                    for rollup in rollups) / count,
+                CONF_TYPE_MAX: max(rollup['max'] for rollup in rollups),
+            }
+        else:
+            states = history.get_significant_state_values(
+                self.hass, start, end, self._entity_id).get(self._entity_id)
+            numbers = []
+
+            for item in states or []:
+                try:
+                    numbers.append(float(item['state']))
+                except ValueError:
+                    continue
+
+            if not numbers:
+                return
+
+            values = {
+                CONF_TYPE_MIN: min(numbers),
+                CONF_TYPE_MEAN: sum(numbers) / len(numbers),
+                CONF_TYPE_MAX: max(numbers),
+            }
+
+        self.value = values[self._type]
+
     def update_period(self):
         """Parse the templates and store a datetime tuple in _period."""
         start = None
@@ -18,7 +18,8 @@ from homeassistant.const import (
 from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity, async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_state_change, async_track_template_result)
 from homeassistant.helpers.restore_state import async_get_last_state
 
 _LOGGER = logging.getLogger(__name__)
@@ -45,8 +46,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     for device, device_config in config[CONF_SENSORS].items():
         state_template = device_config[CONF_VALUE_TEMPLATE]
         icon_template = device_config.get(CONF_ICON_TEMPLATE)
-        entity_ids = (device_config.get(ATTR_ENTITY_ID) or
-                      state_template.extract_entities())
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
         friendly_name = device_config.get(ATTR_FRIENDLY_NAME, device)
         unit_of_measurement = device_config.get(ATTR_UNIT_OF_MEASUREMENT)
 
@@ -102,11 +102,25 @@ class SensorTemplate(Entity):
             """Handle device state changes."""
             self.hass.async_add_job(self.async_update_ha_state(True))
 
+        @callback
+        def template_sensor_render_listener(entity, old_state, new_state,
+                                            render_info):
+            """Handle changes of the states read by a template."""
+            self.hass.async_add_job(self.async_update_ha_state(True))
+
         @callback
         def template_sensor_startup(event):
             """Update template on startup."""
-            async_track_state_change(
-                self.hass, self._entities, template_sensor_state_listener)
+            if self._entities is not None:
+                async_track_state_change(
+                    self.hass, self._entities, template_sensor_state_listener)
+            else:
+                # Track the states that are read while rendering
+                for template in (self._template, self._icon_template):
+                    if template is not None:
+                        async_track_template_result(
+                            self.hass, template,
+                            template_sensor_render_listener)
 
             self.hass.async_add_job(self.async_update_ha_state(True))
 
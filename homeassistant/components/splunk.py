@@ -13,6 +13,7 @@ import voluptuous as vol
 from homeassistant.const import (
     CONF_NAME, CONF_HOST, CONF_PORT, CONF_SSL, CONF_TOKEN, EVENT_STATE_CHANGED)
 from homeassistant.helpers import state as state_helper
+from homeassistant.helpers.exporter import EXPORTER_SCHEMA, setup_exporter
 import homeassistant.helpers.config_validation as cv
 
 _LOGGER = logging.getLogger(__name__)
@@ -23,9 +24,10 @@ DEFAULT_HOST = 'localhost'
 DEFAULT_PORT = 8088
 DEFAULT_SSL = False
 DEFAULT_NAME = 'HASS'
+TIMEOUT = 10
 
 CONFIG_SCHEMA = vol.Schema({
-    DOMAIN: vol.Schema({
+    DOMAIN: EXPORTER_SCHEMA.extend({
         vol.Required(CONF_TOKEN): cv.string,
         vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
@@ -52,9 +54,26 @@ def setup(hass, config):
     event_collector = '{}{}:{}/services/collector/event'.format(
         uri_scheme, host, port)
     headers = {'Authorization': 'Splunk {}'.format(token)}
+    session = requests.Session()
+
+    def post_events(batch):
+        """Post a batch of events, client errors are not retried."""
+        # The event collector accepts several events in one request
+        response = session.post(event_collector, data='\n'.join(batch),
+                                headers=headers, timeout=TIMEOUT)
+
+        if 400 <= response.status_code < 500:
+            _LOGGER.error("Error saving %s events to Splunk: %s",
+                          len(batch), response.text)
+            return
+
+        response.raise_for_status()
+
+    exporter = setup_exporter(hass, DOMAIN, post_events, conf,
+                              close=session.close)
 
     def splunk_event_listener(event):
-        """Listen for new messages on the bus and sends them to Splunk."""
+        """Listen for new messages on the bus and queue them for Splunk."""
         state = event.data.get('new_state')
 
         if state is None:
@@ -76,15 +95,11 @@ def setup(hass, config):
             }
         ]
 
-        try:
-            payload = {
-                "host": event_collector,
-                "event": json_body,
-            }
-            requests.post(event_collector, data=json.dumps(payload),
-                          headers=headers, timeout=10)
-        except requests.exceptions.RequestException as error:
-            _LOGGER.exception("Error saving event to Splunk: %s", error)
+        payload = {
+            "host": event_collector,
+            "event": json_body,
+        }
+        exporter.put(json.dumps(payload))
 
     hass.bus.listen(EVENT_STATE_CHANGED, splunk_event_listener)
 
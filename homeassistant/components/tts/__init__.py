@@ -5,19 +5,22 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/tts/
 """
 import asyncio
+from collections import Counter, OrderedDict
 import ctypes
 import functools as ft
 import hashlib
+import json
 import logging
 import mimetypes
 import os
 import re
 import io
+import time
 
 from aiohttp import web
 import voluptuous as vol
 
-from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.const import ATTR_ENTITY_ID, DATA_TTS_CACHE_STATS
 from homeassistant.setup import async_prepare_setup_platform
 from homeassistant.core import callback
 from homeassistant.config import load_yaml_config_file
@@ -43,15 +46,23 @@ CONF_LANG = 'language'
 CONF_CACHE = 'cache'
 CONF_CACHE_DIR = 'cache_dir'
 CONF_TIME_MEMORY = 'time_memory'
+CONF_MEMORY_SIZE = 'memory_size'
 
 DEFAULT_CACHE = True
 DEFAULT_CACHE_DIR = "tts"
 DEFAULT_TIME_MEMORY = 300
+DEFAULT_MEMORY_SIZE = 10
+
+# Index of the cache dir, its modification time is set to the one of the
+# dir so that a change of the dir afterwards invalidates the index
+INDEX_FILE = '.index.json'
 
 SERVICE_SAY = 'say'
+SERVICE_PRERENDER = 'prerender'
 SERVICE_CLEAR_CACHE = 'clear_cache'
 
 ATTR_MESSAGE = 'message'
+ATTR_MESSAGES = 'messages'
 ATTR_CACHE = 'cache'
 ATTR_LANGUAGE = 'language'
 ATTR_OPTIONS = 'options'
@@ -65,6 +76,8 @@ PLATFORM_SCHEMA = cv.PLATFORM_SCHEMA.extend({
     vol.Optional(CONF_CACHE_DIR, default=DEFAULT_CACHE_DIR): cv.string,
     vol.Optional(CONF_TIME_MEMORY, default=DEFAULT_TIME_MEMORY):
         vol.All(vol.Coerce(int), vol.Range(min=60, max=57600)),
+    vol.Optional(CONF_MEMORY_SIZE, default=DEFAULT_MEMORY_SIZE):
+        vol.All(vol.Coerce(int), vol.Range(min=0)),
 })
 
 SCHEMA_SERVICE_SAY = vol.Schema({
@@ -75,6 +88,13 @@ SCHEMA_SERVICE_SAY = vol.Schema({
     vol.Optional(ATTR_OPTIONS): dict,
 })
 
+SCHEMA_SERVICE_PRERENDER = vol.Schema({
+    vol.Required(ATTR_MESSAGES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_CACHE): cv.boolean,
+    vol.Optional(ATTR_LANGUAGE): cv.string,
+    vol.Optional(ATTR_OPTIONS): dict,
+})
+
 SCHEMA_SERVICE_CLEAR_CACHE = vol.Schema({})
 
 
@@ -88,8 +108,10 @@ def async_setup(hass, config):
         use_cache = conf.get(CONF_CACHE, DEFAULT_CACHE)
         cache_dir = conf.get(CONF_CACHE_DIR, DEFAULT_CACHE_DIR)
         time_memory = conf.get(CONF_TIME_MEMORY, DEFAULT_TIME_MEMORY)
+        memory_size = conf.get(CONF_MEMORY_SIZE, DEFAULT_MEMORY_SIZE)
 
-        yield from tts.async_init_cache(use_cache, cache_dir, time_memory)
+        yield from tts.async_init_cache(
+            use_cache, cache_dir, time_memory, memory_size)
     except (HomeAssistantError, KeyError) as err:
         _LOGGER.error("Error on cache init %s", err)
         return False
@@ -158,6 +180,30 @@ def async_setup(hass, config):
             DOMAIN, "{}_{}".format(p_type, SERVICE_SAY), async_say_handle,
             descriptions.get(SERVICE_SAY), schema=SCHEMA_SERVICE_SAY)
 
+        @asyncio.coroutine
+        def async_prerender(messages, cache, language, options):
+            """Render the messages one by one into the cache."""
+            for message in messages:
+                try:
+                    yield from tts.async_get_url(
+                        p_type, message, cache=cache, language=language,
+                        options=options)
+                except HomeAssistantError as err:
+                    _LOGGER.error("Error on prerender '%s': %s", message, err)
+
+        @callback
+        def async_prerender_handle(service):
+            """Service handle for prerender, renders in the background."""
+            hass.async_add_job(async_prerender(
+                service.data[ATTR_MESSAGES], service.data.get(ATTR_CACHE),
+                service.data.get(ATTR_LANGUAGE),
+                service.data.get(ATTR_OPTIONS)))
+
+        hass.services.async_register(
+            DOMAIN, "{}_{}".format(p_type, SERVICE_PRERENDER),
+            async_prerender_handle, descriptions.get(SERVICE_PRERENDER),
+            schema=SCHEMA_SERVICE_PRERENDER)
+
     setup_tasks = [async_setup_platform(p_type, p_config) for p_type, p_config
                    in config_per_platform(config, DOMAIN)]
 
@@ -189,13 +235,28 @@ class SpeechManager(object):
         self.cache_dir = DEFAULT_CACHE_DIR
         self.time_memory = DEFAULT_TIME_MEMORY
         self.file_cache = {}
-        self.mem_cache = {}
+        self.mem_cache = MemoryCache(
+            DEFAULT_MEMORY_SIZE * 1024 * 1024, DEFAULT_TIME_MEMORY,
+            hass.data.setdefault(DATA_TTS_CACHE_STATS, Counter()))
+        self._index_lock = asyncio.Lock(loop=hass.loop)
+
+    @property
+    def index_path(self):
+        """Return the path of the index of the cache dir."""
+        return os.path.join(self.cache_dir, INDEX_FILE)
 
     @asyncio.coroutine
-    def async_init_cache(self, use_cache, cache_dir, time_memory):
+    def async_init_cache(self, use_cache, cache_dir, time_memory,
+                         memory_size=DEFAULT_MEMORY_SIZE):
         """Init config folder and load file cache."""
+        if not use_cache and not memory_size:
+            raise HomeAssistantError(
+                "{} can't be 0 without cache".format(CONF_MEMORY_SIZE))
+
         self.use_cache = use_cache
         self.time_memory = time_memory
+        self.mem_cache.time_memory = time_memory
+        self.mem_cache.max_size = memory_size * 1024 * 1024
 
         def init_tts_cache_dir(cache_dir):
             """Init cache folder."""
@@ -212,8 +273,23 @@ class SpeechManager(object):
         except OSError as err:
             raise HomeAssistantError("Can't init cache dir {}".format(err))
 
+        def load_index():
+            """Return the files of the index if it is up to date."""
+            try:
+                if (os.stat(self.index_path).st_mtime_ns !=
+                        os.stat(self.cache_dir).st_mtime_ns):
+                    return None
+                with open(self.index_path) as index_file:
+                    return json.load(index_file)['files']
+            except (OSError, ValueError, KeyError, TypeError):
+                return None
+
         def get_cache_files():
             """Return a dict of given engine files."""
+            cache = load_index()
+            if cache is not None:
+                return cache
+
             cache = {}
 
             folder_data = os.listdir(self.cache_dir)
@@ -225,6 +301,8 @@ class SpeechManager(object):
                         record.group(4)
                     )
                     cache[key.lower()] = file_data.lower()
+
+            self._write_index(cache)
             return cache
 
         try:
@@ -235,10 +313,36 @@ class SpeechManager(object):
         if cache_files:
             self.file_cache.update(cache_files)
 
+    def _write_index(self, files):
+        """Write the index of the cache dir."""
+        temp_path = '{}.tmp'.format(self.index_path)
+
+        try:
+            with open(temp_path, 'w') as index_file:
+                json.dump({'files': files}, index_file)
+            os.replace(temp_path, self.index_path)
+
+            # Replacing the index changed the dir, only later changes
+            # have to invalidate it
+            mtime = os.stat(self.cache_dir).st_mtime_ns
+            os.utime(self.index_path, ns=(mtime, mtime))
+        except OSError as err:
+            _LOGGER.warning("Can't write cache index: %s", err)
+
+    @asyncio.coroutine
+    def async_write_index(self):
+        """Write the index of the file cache.
+
+        This method is a coroutine.
+        """
+        with (yield from self._index_lock):
+            yield from self.hass.async_add_job(
+                self._write_index, dict(self.file_cache))
+
     @asyncio.coroutine
     def async_clear_cache(self):
         """Read file cache and delete files."""
-        self.mem_cache = {}
+        self.mem_cache.clear()
 
         def remove_files():
             """Remove files from filesystem."""
@@ -251,6 +355,7 @@ class SpeechManager(object):
 
         yield from self.hass.async_add_job(remove_files)
         self.file_cache = {}
+        yield from self.async_write_index()
 
     @callback
     def async_register_engine(self, engine, provider, config):
@@ -295,9 +400,14 @@ class SpeechManager(object):
         key = KEY_PATTERN.format(
             msg_hash, language, options_key, engine).lower()
 
-        # Is speech already in memory
-        if key in self.mem_cache:
-            filename = self.mem_cache[key][MEM_CACHE_FILENAME]
+        entry = self.mem_cache.get(key)
+
+        # Is speech already in memory, keep it there until it is served
+        # when it is not on disk
+        if entry is not None:
+            filename = entry[MEM_CACHE_FILENAME]
+            if key not in self.file_cache:
+                self.mem_cache.pin(key)
         # Is file store in file cache
         elif use_cache and key in self.file_cache:
             filename = self.file_cache[key]
@@ -331,12 +441,13 @@ class SpeechManager(object):
         data = self.write_tags(
             filename, data, provider, message, language, options)
 
-        # Save to memory
-        self._async_store_to_memcache(key, filename, data)
-
+        # The file is written before the URL is returned, a clip that is
+        # not on disk has to stay in memory until it is served
+        saved = False
         if cache:
-            self.hass.async_add_job(
-                self.async_save_tts_audio(key, filename, data))
+            saved = yield from self.async_save_tts_audio(key, filename, data)
+
+        self._async_store_to_memcache(key, filename, data, pin=not saved)
 
         return filename
 
@@ -344,7 +455,7 @@ class SpeechManager(object):
     def async_save_tts_audio(self, key, filename, data):
         """Store voice data to file and file_cache.
 
-        This method is a coroutine.
+        Returns True when the file was written. This method is a coroutine.
         """
         voice_file = os.path.join(self.cache_dir, filename)
 
@@ -358,10 +469,14 @@ class SpeechManager(object):
             self.file_cache[key] = filename
         except OSError:
             _LOGGER.error("Can't write %s", filename)
+            return False
+
+        self.hass.async_add_job(self.async_write_index())
+        return True
 
     @asyncio.coroutine
     def async_file_to_mem(self, key):
-        """Load voice from file cache into memory.
+        """Load voice from file cache into memory and return it.
 
         This method is a coroutine.
         """
@@ -383,21 +498,15 @@ class SpeechManager(object):
             raise HomeAssistantError("Can't read {}".format(voice_file))
 
         self._async_store_to_memcache(key, filename, data)
+        return data
 
     @callback
-    def _async_store_to_memcache(self, key, filename, data):
-        """Store data to memcache and set timer to remove it."""
-        self.mem_cache[key] = {
+    def _async_store_to_memcache(self, key, filename, data, pin=False):
+        """Store data to memcache."""
+        self.mem_cache.put(key, {
             MEM_CACHE_FILENAME: filename,
             MEM_CACHE_VOICE: data,
-        }
-
-        @callback
-        def async_remove_from_mem():
-            """Cleanup memcache."""
-            self.mem_cache.pop(key)
-
-        self.hass.loop.call_later(self.time_memory, async_remove_from_mem)
+        }, pin)
 
     @asyncio.coroutine
     def async_read_tts(self, filename):
@@ -412,13 +521,18 @@ class SpeechManager(object):
         key = KEY_PATTERN.format(
             record.group(1), record.group(2), record.group(3), record.group(4))
 
-        if key not in self.mem_cache:
-            if key not in self.file_cache:
-                raise HomeAssistantError("%s not in cache!", key)
-            yield from self.async_file_to_mem(key)
+        entry = self.mem_cache.get(key)
+
+        if entry is not None:
+            data = entry[MEM_CACHE_VOICE]
+            self.mem_cache.unpin(key)
+        elif key in self.file_cache:
+            data = yield from self.async_file_to_mem(key)
+        else:
+            raise HomeAssistantError("%s not in cache!", key)
 
         content, _ = mimetypes.guess_type(filename)
-        return (content, self.mem_cache[key][MEM_CACHE_VOICE])
+        return (content, data)
 
     @staticmethod
     def write_tags(filename, data, provider, message, language, options):
@@ -452,6 +566,105 @@ class SpeechManager(object):
         return data_bytes.getvalue()
 
 
+class MemoryCache(object):
+    """Least recently used speech in memory, bounded by its size in bytes.
+
+    Entries also expire time_memory seconds after they were stored. Pinned
+    entries are not evicted before they are unpinned or expire, even when
+    they do not fit. The hits, misses and evictions are counted in stats.
+    """
+
+    def __init__(self, max_size, time_memory, stats):
+        """Initialize the memory cache."""
+        self.max_size = max_size
+        self.time_memory = time_memory
+        self.stats = stats
+        self.size = 0
+        self._entries = OrderedDict()
+        self._pinned = set()
+
+    def __contains__(self, key):
+        """Return True if key is in the cache, without counting a hit."""
+        return key in self._entries
+
+    def __len__(self):
+        """Return the number of entries."""
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the entry of key or None, and mark it as recently used."""
+        item = self._entries.get(key)
+
+        if item is not None and item[1] < time.monotonic():
+            self._remove(key)
+            self.stats['expired'] += 1
+            item = None
+
+        if item is None:
+            self.stats['misses'] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return item[0]
+
+    def put(self, key, entry, pin=False):
+        """Store an entry, evict the least recently used to make room.
+
+        An entry that is larger than the cache is only stored when pinned.
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        entry_size = len(entry[MEM_CACHE_VOICE])
+        if entry_size > self.max_size and not pin:
+            return
+
+        now = time.monotonic()
+        self._entries[key] = (entry, now + self.time_memory)
+        self.size += entry_size
+        if pin:
+            self._pinned.add(key)
+
+        for old_key, (_, expires) in list(self._entries.items()):
+            if self.size <= self.max_size:
+                break
+            if old_key in self._pinned and expires >= now:
+                continue
+            self._remove(old_key)
+            self.stats['evictions'] += 1
+
+        self._update_stats()
+
+    def pin(self, key):
+        """Keep an entry in the cache until it is unpinned."""
+        if key in self._entries:
+            self._pinned.add(key)
+
+    def unpin(self, key):
+        """Allow an entry to be evicted again."""
+        self._pinned.discard(key)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+        self._pinned.clear()
+        self.size = 0
+        self._update_stats()
+
+    def _remove(self, key):
+        """Remove an entry."""
+        entry, _ = self._entries.pop(key)
+        self._pinned.discard(key)
+        self.size -= len(entry[MEM_CACHE_VOICE])
+        self._update_stats()
+
+    def _update_stats(self):
+        """Update the size in the stats."""
+        self.stats['entries'] = len(self._entries)
+        self.stats['bytes'] = self.size
+
+
 class Provider(object):
     """Represent a single TTS provider."""
 
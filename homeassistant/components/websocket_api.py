@@ -19,7 +19,7 @@ from homeassistant.const import (
     __version__)
 from homeassistant.components import frontend
 from homeassistant.core import callback
-from homeassistant.remote import JSONEncoder
+from homeassistant.remote import JSONEncoder, event_to_json, states_to_json
 from homeassistant.helpers import config_validation as cv
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.components.http.auth import validate_password
@@ -145,12 +145,12 @@ def auth_invalid_message(message):
 
 
 def event_message(iden, event):
-    """Return an event message."""
-    return {
-        'id': iden,
-        'type': TYPE_EVENT,
-        'event': event.as_dict(),
-    }
+    """Return an encoded event message.
+
+    The encoded event is shared by all subscribers of the event.
+    """
+    return '{{"event": {}, "id": {}, "type": "{}"}}'.format(
+        event_to_json(event), JSON_DUMP(iden), TYPE_EVENT)
 
 
 def error_message(iden, code, message):
@@ -174,6 +174,12 @@ def pong_message(iden):
     }
 
 
+def encoded_result_message(iden, result):
+    """Return an encoded success result message of an encoded result."""
+    return '{{"id": {}, "result": {}, "success": true, "type": "{}"}}'.format(
+        JSON_DUMP(iden), result, TYPE_RESULT)
+
+
 def result_message(iden, result=None):
     """Return a success result message."""
     return {
@@ -235,7 +241,10 @@ class ActiveConnection:
                 if message is None:
                     break
                 self.debug("Sending", message)
-                yield from self.wsock.send_json(message, dumps=JSON_DUMP)
+                if isinstance(message, str):
+                    yield from self.wsock.send_str(message)
+                else:
+                    yield from self.wsock.send_json(message, dumps=JSON_DUMP)
 
     @callback
     def send_message_outside(self, message):
@@ -454,8 +463,8 @@ class ActiveConnection:
         """
         msg = GET_STATES_MESSAGE_SCHEMA(msg)
 
-        self.to_write.put_nowait(result_message(
-            msg['id'], self.hass.states.async_all()))
+        self.to_write.put_nowait(encoded_result_message(
+            msg['id'], states_to_json(self.hass.states.async_all())))
 
     def handle_get_services(self, msg):
         """Handle get services command.
@@ -17,7 +17,8 @@ from homeassistant.const import (
     CONF_TIME_ZONE, CONF_ELEVATION, CONF_UNIT_SYSTEM_METRIC,
     CONF_UNIT_SYSTEM_IMPERIAL, CONF_TEMPERATURE_UNIT, TEMP_CELSIUS,
     __version__, CONF_CUSTOMIZE, CONF_CUSTOMIZE_DOMAIN, CONF_CUSTOMIZE_GLOB,
-    CONF_WHITELIST_EXTERNAL_DIRS)
+    CONF_WHITELIST_EXTERNAL_DIRS, CONF_EXECUTORS, CONF_MAX_WORKERS,
+    CONF_COMPONENTS)
 from homeassistant.core import callback, DOMAIN as CONF_CORE
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import get_component, get_platform
@@ -123,6 +124,15 @@ CUSTOMIZE_CONFIG_SCHEMA = vol.Schema({
         vol.Schema({cv.string: OrderedDict}),
 })
 
+EXECUTORS_CONFIG_SCHEMA = vol.Schema({
+    cv.slug: vol.Schema({
+        vol.Optional(CONF_MAX_WORKERS):
+            vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(CONF_COMPONENTS, default=[]):
+            vol.All(cv.ensure_list, [cv.string]),
+    })
+})
+
 CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend({
     CONF_NAME: vol.Coerce(str),
     CONF_LATITUDE: cv.latitude,
@@ -135,6 +145,7 @@ CORE_CONFIG_SCHEMA = CUSTOMIZE_CONFIG_SCHEMA.extend({
         # pylint: disable=no-value-for-parameter
         vol.All(cv.ensure_list, [vol.IsDir()]),
     vol.Optional(CONF_PACKAGES, default={}): PACKAGES_CONFIG_SCHEMA,
+    vol.Optional(CONF_EXECUTORS, default={}): EXECUTORS_CONFIG_SCHEMA,
 })
 
 
@@ -376,6 +387,12 @@ def async_process_ha_core_config(hass, config):
         hac.whitelist_external_dirs.update(
             set(config[CONF_WHITELIST_EXTERNAL_DIRS]))
 
+    # Sizes of the executor pools and the components they run
+    for name, executor_conf in config[CONF_EXECUTORS].items():
+        hass.configure_executor(
+            name, executor_conf.get(CONF_MAX_WORKERS),
+            executor_conf[CONF_COMPONENTS])
+
     # Customize
     cust_exact = dict(config[CONF_CUSTOMIZE])
     cust_domain = dict(config[CONF_CUSTOMIZE_DOMAIN])
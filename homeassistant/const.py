@@ -76,6 +76,7 @@ CONF_COMMAND_ON = 'command_on'
 CONF_COMMAND_OPEN = 'command_open'
 CONF_COMMAND_STATE = 'command_state'
 CONF_COMMAND_STOP = 'command_stop'
+CONF_COMPONENTS = 'components'
 CONF_CONDITION = 'condition'
 CONF_COVERS = 'covers'
 CONF_CURRENCY = 'currency'
@@ -98,6 +99,7 @@ CONF_ENTITY_ID = 'entity_id'
 CONF_ENTITY_NAMESPACE = 'entity_namespace'
 CONF_EVENT = 'event'
 CONF_EXCLUDE = 'exclude'
+CONF_EXECUTORS = 'executors'
 CONF_FILE_PATH = 'file_path'
 CONF_FILENAME = 'filename'
 CONF_FRIENDLY_NAME = 'friendly_name'
@@ -113,7 +115,9 @@ CONF_LONGITUDE = 'longitude'
 CONF_MAC = 'mac'
 CONF_METHOD = 'method'
 CONF_MINIMUM = 'minimum'
+CONF_MIN_UPDATE_INTERVAL = 'min_update_interval'
 CONF_MAXIMUM = 'maximum'
+CONF_MAX_WORKERS = 'max_workers'
 CONF_MONITORED_CONDITIONS = 'monitored_conditions'
 CONF_MONITORED_VARIABLES = 'monitored_variables'
 CONF_NAME = 'name'
@@ -416,6 +420,15 @@ CONTENT_TYPE_TEXT_PLAIN = 'text/plain'
 # The exit code to send to request a restart
 RESTART_EXIT_CODE = 100
 
+# Keys of hass.data with the statistics reported by the performance component
+DATA_SETUP_TIME = 'setup_time'
+DATA_SUPPRESSED_UPDATES = 'entity_suppressed_updates'
+DATA_POLL_LATENCY = 'entity_poll_latency'
+DATA_TEMPLATE_CACHE_STATS = 'template_cache_stats'
+DATA_EXPORTERS = 'exporters'
+DATA_TTS_CACHE_STATS = 'tts_cache_stats'
+DATA_STATIC_CACHE_STATS = 'static_cache_stats'
+
 UNIT_NOT_RECOGNIZED_TEMPLATE = '{} is not a recognized {} unit.'  # type: str
 
 LENGTH = 'length'  # type: str
@@ -6,8 +6,9 @@ of entities and react to changes.
 """
 # pylint: disable=unused-import, too-many-lines
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import bisect
 import enum
+from functools import partial
 import logging
 import os
 import pathlib
@@ -17,7 +18,7 @@ import threading
 from time import monotonic
 
 from types import MappingProxyType
-from typing import Optional, Any, Callable, List  # NOQA
+from typing import Optional, Any, Callable, Dict, Iterable, List  # NOQA
 
 from async_timeout import timeout
 import voluptuous as vol
@@ -37,6 +38,7 @@ from homeassistant.util.async import (
     fire_coroutine_threadsafe)
 import homeassistant.util as util
 import homeassistant.util.dt as dt_util
+from homeassistant.util.executor import ExecutorPool
 import homeassistant.util.location as location
 from homeassistant.util.unit_system import UnitSystem, METRIC_SYSTEM  # NOQA
 
@@ -51,6 +53,27 @@ ENTITY_ID_PATTERN = re.compile(r"^(\w+)\.(\w+)$")
 # How long to wait till things that run on startup have to finish.
 TIMEOUT_EVENT_START = 15
 
+# Executor pools, jobs of platforms run in the io pool
+EXECUTOR_DEFAULT = 'default'
+EXECUTOR_IO = 'io'
+EXECUTOR_DB = 'db'
+
+# Components and platforms whose jobs do not run in the default pool
+EXECUTOR_ROUTES = {
+    'history': EXECUTOR_DB,
+    'logbook': EXECUTOR_DB,
+    'recorder': EXECUTOR_DB,
+}
+
+# Default size of the executor pools, None is the number of processors
+# multiplied by 5
+EXECUTOR_SIZES = {
+    EXECUTOR_DB: 4,
+}
+
+# Module prefixes of components and platforms
+COMPONENT_MODULE_PREFIXES = ('homeassistant.components.', 'custom_components.')
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -111,15 +134,13 @@ class HomeAssistant(object):
         else:
             self.loop = loop or asyncio.get_event_loop()
 
-        executor_opts = {'max_workers': 10}
-        if sys.version_info[:2] >= (3, 5):
-            # It will default set to the number of processors on the machine,
-            # multiplied by 5. That is better for overlap I/O workers.
-            executor_opts['max_workers'] = None
-        if sys.version_info[:2] >= (3, 6):
-            executor_opts['thread_name_prefix'] = 'SyncWorker'
-
-        self.executor = ThreadPoolExecutor(**executor_opts)
+        # Named executor pools, they are created on first use
+        self.executors = {}  # type: Dict[str, ExecutorPool]
+        self._executor_sizes = dict(EXECUTOR_SIZES)
+        self._executor_routes = dict(EXECUTOR_ROUTES)
+        # Dict of module names mapped to the pool that runs their jobs
+        self._executor_modules = {}  # type: Dict[str, ExecutorPool]
+        self.executor = self.get_executor(EXECUTOR_DEFAULT)
         self.loop.set_default_executor(self.executor)
         self.loop.set_exception_handler(async_loop_exception_handler)
         self._pending_tasks = []
@@ -214,7 +235,8 @@ class HomeAssistant(object):
         elif asyncio.iscoroutinefunction(target):
             task = self.loop.create_task(target(*args))
         else:
-            task = self.loop.run_in_executor(None, target, *args)
+            task = self.loop.run_in_executor(
+                self.executor_for_job(target), target, *args)
 
         # If a task is sheduled
         if self._track_task and task is not None:
@@ -222,6 +244,75 @@ class HomeAssistant(object):
 
         return task
 
+    def get_executor(self, name: str) -> ExecutorPool:
+        """Return an executor pool, create it if it does not exist.
+
+        Async friendly.
+        """
+        pool = self.executors.get(name)
+
+        if pool is None:
+            pool = self.executors[name] = ExecutorPool(
+                name, self._executor_sizes.get(name))
+
+        return pool
+
+    def executor_for_job(self, target: Callable[..., None]) -> ExecutorPool:
+        """Return the executor pool that runs a job.
+
+        Jobs are routed by the component or platform module they are defined
+        in. A route for a platform (sensor.command_line) is preferred over a
+        route for its component (sensor). Other jobs of platforms run in the
+        io pool and everything else in the default pool.
+
+        Async friendly.
+        """
+        while isinstance(target, partial):
+            target = target.func
+
+        module = getattr(target, '__module__', None) or ''
+        pool = self._executor_modules.get(module)
+
+        if pool is None:
+            pool = self._executor_modules[module] = self.get_executor(
+                self._executor_route(module))
+
+        return pool
+
+    def _executor_route(self, module: str) -> str:
+        """Return the name of the executor pool for a module."""
+        for prefix in COMPONENT_MODULE_PREFIXES:
+            if module.startswith(prefix):
+                comp_name = module[len(prefix):]
+                break
+        else:
+            return EXECUTOR_DEFAULT
+
+        parts = comp_name.split('.')
+
+        for name in ('.'.join(parts[:2]), parts[0]):
+            if name in self._executor_routes:
+                return self._executor_routes[name]
+
+        return EXECUTOR_IO if len(parts) > 1 else EXECUTOR_DEFAULT
+
+    def configure_executor(self, name: str, max_workers: Optional[int]=None,
+                           components: Iterable[str]=()) -> None:
+        """Set the size of an executor pool and route components to it.
+
+        Async friendly.
+        """
+        if max_workers is not None:
+            self._executor_sizes[name] = max_workers
+
+            if name in self.executors:
+                self.executors[name].resize(max_workers)
+
+        for comp_name in components:
+            self._executor_routes[comp_name] = name
+
+        self._executor_modules.clear()
+
     @callback
     def async_track_tasks(self):
         """Track tasks so you can wait for all tasks to be done."""
@@ -286,7 +377,9 @@ class HomeAssistant(object):
         self.state = CoreState.not_running
         self.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
         yield from self.async_block_till_done()
-        self.executor.shutdown()
+
+        for pool in self.executors.values():
+            pool.shutdown()
 
         self.exit_code = exit_code
         self.loop.stop()
@@ -306,7 +399,7 @@ class EventOrigin(enum.Enum):
 class Event(object):
     """Representation of an event within the bus."""
 
-    __slots__ = ['event_type', 'data', 'origin', 'time_fired']
+    __slots__ = ['event_type', 'data', 'origin', 'time_fired', 'json_cache']
 
     def __init__(self, event_type, data=None, origin=EventOrigin.local,
                  time_fired=None):
@@ -315,6 +408,8 @@ class Event(object):
         self.data = data or {}
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
+        # JSON representation, see homeassistant.remote.event_to_json
+        self.json_cache = None
 
     def as_dict(self):
         """Create a dict representation of this Event.
@@ -512,7 +607,7 @@ class State(object):
     """
 
     __slots__ = ['entity_id', 'state', 'attributes',
-                 'last_changed', 'last_updated']
+                 'last_changed', 'last_updated', 'json_cache']
 
     def __init__(self, entity_id, state, attributes=None, last_changed=None,
                  last_updated=None):
@@ -527,6 +622,8 @@ class State(object):
         self.attributes = MappingProxyType(attributes or {})
         self.last_updated = last_updated or dt_util.utcnow()
         self.last_changed = last_changed or self.last_updated
+        # JSON representation, see homeassistant.remote.state_to_json
+        self.json_cache = None
 
     @property
     def domain(self):
@@ -609,6 +706,13 @@ class StateMachine(object):
         self._states = {}
         self._bus = bus
         self._loop = loop
+        self._version = 0
+        self._versions = {}
+        self._domain_versions = {}
+        # Sorted entity ids of every domain
+        self._domain_index = {}
+        # Called with every changed state before the state_changed event
+        self._observers = []
 
     def entity_ids(self, domain_filter=None):
         """List of entity ids that are being tracked."""
@@ -621,27 +725,33 @@ class StateMachine(object):
     def async_entity_ids(self, domain_filter=None):
         """List of entity ids that are being tracked.
 
+        The entity ids of a domain_filter are sorted.
+
         This method must be run in the event loop.
         """
         if domain_filter is None:
             return list(self._states.keys())
 
-        domain_filter = domain_filter.lower()
-
-        return [state.entity_id for state in self._states.values()
-                if state.domain == domain_filter]
+        return list(self._domain_index.get(domain_filter.lower(), ()))
 
-    def all(self):
+    def all(self, domain_filter=None):
         """Create a list of all states."""
-        return run_callback_threadsafe(self._loop, self.async_all).result()
+        return run_callback_threadsafe(
+            self._loop, self.async_all, domain_filter).result()
 
     @callback
-    def async_all(self):
+    def async_all(self, domain_filter=None):
         """Create a list of all states.
 
+        The states of a domain_filter are sorted by entity id.
+
         This method must be run in the event loop.
         """
-        return list(self._states.values())
+        if domain_filter is None:
+            return list(self._states.values())
+
+        return [self._states[entity_id] for entity_id
+                in self._domain_index.get(domain_filter.lower(), ())]
 
     def get(self, entity_id):
         """Retrieve state of entity_id or None if not found.
@@ -667,6 +777,59 @@ class StateMachine(object):
         return state_obj is not None and \
             state_obj.attributes.get(name, None) == value
 
+    def version(self, entity_id=None):
+        """Return the version of an entity or of all states.
+
+        The version increases every time the state is set or removed, so
+        equal versions guarantee an unchanged state.
+
+        Async friendly.
+        """
+        if entity_id is None:
+            return self._version
+
+        return self._versions.get(entity_id.lower(), 0)
+
+    def domain_version(self, domain):
+        """Return the version of the states of a domain.
+
+        Async friendly.
+        """
+        return self._domain_versions.get(domain.lower(), 0)
+
+    @callback
+    def _async_increase_version(self, entity_id):
+        """Increase the version of an entity that was set or removed."""
+        self._version += 1
+        self._versions[entity_id] = self._version
+        self._domain_versions[split_entity_id(entity_id)[0]] = self._version
+
+    @callback
+    def async_add_observer(self, observer):
+        """Call observer with the entity id and new state of every change.
+
+        Unlike a state_changed listener the observer is called before
+        async_set and async_remove return, so indexes of the states are
+        never behind. The new state is None when the entity was removed.
+        Returns a function to remove the observer.
+
+        This method must be run in the event loop.
+        """
+        self._observers.append(observer)
+
+        @callback
+        def remove_observer():
+            """Remove the observer."""
+            self._observers.remove(observer)
+
+        return remove_observer
+
+    @callback
+    def _async_notify_observers(self, entity_id, new_state):
+        """Pass a changed state to the observers."""
+        for observer in self._observers:
+            observer(entity_id, new_state)
+
     def remove(self, entity_id):
         """Remove the state of an entity.
 
@@ -689,6 +852,13 @@ class StateMachine(object):
         if old_state is None:
             return False
 
+        domain_ids = self._domain_index[old_state.domain]
+        del domain_ids[bisect.bisect_left(domain_ids, entity_id)]
+        if not domain_ids:
+            del self._domain_index[old_state.domain]
+
+        self._async_increase_version(entity_id)
+        self._async_notify_observers(entity_id, None)
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
@@ -736,6 +906,12 @@ class StateMachine(object):
         last_changed = old_state.last_changed if same_state else None
         state = State(entity_id, new_state, attributes, last_changed)
         self._states[entity_id] = state
+        self._async_increase_version(entity_id)
+
+        if not is_existing:
+            bisect.insort(
+                self._domain_index.setdefault(state.domain, []), entity_id)
+        self._async_notify_observers(entity_id, state)
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
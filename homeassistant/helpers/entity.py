@@ -1,19 +1,25 @@
 """An abstract class for entities."""
 import asyncio
+from collections import Counter
 import logging
 import functools as ft
 from timeit import default_timer as timer
 
 from typing import Optional, List
 
+import voluptuous as vol
+
 from homeassistant.const import (
+    DATA_SUPPRESSED_UPDATES,
     ATTR_ASSUMED_STATE, ATTR_FRIENDLY_NAME, ATTR_HIDDEN, ATTR_ICON,
     ATTR_UNIT_OF_MEASUREMENT, DEVICE_DEFAULT_NAME, STATE_OFF, STATE_ON,
     STATE_UNAVAILABLE, STATE_UNKNOWN, TEMP_CELSIUS, TEMP_FAHRENHEIT,
-    ATTR_ENTITY_PICTURE, ATTR_SUPPORTED_FEATURES, ATTR_DEVICE_CLASS)
-from homeassistant.core import HomeAssistant
+    ATTR_ENTITY_PICTURE, ATTR_SUPPORTED_FEATURES, ATTR_DEVICE_CLASS,
+    CONF_MIN_UPDATE_INTERVAL)
+from homeassistant.core import HomeAssistant, callback, split_entity_id
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.exceptions import NoEntitySpecifiedError
+import homeassistant.helpers.config_validation as cv
 from homeassistant.util import ensure_unique_string, slugify
 from homeassistant.util.async import (
     run_coroutine_threadsafe, run_callback_threadsafe)
@@ -49,7 +55,12 @@ def async_generate_entity_id(entity_id_format: str, name: Optional[str],
         if hass is None:
             raise ValueError("Missing required parameter currentids or hass")
 
-        current_ids = hass.states.async_entity_ids()
+        if '.' in entity_id_format:
+            # Entity ids of other domains can not collide
+            current_ids = hass.states.async_entity_ids(
+                split_entity_id(entity_id_format)[0])
+        else:
+            current_ids = hass.states.async_entity_ids()
     name = (name or DEVICE_DEFAULT_NAME).lower()
 
     return ensure_unique_string(
@@ -74,6 +85,14 @@ class Entity(object):
     # protect for multible updates
     _update_warn = None
 
+    # If the last update of the entity raised an exception
+    _update_failed = False
+
+    # Rate limiting of state writes, see min_update_interval
+    _last_state_write = None
+    _coalesced_state = None
+    _coalesced_write = None
+
     @property
     def should_poll(self) -> bool:
         """Return True if entity has to be polled for state.
@@ -224,11 +243,14 @@ class Entity(object):
                     yield from self.hass.async_add_job(self.update)
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Update for %s fails", self.entity_id)
+                self._update_failed = True
                 return
             finally:
                 self._update_warn.cancel()
                 self._update_warn = None
 
+            self._update_failed = False
+
         start = timer()
 
         if not self.available:
@@ -290,8 +312,60 @@ class Entity(object):
             # Could not convert state to float
             pass
 
-        self.hass.states.async_set(
-            self.entity_id, state, attr, self.force_update)
+        min_update_interval = attr.pop(CONF_MIN_UPDATE_INTERVAL, None)
+
+        if min_update_interval is None:
+            self.hass.states.async_set(
+                self.entity_id, state, attr, self.force_update)
+        else:
+            self._async_write_coalesced(
+                state, attr, self.force_update, min_update_interval)
+
+    @callback
+    def _async_write_coalesced(self, state, attr, force_update,
+                               min_update_interval):
+        """Write the state at most once per min_update_interval.
+
+        Updates within the interval are coalesced, the latest one is written
+        when the interval has passed.
+        """
+        try:
+            interval = cv.time_period(min_update_interval).total_seconds()
+        except vol.Invalid:
+            _LOGGER.error("Invalid %s for %s: %s", CONF_MIN_UPDATE_INTERVAL,
+                          self.entity_id, min_update_interval)
+            interval = 0
+
+        now = self.hass.loop.time()
+
+        if self._coalesced_write is None and (
+                self._last_state_write is None or
+                now - self._last_state_write >= interval):
+            self._last_state_write = now
+            self.hass.states.async_set(
+                self.entity_id, state, attr, force_update)
+            return
+
+        if self._coalesced_state is not None:
+            suppressed = self.hass.data.setdefault(
+                DATA_SUPPRESSED_UPDATES, Counter())
+            suppressed[self.entity_id] += 1
+
+        self._coalesced_state = (state, attr, force_update)
+
+        if self._coalesced_write is None:
+            self._coalesced_write = self.hass.loop.call_at(
+                self._last_state_write + interval,
+                self._async_write_coalesced_state)
+
+    @callback
+    def _async_write_coalesced_state(self):
+        """Write the latest coalesced state."""
+        state, attr, force_update = self._coalesced_state
+        self._coalesced_state = None
+        self._coalesced_write = None
+        self._last_state_write = self.hass.loop.time()
+        self.hass.states.async_set(self.entity_id, state, attr, force_update)
 
     def schedule_update_ha_state(self, force_refresh=False):
         """Schedule a update ha state change task.
@@ -312,6 +386,11 @@ class Entity(object):
 
         This method must be run in the event loop.
         """
+        if self._coalesced_write is not None:
+            self._coalesced_write.cancel()
+            self._coalesced_write = None
+            self._coalesced_state = None
+
         self.hass.states.async_remove(self.entity_id)
 
     def _attr_setter(self, name, typ, attr, attrs):
@@ -1,19 +1,23 @@
 """Helpers for components that manage entities."""
 import asyncio
+import bisect
 from datetime import timedelta
+import heapq
+import itertools
+from timeit import default_timer as timer
 
 from homeassistant import config as conf_util
 from homeassistant.setup import async_prepare_setup_platform
 from homeassistant.const import (
     ATTR_ENTITY_ID, CONF_SCAN_INTERVAL, CONF_ENTITY_NAMESPACE,
-    DEVICE_DEFAULT_NAME)
+    DEVICE_DEFAULT_NAME, DATA_POLL_LATENCY)
 from homeassistant.core import callback, valid_entity_id
 from homeassistant.exceptions import HomeAssistantError, PlatformNotReady
 from homeassistant.loader import get_component
 from homeassistant.helpers import config_per_platform, discovery
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.event import (
-    async_track_time_interval, async_track_point_in_time)
+    async_track_point_in_time, async_track_point_in_utc_time)
 from homeassistant.helpers.service import extract_entity_ids
 from homeassistant.util import slugify
 from homeassistant.util.async import (
@@ -25,6 +29,20 @@ SLOW_SETUP_WARNING = 10
 SLOW_SETUP_MAX_WAIT = 60
 PLATFORM_NOT_READY_RETRIES = 10
 
+# Number of sync entities of a platform that update at the same time, unless
+# the platform sets PARALLEL_UPDATES
+DEFAULT_PARALLEL_UPDATES = 1
+
+# Maximum factor by which the scan interval of a failing or unavailable
+# entity is increased
+MAX_POLL_BACKOFF = 8
+
+# Factor by which the scan interval is decreased after an entity changed
+FAST_POLL_FACTOR = 2
+
+# Upper bounds in seconds of the buckets of the poll latency histograms
+POLL_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
 
 class EntityComponent(object):
     """Helper class that will help a component manage its entities."""
@@ -133,11 +151,15 @@ class EntityComponent(object):
                          self.scan_interval)
         entity_namespace = platform_config.get(CONF_ENTITY_NAMESPACE)
 
+        parallel_updates = getattr(
+            platform, 'PARALLEL_UPDATES', DEFAULT_PARALLEL_UPDATES)
+
         key = (platform_type, scan_interval, entity_namespace)
 
         if key not in self._platforms:
             self._platforms[key] = EntityPlatform(
-                self, platform_type, scan_interval, entity_namespace)
+                self, platform_type, scan_interval, entity_namespace,
+                parallel_updates)
         entity_platform = self._platforms[key]
 
         self.logger.info("Setting up %s.%s", self.domain, platform_type)
@@ -313,19 +335,79 @@ class EntityComponent(object):
         return conf
 
 
+class LatencyHistogram(object):
+    """Histogram of the duration of entity updates."""
+
+    def __init__(self):
+        """Initialize the histogram."""
+        self.counts = [0] * (len(POLL_LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, seconds):
+        """Add the duration of an update."""
+        self.counts[bisect.bisect_left(POLL_LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        """Return a dict with the cumulative counts of the buckets."""
+        buckets = {}
+        cumulative = 0
+
+        for bound, count in zip(POLL_LATENCY_BUCKETS + ('+Inf',),
+                                self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'buckets': buckets,
+        }
+
+
+class EntityPoll(object):
+    """Polling schedule of a single entity."""
+
+    def __init__(self, interval):
+        """Initialize the schedule."""
+        self.interval = interval
+        self.due = None
+        self.changed = False
+
+
 class EntityPlatform(object):
     """Keep track of entities for a single platform and stay in loop."""
 
-    def __init__(self, component, platform, scan_interval, entity_namespace):
+    def __init__(self, component, platform, scan_interval, entity_namespace,
+                 parallel_updates=DEFAULT_PARALLEL_UPDATES):
         """Initialize the entity platform."""
+        hass = component.hass
         self.component = component
         self.platform = platform
         self.scan_interval = scan_interval
         self.entity_namespace = entity_namespace
         self.platform_entities = []
         self._tasks = []
-        self._async_unsub_polling = None
-        self._process_updates = asyncio.Lock(loop=component.hass.loop)
+        self._polls = {}
+        # Due polls of the entities, one timer tracks the first of them
+        self._poll_heap = []
+        self._poll_sequence = itertools.count()
+        self._poll_timer = None
+        self._update_semaphore = asyncio.Semaphore(
+            parallel_updates, loop=hass.loop)
+
+        if platform == component.domain:
+            name = platform
+        else:
+            name = '{}.{}'.format(component.domain, platform)
+
+        self.latency = hass.data.setdefault(DATA_POLL_LATENCY, {}) \
+            .setdefault(name, LatencyHistogram())
 
     @asyncio.coroutine
     def async_block_entities_done(self):
@@ -388,14 +470,18 @@ class EntityPlatform(object):
         yield from asyncio.wait(tasks, loop=self.component.hass.loop)
         self.component.async_update_group()
 
-        if self._async_unsub_polling is not None or \
-           not any(entity.should_poll for entity
-                   in self.platform_entities):
-            return
+        # Spread the first polls of the new entities over the scan interval
+        to_poll = [entity for entity in new_entities
+                   if entity in self.platform_entities and
+                   entity.entity_id not in self._polls and
+                   entity.should_poll]
+        now = dt_util.utcnow()
 
-        self._async_unsub_polling = async_track_time_interval(
-            self.component.hass, self._update_entity_states, self.scan_interval
-        )
+        for index, entity in enumerate(to_poll, 1):
+            poll = self._polls[entity.entity_id] = \
+                EntityPoll(self.scan_interval)
+            self._async_schedule_poll(
+                entity, poll, now + self.scan_interval * index / len(to_poll))
 
     @asyncio.coroutine
     def async_reset(self):
@@ -410,48 +496,117 @@ class EntityPlatform(object):
 
         yield from asyncio.wait(tasks, loop=self.component.hass.loop)
 
-        if self._async_unsub_polling is not None:
-            self._async_unsub_polling()
-            self._async_unsub_polling = None
+        if self._poll_timer is not None:
+            self._poll_timer[1]()
+            self._poll_timer = None
+        self._poll_heap.clear()
+        self._polls.clear()
+
+    @callback
+    def _async_schedule_poll(self, entity, poll, due):
+        """Schedule the next poll of an entity."""
+        poll.due = due
+        heapq.heappush(
+            self._poll_heap, (due, next(self._poll_sequence), entity, poll))
+        self._async_track_first_poll()
+
+    @callback
+    def _async_track_first_poll(self):
+        """Make the timer fire at the first due poll."""
+        if not self._poll_heap:
+            return
+
+        due = self._poll_heap[0][0]
+
+        if self._poll_timer is not None:
+            if self._poll_timer[0] <= due:
+                return
+            self._poll_timer[1]()
+
+        self._poll_timer = (due, async_track_point_in_utc_time(
+            self.component.hass, self._async_polls_due, due))
+
+    @callback
+    def _async_polls_due(self, now):
+        """Poll the entities that are due."""
+        self._poll_timer = None
+        heap = self._poll_heap
+
+        while heap and heap[0][0] <= now:
+            _, _, entity, poll = heapq.heappop(heap)
+
+            if self._polls.get(entity.entity_id) is poll:
+                self.component.hass.async_add_job(
+                    self._async_poll_entity(entity, poll))
+
+        self._async_track_first_poll()
 
     @asyncio.coroutine
-    def _update_entity_states(self, now):
-        """Update the states of all the polling entities.
+    def _async_poll_entity(self, entity, poll):
+        """Update an entity and schedule its next poll.
 
-        To protect from flooding the executor, we will update async entities
-        in parallel and other entities sequential.
+        Async entities update in parallel, sync entities share a limited
+        number of updates at the same time to protect the executor. Failing
+        or unavailable entities are polled less often, an entity that just
+        changed is polled once sooner.
 
         This method must be run in the event loop.
         """
-        if self._process_updates.locked():
+        if self._polls.get(entity.entity_id) is not poll:
+            return
+
+        if entity.should_poll:
+            old_state = self.component.hass.states.get(entity.entity_id)
+            failed = False
+
+            try:
+                if hasattr(entity, 'async_update'):
+                    yield from self._async_timed_update(entity)
+                else:
+                    with (yield from self._update_semaphore):
+                        yield from self._async_timed_update(entity)
+            except Exception:  # pylint: disable=broad-except
+                self.component.logger.exception(
+                    "Error while update entity from %s in %s",
+                    self.platform, self.component.domain)
+                failed = True
+
+            if self._polls.get(entity.entity_id) is not poll:
+                return
+
+            changed = self.component.hass.states.get(
+                entity.entity_id) is not old_state
+
+            # pylint: disable=protected-access
+            if failed or entity._update_failed or not entity.available:
+                poll.interval = min(
+                    max(poll.interval, self.scan_interval) * 2,
+                    self.scan_interval * MAX_POLL_BACKOFF)
+            elif changed and not poll.changed:
+                poll.interval = self.scan_interval / FAST_POLL_FACTOR
+            else:
+                poll.interval = self.scan_interval
+
+            poll.changed = changed
+
+        due = poll.due + poll.interval
+        now = dt_util.utcnow()
+
+        if due <= now:
             self.component.logger.warning(
                 "Updating %s %s took longer than the scheduled update "
                 "interval %s", self.platform, self.component.domain,
-                self.scan_interval)
-            return
+                poll.interval)
+            due = now + poll.interval
 
-        with (yield from self._process_updates):
-            tasks = []
-            to_update = []
+        self._async_schedule_poll(entity, poll, due)
 
-            for entity in self.platform_entities:
-                if not entity.should_poll:
-                    continue
+    @asyncio.coroutine
+    def _async_timed_update(self, entity):
+        """Update an entity and record how long it took."""
+        start = timer()
 
-                update_coro = entity.async_update_ha_state(True)
-                if hasattr(entity, 'async_update'):
-                    tasks.append(
-                        self.component.hass.async_add_job(update_coro))
-                else:
-                    to_update.append(update_coro)
-
-            for update_coro in to_update:
-                try:
-                    yield from update_coro
-                except Exception:  # pylint: disable=broad-except
-                    self.component.logger.exception(
-                        "Error while update entity from %s in %s",
-                        self.platform, self.component.domain)
-
-            if tasks:
-                yield from asyncio.wait(tasks, loop=self.component.hass.loop)
+        try:
+            yield from entity.async_update_ha_state(True)
+        finally:
+            self.latency.add(timer() - start)
@@ -1,5 +1,11 @@
 """Helpers for listening to events."""
+import bisect
+import calendar
+from datetime import datetime, timedelta
 import functools as ft
+import heapq
+import itertools
+import logging
 
 from homeassistant.helpers.sun import get_astral_event_next
 from ..core import HomeAssistant, callback
@@ -8,6 +14,12 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async import run_callback_threadsafe
 
+_LOGGER = logging.getLogger(__name__)
+
+DATA_STATE_CHANGE_INDEX = 'event_state_change_index'
+DATA_STATE_CHANGE_UNSUB = 'event_state_change_unsub'
+DATA_TIME_PATTERN_SCHEDULER = 'event_time_pattern_scheduler'
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -51,19 +63,15 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
 
     # Ensure it is a lowercase list with entity ids we want to match on
     if entity_ids == MATCH_ALL:
-        pass
+        entity_ids = (MATCH_ALL,)
     elif isinstance(entity_ids, str):
         entity_ids = (entity_ids.lower(),)
     else:
-        entity_ids = tuple(entity_id.lower() for entity_id in entity_ids)
+        entity_ids = tuple(set(entity_id.lower() for entity_id in entity_ids))
 
     @callback
     def state_change_listener(event):
         """Handle specific state changes."""
-        if entity_ids != MATCH_ALL and \
-           event.data.get('entity_id') not in entity_ids:
-            return
-
         if event.data.get('old_state') is not None:
             old_state = event.data['old_state'].state
         else:
@@ -79,7 +87,60 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
                                event.data.get('old_state'),
                                event.data.get('new_state'))
 
-    return hass.bus.async_listen(EVENT_STATE_CHANGED, state_change_listener)
+    index = _async_state_change_index(hass)
+
+    for entity_id in entity_ids:
+        index.setdefault(entity_id, []).append(state_change_listener)
+
+    @callback
+    def remove_listener():
+        """Remove the listener from the state change index."""
+        for entity_id in entity_ids:
+            listeners = index.get(entity_id)
+
+            if listeners is None or state_change_listener not in listeners:
+                continue
+
+            listeners.remove(state_change_listener)
+
+            if not listeners:
+                index.pop(entity_id)
+
+        if not index and hass.data.get(DATA_STATE_CHANGE_INDEX) is index:
+            hass.data.pop(DATA_STATE_CHANGE_INDEX)
+            hass.data.pop(DATA_STATE_CHANGE_UNSUB)()
+
+    return remove_listener
+
+
+@callback
+def _async_state_change_index(hass):
+    """Return the entity_id keyed index of state change listeners.
+
+    A single EVENT_STATE_CHANGED listener is registered on the bus which
+    only dispatches to listeners tracking the changed entity and to the
+    listeners tracking MATCH_ALL.
+    """
+    index = hass.data.get(DATA_STATE_CHANGE_INDEX)
+
+    if index is not None:
+        return index
+
+    index = hass.data[DATA_STATE_CHANGE_INDEX] = {}
+
+    @callback
+    def state_change_dispatcher(event):
+        """Dispatch a state change to the listeners of the entity."""
+        listeners = index.get(event.data.get('entity_id'), [])
+        listeners = index.get(MATCH_ALL, []) + listeners
+
+        for listener in listeners:
+            listener(event)
+
+    hass.data[DATA_STATE_CHANGE_UNSUB] = hass.bus.async_listen(
+        EVENT_STATE_CHANGED, state_change_dispatcher)
+
+    return index
 
 
 track_state_change = threaded_listener_factory(async_track_state_change)
@@ -88,16 +149,20 @@ track_state_change = threaded_listener_factory(async_track_state_change)
 @callback
 def async_track_template(hass, template, action, variables=None):
     """Add a listener that track state changes with template condition."""
-    from . import condition
-
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
 
     @callback
-    def template_condition_listener(entity_id, from_s, to_s):
+    def template_condition_listener(entity_id, from_s, to_s, render_info):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+
+        if render_info.exception is not None:
+            _LOGGER.error("Error during template condition: %s",
+                          render_info.exception)
+            template_result = False
+        else:
+            template_result = render_info.result.lower() == 'true'
 
         # Check to see if template returns true
         if template_result and not already_triggered:
@@ -106,11 +171,84 @@ def async_track_template(hass, template, action, variables=None):
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(), template_condition_listener)
+    return async_track_template_result(
+        hass, template, template_condition_listener, variables)
+
+
+@callback
+def async_track_template_result(hass, template, action, variables=None):
+    """Add a listener that re-renders a template when a state it read changes.
+
+    The template is rendered right away. Every render records the entities
+    and domains that it read and the state change listener is updated to
+    match, so the template is only re-rendered when one of them changes.
+    The action is called with the entity_id, old state and new state of the
+    change and the RenderInfo of the new render.
+
+    Returns a function that can be called to remove the listener.
+    """
+    render_info = template.async_render_to_info(variables)
+    tracked = None
+    remove_listener = None
+
+    @callback
+    def template_state_listener(entity_id, from_s, to_s):
+        """Re-render the template and run action."""
+        nonlocal render_info
+
+        if not (render_info.matches(entity_id) or
+                _render_read_nothing(render_info)):
+            return
+
+        render_info = template.async_render_to_info(variables)
+        async_update_listener()
+        hass.async_run_job(action, entity_id, from_s, to_s, render_info)
+
+    @callback
+    def async_update_listener():
+        """Track the entities that were read by the last render."""
+        nonlocal tracked, remove_listener
+
+        if render_info.all_states or render_info.domains or \
+                _render_read_nothing(render_info):
+            # Domains are matched by the listener
+            entity_ids = MATCH_ALL
+        else:
+            entity_ids = frozenset(render_info.entities)
+
+        if entity_ids == tracked:
+            return
+
+        if remove_listener is not None:
+            remove_listener()
+
+        tracked = entity_ids
+        remove_listener = async_track_state_change(
+            hass, entity_ids, template_state_listener)
+
+    @callback
+    def async_remove():
+        """Remove the listener."""
+        remove_listener()
+
+    async_update_listener()
+
+    return async_remove
+
+
+def _render_read_nothing(render_info):
+    """Return if a render did not read any state.
+
+    These templates depend on the time or failed before reading a state,
+    so they are re-rendered on every state change.
+    """
+    return not (render_info.all_states or render_info.domains or
+                render_info.entities)
 
 
 track_template = threaded_listener_factory(async_track_template)
+track_template_result = threaded_listener_factory(
+    async_track_template_result)
 
 
 @callback
@@ -266,30 +404,16 @@ def async_track_utc_time_change(hass, action, year=None, month=None, day=None,
         return hass.bus.async_listen(EVENT_TIME_CHANGED, time_change_listener)
 
     pmp = _process_time_match
-    year, month, day = pmp(year), pmp(month), pmp(day)
-    hour, minute, second = pmp(hour), pmp(minute), pmp(second)
+    pattern = (pmp(year), pmp(month, 1, 12), pmp(day, 1, 31),
+               pmp(hour, 0, 23), pmp(minute, 0, 59), pmp(second, 0, 59))
 
-    @callback
-    def pattern_time_change_listener(event):
-        """Listen for matching time_changed events."""
-        now = event.data[ATTR_NOW]
+    scheduler = hass.data.get(DATA_TIME_PATTERN_SCHEDULER)
 
-        if local:
-            now = dt_util.as_local(now)
-        mat = _matcher
+    if scheduler is None:
+        scheduler = hass.data[DATA_TIME_PATTERN_SCHEDULER] = \
+            _TimePatternScheduler(hass)
 
-        # pylint: disable=too-many-boolean-expressions
-        if mat(now.year, year) and \
-           mat(now.month, month) and \
-           mat(now.day, day) and \
-           mat(now.hour, hour) and \
-           mat(now.minute, minute) and \
-           mat(now.second, second):
-
-            hass.async_run_job(action, now)
-
-    return hass.bus.async_listen(EVENT_TIME_CHANGED,
-                                 pattern_time_change_listener)
+    return scheduler.async_add(action, pattern, local)
 
 
 track_utc_time_change = threaded_listener_factory(async_track_utc_time_change)
@@ -316,16 +440,29 @@ def _process_state_match(parameter):
         return tuple(parameter)
 
 
-def _process_time_match(parameter):
-    """Wrap parameter in a tuple if it is not one and returns it."""
+def _process_time_match(parameter, minimum=None, maximum=None):
+    """Wrap parameter in a tuple if it is not one and returns it.
+
+    Raises ValueError for a number outside of minimum and maximum, as such
+    a pattern can never match.
+    """
     if parameter is None or parameter == MATCH_ALL:
         return MATCH_ALL
     elif isinstance(parameter, str) and parameter.startswith('/'):
         return parameter
     elif isinstance(parameter, str) or not hasattr(parameter, '__iter__'):
-        return (parameter,)
+        parameter = (parameter,)
     else:
-        return tuple(parameter)
+        parameter = tuple(parameter)
+
+    for value in parameter:
+        if isinstance(value, int) and (
+                minimum is not None and value < minimum or
+                maximum is not None and value > maximum):
+            raise ValueError("Time pattern value {} is not between {} and "
+                             "{}".format(value, minimum, maximum))
+
+    return parameter
 
 
 def _matcher(subject, pattern):
@@ -340,3 +477,222 @@ def _matcher(subject, pattern):
             return False
 
     return MATCH_ALL == pattern or subject in pattern
+
+
+@ft.lru_cache(maxsize=None)
+def _matching_values(pattern, minimum, maximum):
+    """Return the sorted values from minimum to maximum matching pattern."""
+    return [value for value in range(minimum, maximum + 1)
+            if _matcher(value, pattern)]
+
+
+def _next_time_match(start, year, month, day, hour, minute, second):
+    """Return the first naive datetime from start that matches the pattern.
+
+    Every field jumps to its next matching value and carries over to the
+    next larger field when there is none left. Returns None if the pattern
+    does not match in the coming years.
+    """
+    months = _matching_values(month, 1, 12)
+    days = _matching_values(day, 1, 31)
+    hours = _matching_values(hour, 0, 23)
+    minutes = _matching_values(minute, 0, 59)
+    seconds = _matching_values(second, 0, 59)
+
+    if not (months and days and hours and minutes and seconds):
+        return None
+
+    def next_value(values, current):
+        """Return the first value from current, or None."""
+        index = bisect.bisect_left(values, current)
+        return values[index] if index < len(values) else None
+
+    candidate = start.replace(microsecond=0)
+    last_year = start.year + 8
+
+    if isinstance(year, tuple):
+        last_year = max([last_year] + [
+            value for value in year if isinstance(value, int)])
+
+    while candidate.year <= last_year:
+        if not _matcher(candidate.year, year):
+            candidate = datetime(candidate.year + 1, 1, 1)
+            continue
+
+        value = next_value(months, candidate.month)
+        if value is None:
+            candidate = datetime(candidate.year + 1, 1, 1)
+            continue
+        if value != candidate.month:
+            candidate = datetime(candidate.year, value, 1)
+
+        value = next_value(days, candidate.day)
+        if value is None or value > calendar.monthrange(
+                candidate.year, candidate.month)[1]:
+            candidate = datetime(candidate.year, candidate.month, 1) + \
+                timedelta(days=32)
+            candidate = candidate.replace(day=1)
+            continue
+        if value != candidate.day:
+            candidate = datetime(candidate.year, candidate.month, value)
+
+        value = next_value(hours, candidate.hour)
+        if value is None:
+            candidate = datetime(candidate.year, candidate.month,
+                                 candidate.day) + timedelta(days=1)
+            continue
+        if value != candidate.hour:
+            candidate = candidate.replace(hour=value, minute=0, second=0)
+
+        value = next_value(minutes, candidate.minute)
+        if value is None:
+            candidate = candidate.replace(minute=0, second=0) + \
+                timedelta(hours=1)
+            continue
+        if value != candidate.minute:
+            candidate = candidate.replace(minute=value, second=0)
+
+        value = next_value(seconds, candidate.second)
+        if value is None:
+            candidate = candidate.replace(second=0) + timedelta(minutes=1)
+            continue
+
+        return candidate.replace(second=value)
+
+    return None
+
+
+class _TimePatternListener(object):
+    """Representation of a listener waiting for a time pattern."""
+
+    __slots__ = ['action', 'pattern', 'local', 'removed']
+
+    def __init__(self, action, pattern, local):
+        """Initialize the time pattern listener."""
+        self.action = action
+        self.pattern = pattern
+        self.local = local
+        self.removed = False
+
+    def matches(self, now):
+        """Return True if now matches the time pattern."""
+        return all(_matcher(subject, pattern) for subject, pattern in zip(
+            (now.year, now.month, now.day, now.hour, now.minute, now.second),
+            self.pattern))
+
+
+class _TimePatternScheduler(object):
+    """Run time pattern listeners when their pattern matches.
+
+    The listeners are kept in a heap ordered by the next time their pattern
+    matches. A time changed event only has to look at the top of the heap
+    instead of matching the pattern of every listener each second. UTC and
+    local time patterns have their own heap as they run on a different
+    wall clock. Removed listeners are dropped from the heap once they make
+    up half of it.
+    """
+
+    def __init__(self, hass):
+        """Initialize the time pattern scheduler."""
+        self.hass = hass
+        self._listeners = {False: set(), True: set()}
+        self._heaps = {False: [], True: []}
+        self._last_now = {False: None, True: None}
+        self._removed = {False: 0, True: 0}
+        self._sequence = itertools.count()
+        self._async_unsub = hass.bus.async_listen(
+            EVENT_TIME_CHANGED, self._async_time_changed)
+
+    @callback
+    def async_add(self, action, pattern, local):
+        """Add a listener and return a function to remove it."""
+        listener = _TimePatternListener(action, pattern, local)
+        self._listeners[local].add(listener)
+
+        last_now = self._last_now[local]
+        # Without a previous time event the heap is built on the first one
+        if last_now is not None:
+            self._async_schedule(
+                listener,
+                last_now.replace(microsecond=0) + timedelta(seconds=1))
+
+        @callback
+        def remove_listener():
+            """Remove the time pattern listener."""
+            if listener.removed:
+                return
+
+            listener.removed = True
+            self._listeners[local].discard(listener)
+            self._async_compact(local)
+
+            if self._listeners[False] or self._listeners[True] or \
+                    self.hass.data.get(DATA_TIME_PATTERN_SCHEDULER) \
+                    is not self:
+                return
+
+            self.hass.data.pop(DATA_TIME_PATTERN_SCHEDULER)
+            self._async_unsub()
+
+        return remove_listener
+
+    @callback
+    def _async_compact(self, local):
+        """Count a removed listener, drop them when they pile up."""
+        heap = self._heaps[local]
+        self._removed[local] += 1
+
+        if self._removed[local] * 2 < len(heap):
+            return
+
+        heap[:] = [item for item in heap if not item[2].removed]
+        heapq.heapify(heap)
+        self._removed[local] = 0
+
+    @callback
+    def _async_schedule(self, listener, start):
+        """Put listener on the heap for the next match from start."""
+        next_match = _next_time_match(start, *listener.pattern)
+
+        if next_match is not None:
+            heapq.heappush(self._heaps[listener.local],
+                           (next_match, next(self._sequence), listener))
+
+    @callback
+    def _async_time_changed(self, event):
+        """Run the listeners that are due."""
+        now = event.data[ATTR_NOW]
+
+        for local in (False, True):
+            if self._listeners[local]:
+                self._async_process(
+                    dt_util.as_local(now) if local else now, local)
+
+    @callback
+    def _async_process(self, now, local):
+        """Run the listeners of one wall clock that are due at now."""
+        wall_now = now.replace(tzinfo=None)
+        last_now = self._last_now[local]
+        self._last_now[local] = wall_now
+        heap = self._heaps[local]
+
+        # Rebuild the heap when starting and when the clock went back
+        if last_now is None or wall_now < last_now:
+            heap.clear()
+            self._removed[local] = 0
+            for listener in self._listeners[local]:
+                self._async_schedule(listener, wall_now)
+
+        next_start = wall_now.replace(microsecond=0) + timedelta(seconds=1)
+
+        while heap and heap[0][0] <= wall_now:
+            listener = heapq.heappop(heap)[2]
+
+            if listener.removed:
+                self._removed[local] = max(self._removed[local] - 1, 0)
+                continue
+
+            if listener.matches(wall_now):
+                self.hass.async_run_job(listener.action, now)
+
+            self._async_schedule(listener, next_start)
@@ -0,0 +1,301 @@
+"""Buffered export of data to external services.
+
+Components that forward states to a metrics or logging backend put the
+formatted items in a BatchExporter. A thread per exporter sends them in
+batches, by size and by time, and retries failed batches with an
+exponential backoff. The buffer is bounded, when it is full the oldest
+items are dropped or spilled to disk.
+"""
+from collections import deque
+import json
+import logging
+import os
+import threading
+import time
+
+import voluptuous as vol
+
+from homeassistant.const import DATA_EXPORTERS, EVENT_HOMEASSISTANT_STOP
+import homeassistant.helpers.config_validation as cv
+from homeassistant.remote import JSONEncoder
+
+_LOGGER = logging.getLogger(__name__)
+
+CONF_BATCH_SIZE = 'batch_size'
+CONF_BATCH_INTERVAL = 'batch_interval'
+CONF_QUEUE_SIZE = 'queue_size'
+CONF_SPILL = 'spill_to_disk'
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BATCH_INTERVAL = 5
+DEFAULT_QUEUE_SIZE = 10000
+
+# Delay before the first retry of a failed batch, doubled on every failure
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 300
+
+# Seconds to wait for the remaining items to be sent at shutdown
+SHUTDOWN_TIMEOUT = 10
+
+SPILL_FILE = '.{}.spill'
+
+EXPORTER_SCHEMA = vol.Schema({
+    vol.Optional(CONF_BATCH_SIZE, default=DEFAULT_BATCH_SIZE):
+        vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(CONF_BATCH_INTERVAL, default=DEFAULT_BATCH_INTERVAL):
+        vol.All(vol.Coerce(float), vol.Range(min=0)),
+    vol.Optional(CONF_QUEUE_SIZE, default=DEFAULT_QUEUE_SIZE):
+        vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(CONF_SPILL, default=False): cv.boolean,
+})
+
+
+def setup_exporter(hass, name, send, conf, close=None):
+    """Create and start an exporter with the options of conf.
+
+    send is called on the exporter thread with a list of items. It should
+    raise an exception when the batch has to be retried. close is called
+    on the exporter thread after the last batch has been sent.
+    """
+    spill_path = None
+    if conf.get(CONF_SPILL):
+        spill_path = hass.config.path(SPILL_FILE.format(name))
+
+    exporter = BatchExporter(
+        name, send,
+        batch_size=conf.get(CONF_BATCH_SIZE, DEFAULT_BATCH_SIZE),
+        batch_interval=conf.get(CONF_BATCH_INTERVAL, DEFAULT_BATCH_INTERVAL),
+        queue_size=conf.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+        spill_path=spill_path, close=close)
+
+    def shutdown(event):
+        """Send the remaining items and stop the exporter."""
+        exporter.stop()
+        exporter.join(SHUTDOWN_TIMEOUT)
+
+    hass.bus.listen_once(EVENT_HOMEASSISTANT_STOP, shutdown)
+    hass.data.setdefault(DATA_EXPORTERS, {})[name] = exporter
+    exporter.start()
+
+    return exporter
+
+
+class BatchExporter(threading.Thread):
+    """Send items to an external service in batches."""
+
+    def __init__(self, name, send, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_interval=DEFAULT_BATCH_INTERVAL,
+                 queue_size=DEFAULT_QUEUE_SIZE, spill_path=None, close=None):
+        """Initialize the exporter."""
+        super().__init__(name='Exporter_{}'.format(name), daemon=True)
+        self.exporter_name = name
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.queue_size = queue_size
+        self.spill_path = spill_path
+        self._send = send
+        self._close = close
+        self._buffer = deque()
+        self._overflow = []
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._flushing = 0
+        self._sending = False
+
+        self.sent = 0
+        self.batches = 0
+        self.retries = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def put(self, item):
+        """Add an item to the buffer, may be called from any thread."""
+        with self._condition:
+            if len(self._buffer) >= self.queue_size:
+                oldest = self._buffer.popleft()
+                if self.spill_path is None:
+                    self.dropped += 1
+                else:
+                    self._overflow.append(oldest)
+                    self._condition.notify_all()
+
+            self._buffer.append(item)
+
+            # Start the interval of a new batch or send a full one
+            if len(self._buffer) in (1, self.batch_size):
+                self._condition.notify_all()
+
+    def flush(self):
+        """Send all buffered items and wait until they are sent."""
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self.is_alive() and (self._buffer or self._sending):
+                    self._condition.wait()
+            finally:
+                self._flushing -= 1
+
+    def stop(self):
+        """Stop the exporter after the buffered items are sent once."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+    def stats(self):
+        """Return a dict with the counters of the exporter."""
+        with self._condition:
+            return {
+                'queued': len(self._buffer),
+                'sent': self.sent,
+                'batches': self.batches,
+                'retries': self.retries,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+            }
+
+    def run(self):
+        """Send batches until the exporter is stopped."""
+        while True:
+            self._restore_spill()
+
+            with self._condition:
+                self._wait_for_batch()
+                batch = [self._buffer.popleft() for _
+                         in range(min(self.batch_size, len(self._buffer)))]
+                stopping = self._stopping
+                self._sending = bool(batch)
+
+            self._spill_overflow()
+
+            if batch:
+                self._send_batch(batch)
+            elif stopping:
+                if self._close is not None:
+                    self._close()
+                return
+
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+
+    def _wait_for_batch(self):
+        """Wait till a batch is due, the condition has to be held."""
+        deadline = None
+
+        while not (self._stopping or self._overflow or
+                   (self._flushing and self._buffer) or
+                   len(self._buffer) >= self.batch_size):
+            if not self._buffer:
+                deadline = None
+                self._condition.wait()
+                continue
+
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_interval
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+
+            self._condition.wait(remaining)
+
+    def _send_batch(self, batch):
+        """Send a batch, retry with a backoff until it is sent.
+
+        At shutdown a batch is only tried once, batches that fail are
+        spilled to disk or dropped.
+        """
+        delay = RETRY_DELAY
+
+        while True:
+            try:
+                self._send(batch)
+            except Exception as err:  # pylint: disable=broad-except
+                error = err
+            else:
+                with self._condition:
+                    self.sent += len(batch)
+                    self.batches += 1
+                return
+
+            with self._condition:
+                stopping = self._stopping
+
+            if stopping:
+                _LOGGER.error("Error sending %s items to %s: %s",
+                              len(batch), self.exporter_name, error)
+                self._spill_or_drop(batch)
+                return
+
+            _LOGGER.warning("Error sending %s items to %s, retrying in %s "
+                            "seconds: %s", len(batch), self.exporter_name,
+                            delay, error)
+
+            with self._condition:
+                self.retries += 1
+                self._condition.wait_for(lambda: self._stopping, delay)
+
+            self._spill_overflow()
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def _spill_overflow(self):
+        """Write the items that did not fit in the buffer to disk."""
+        with self._condition:
+            overflow = self._overflow
+            self._overflow = []
+
+        if overflow:
+            self._spill_or_drop(overflow)
+
+    def _spill_or_drop(self, items):
+        """Append items to the spill file, or drop them without one."""
+        if self.spill_path is not None:
+            try:
+                with open(self.spill_path, 'a') as spill:
+                    for item in items:
+                        spill.write(json.dumps(item, cls=JSONEncoder))
+                        spill.write('\n')
+            except (OSError, TypeError, ValueError) as err:
+                _LOGGER.error("Unable to spill %s items of %s to disk: %s",
+                              len(items), self.exporter_name, err)
+            else:
+                with self._condition:
+                    self.spilled += len(items)
+                return
+
+        with self._condition:
+            self.dropped += len(items)
+
+    def _restore_spill(self):
+        """Move spilled items back into the buffer once it is empty.
+
+        Items that do not fit are written back to the spill file.
+        """
+        if self.spill_path is None or not os.path.isfile(self.spill_path):
+            return
+
+        with self._condition:
+            if self._buffer or self._stopping:
+                return
+            room = self.queue_size
+
+        try:
+            with open(self.spill_path) as spill:
+                lines = spill.readlines()
+            items = [json.loads(line) for line in lines[:room]]
+
+            if len(lines) > room:
+                with open(self.spill_path, 'w') as spill:
+                    spill.writelines(lines[room:])
+            else:
+                os.remove(self.spill_path)
+        except (OSError, ValueError) as err:
+            _LOGGER.error("Unable to restore the spilled items of %s: %s",
+                          self.exporter_name, err)
+            return
+
+        with self._condition:
+            self.spilled -= min(self.spilled, len(items))
+            self._buffer.extendleft(reversed(items))
+            self._condition.notify_all()
@@ -1,11 +1,36 @@
 """Location helpers for Home Assistant."""
 
+from collections import defaultdict
+import math
 from typing import Sequence
 
 from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE
-from homeassistant.core import State
+from homeassistant.core import State, callback
 from homeassistant.util import location as loc_util
 
+DATA_LOCATION_INDEX = 'location_index'
+
+ATTR_PASSIVE = 'passive'
+ATTR_RADIUS = 'radius'
+ZONE_DOMAIN = 'zone'
+
+# Size of a grid cell in degrees, about 5.5 km from north to south
+CELL_SIZE = 0.05
+
+# Lower bound of the meters per degree of latitude on the ellipsoid, with
+# a margin so that the search bounds never exclude a closer state
+METERS_PER_DEGREE = 100000
+
+# Rings of cells that are searched around a point before all states are
+# compared, and the number of cells above which a zone or a query is not
+# put in the grid
+SEARCH_RINGS = 8
+MAX_CELLS = 400
+
+# Close to the poles and the antimeridian the grid is not used
+MAX_GRID_LATITUDE = 80
+MAX_GRID_LONGITUDE = 180 - (SEARCH_RINGS + 1) * CELL_SIZE
+
 
 def has_location(state: State) -> bool:
     """Test if state contains a valid location.
@@ -34,3 +59,230 @@ def closest(latitude: float, longitude: float,
             latitude, longitude, state.attributes.get(ATTR_LATITUDE),
             state.attributes.get(ATTR_LONGITUDE))
     )
+
+
+@callback
+def async_closest(hass, latitude, longitude, entity_ids=None):
+    """Return the closest state with a location to a point.
+
+    entity_ids limits the search to these entities. This method must be
+    run in the event loop.
+    """
+    entity_id = async_get_location_index(hass).closest(
+        latitude, longitude, entity_ids)
+
+    return None if entity_id is None else hass.states.get(entity_id)
+
+
+@callback
+def async_get_location_index(hass):
+    """Return the location index, create it on first use.
+
+    The state machine updates the index as soon as a state is set or
+    removed. This method must be run in the event loop.
+    """
+    index = hass.data.get(DATA_LOCATION_INDEX)
+
+    if index is not None:
+        return index
+
+    index = hass.data[DATA_LOCATION_INDEX] = LocationIndex()
+
+    for state in hass.states.async_all():
+        index.update(state.entity_id, state)
+
+    hass.states.async_add_observer(index.update)
+
+    return index
+
+
+def _cell(latitude, longitude):
+    """Return the grid cell of a point."""
+    return (int(math.floor(latitude / CELL_SIZE)),
+            int(math.floor(longitude / CELL_SIZE)))
+
+
+def _bounding_cells(latitude, longitude, radius):
+    """Return the cells of the box around a circle.
+
+    Returns None when the box is too large or not on the grid.
+    """
+    lat_delta = radius / METERS_PER_DEGREE
+    if abs(latitude) + lat_delta > MAX_GRID_LATITUDE:
+        return None
+
+    lon_delta = lat_delta / math.cos(math.radians(abs(latitude) + lat_delta))
+    if abs(longitude) + lon_delta > MAX_GRID_LONGITUDE:
+        return None
+
+    min_y, min_x = _cell(latitude - lat_delta, longitude - lon_delta)
+    max_y, max_x = _cell(latitude + lat_delta, longitude + lon_delta)
+
+    if (max_y - min_y + 1) * (max_x - min_x + 1) > MAX_CELLS:
+        return None
+
+    return [(cell_y, cell_x) for cell_y in range(min_y, max_y + 1)
+            for cell_x in range(min_x, max_x + 1)]
+
+
+def _ring_cells(cell_y, cell_x, ring):
+    """Return the cells at a distance of ring cells around a cell."""
+    if ring == 0:
+        return [(cell_y, cell_x)]
+
+    cells = []
+    for offset in range(-ring, ring + 1):
+        cells.append((cell_y - ring, cell_x + offset))
+        cells.append((cell_y + ring, cell_x + offset))
+    for offset in range(-ring + 1, ring):
+        cells.append((cell_y + offset, cell_x - ring))
+        cells.append((cell_y + offset, cell_x + ring))
+    return cells
+
+
+def _zone_circle(state):
+    """Return latitude, longitude, radius and passive of a zone state."""
+    circle = (state.attributes.get(ATTR_LATITUDE),
+              state.attributes.get(ATTR_LONGITUDE),
+              state.attributes.get(ATTR_RADIUS))
+
+    if not all(isinstance(value, (int, float)) for value in circle):
+        return None
+
+    return circle + (bool(state.attributes.get(ATTR_PASSIVE)),)
+
+
+class LocationIndex(object):
+    """Grid of the states with a location and of the zone circles.
+
+    Every state with a location is put in the cell of its position. A zone
+    is put in every cell that its circle may overlap, zones that are too
+    large for the grid are kept apart and are always a candidate.
+    """
+
+    def __init__(self):
+        """Initialize the index."""
+        self.locations = {}
+        self.zones = {}
+        self._cells = defaultdict(set)
+        self._zone_cells = defaultdict(set)
+        self._large_zones = set()
+
+    def update(self, entity_id, state):
+        """Update the location of an entity, remove it if state is None."""
+        location = None
+        if has_location(state):
+            location = (state.attributes[ATTR_LATITUDE],
+                        state.attributes[ATTR_LONGITUDE])
+
+        if self.locations.get(entity_id) != location:
+            if entity_id in self.locations:
+                self._remove_location(entity_id)
+            if location is not None:
+                self.locations[entity_id] = location
+                self._cells[_cell(*location)].add(entity_id)
+
+        zone = None
+        if state is not None and state.domain == ZONE_DOMAIN:
+            zone = _zone_circle(state)
+
+        if self.zones.get(entity_id) != zone:
+            if entity_id in self.zones:
+                self._remove_zone(entity_id)
+            if zone is not None:
+                self._add_zone(entity_id, zone)
+
+    def _remove_location(self, entity_id):
+        """Remove the location of an entity."""
+        cell = _cell(*self.locations.pop(entity_id))
+        self._cells[cell].discard(entity_id)
+        if not self._cells[cell]:
+            del self._cells[cell]
+
+    def _add_zone(self, entity_id, zone):
+        """Add a zone to the cells that its circle may overlap."""
+        self.zones[entity_id] = zone
+        cells = _bounding_cells(*zone[:3])
+
+        if cells is None:
+            self._large_zones.add(entity_id)
+            return
+
+        for cell in cells:
+            self._zone_cells[cell].add(entity_id)
+
+    def _remove_zone(self, entity_id):
+        """Remove a zone from its cells."""
+        zone = self.zones.pop(entity_id)
+
+        if entity_id in self._large_zones:
+            self._large_zones.discard(entity_id)
+            return
+
+        for cell in _bounding_cells(*zone[:3]):
+            self._zone_cells[cell].discard(entity_id)
+            if not self._zone_cells[cell]:
+                del self._zone_cells[cell]
+
+    def zones_near(self, latitude, longitude, radius=0):
+        """Return the zones whose circle may contain a point.
+
+        radius is the accuracy of the point in meters. Passive zones are
+        not returned.
+        """
+        cells = _bounding_cells(latitude, longitude, radius)
+
+        if cells is None:
+            candidates = set(self.zones)
+        else:
+            candidates = set(self._large_zones)
+            for cell in cells:
+                candidates.update(self._zone_cells.get(cell, ()))
+
+        return {entity_id for entity_id in candidates
+                if not self.zones[entity_id][3]}
+
+    def closest(self, latitude, longitude, entity_ids=None):
+        """Return the entity id of the closest entity to a point.
+
+        The rings of cells around the point are searched until no cell
+        left can hold a closer entity. entity_ids limits the search to
+        these entities.
+        """
+        best = None
+        best_dist = None
+
+        def check(candidates):
+            """Keep the closest of the candidates."""
+            nonlocal best, best_dist
+            for entity_id in candidates:
+                if entity_ids is not None and entity_id not in entity_ids:
+                    continue
+                dist = loc_util.distance(
+                    latitude, longitude, *self.locations[entity_id])
+                if best is None or dist < best_dist:
+                    best = entity_id
+                    best_dist = dist
+
+        if (abs(latitude) > MAX_GRID_LATITUDE or
+                abs(longitude) > MAX_GRID_LONGITUDE):
+            check(self.locations)
+            return best
+
+        cell_y, cell_x = _cell(latitude, longitude)
+        # A cell is at least this wide in meters within the searched rings
+        cell_width = CELL_SIZE * METERS_PER_DEGREE * math.cos(math.radians(
+            abs(latitude) + (SEARCH_RINGS + 1) * CELL_SIZE))
+
+        for ring in range(SEARCH_RINGS + 1):
+            if best is not None and (ring - 1) * cell_width > best_dist:
+                return best
+
+            for cell in _ring_cells(cell_y, cell_x, ring):
+                check(self._cells.get(cell, ()))
+
+        if best is not None and SEARCH_RINGS * cell_width > best_dist:
+            return best
+
+        check(self.locations)
+        return best
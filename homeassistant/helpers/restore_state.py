@@ -6,10 +6,12 @@ from datetime import timedelta
 import async_timeout
 
 from homeassistant.core import HomeAssistant, CoreState, callback
-from homeassistant.const import EVENT_HOMEASSISTANT_START
-from homeassistant.components.history import get_states, last_recorder_run
+from homeassistant.const import ATTR_HIDDEN, EVENT_HOMEASSISTANT_START
+from homeassistant.components.history import (
+    IGNORE_DOMAINS, get_states, last_recorder_run)
 from homeassistant.components.recorder import (
     wait_connection_ready, DOMAIN as _RECORDER)
+from homeassistant.components.recorder.snapshot import get_snapshot_states
 import homeassistant.util.dt as dt_util
 
 RECORDER_TIMEOUT = 10
@@ -40,7 +42,15 @@ def _load_restore_cache(hass: HomeAssistant):
     last_end_time = last_end_time.replace(tzinfo=dt_util.UTC)
     _LOGGER.debug("Last run: %s - %s", last_run.start, last_end_time)
 
-    states = get_states(hass, last_end_time, run=last_run)
+    states = get_snapshot_states(hass, last_run, last_end_time)
+
+    if states is None:
+        _LOGGER.debug("No state snapshot of the last run, querying states")
+        states = get_states(hass, last_end_time, run=last_run)
+    else:
+        states = [state for state in states
+                  if state.domain not in IGNORE_DOMAINS and
+                  not state.attributes.get(ATTR_HIDDEN, False)]
 
     # Cache the states
     hass.data[DATA_RESTORE_CACHE] = {
@@ -1,17 +1,21 @@
 """Template helper methods for rendering strings with Home Assistant data."""
+from collections import Counter, OrderedDict
 from datetime import datetime
+from functools import partial, wraps
 import json
 import logging
 import random
 import re
+import threading
 
 import jinja2
 from jinja2 import contextfilter
 from jinja2.sandbox import ImmutableSandboxedEnvironment
 
 from homeassistant.const import (
-    STATE_UNKNOWN, ATTR_LATITUDE, ATTR_LONGITUDE, MATCH_ALL)
-from homeassistant.core import State
+    STATE_UNKNOWN, ATTR_LATITUDE, ATTR_LONGITUDE, MATCH_ALL,
+    DATA_TEMPLATE_CACHE_STATS)
+from homeassistant.core import State, split_entity_id
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
 from homeassistant.loader import get_component
@@ -22,6 +26,13 @@ _LOGGER = logging.getLogger(__name__)
 _SENTINEL = object()
 DATE_STR_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# Maximum number of cached results per template
+CACHE_SIZE = 16
+
+
+# Variable types that can be part of a cache key
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
 _RE_NONE_ENTITIES = re.compile(r"distance\(|closest\(", re.I | re.M)
 _RE_GET_ENTITIES = re.compile(
     r"(?:(?:states\.|(?:is_state|is_state_attr|states)\(.)([\w]+\.[\w]+))",
@@ -52,6 +63,69 @@ def extract_entities(template):
     return MATCH_ALL
 
 
+class _RenderLocal(threading.local):
+    """Hold the RenderInfo of the render that runs in the current thread."""
+
+    info = None
+
+
+_RENDER = _RenderLocal()
+
+
+class RenderInfo(object):
+    """Hold the result of a render and the states that were read by it."""
+
+    def __init__(self, template):
+        """Initialize the render info."""
+        self.template = template
+        self.result = None
+        self.exception = None
+        self.all_states = False
+        self.domains = set()
+        self.entities = set()
+        self.cacheable = True
+
+    def matches(self, entity_id):
+        """Return if a change of entity_id can change the result."""
+        return (self.all_states or entity_id in self.entities or
+                split_entity_id(entity_id)[0] in self.domains)
+
+    def merge(self, other):
+        """Add the states that were read by another render."""
+        self.all_states = self.all_states or other.all_states
+        self.domains.update(other.domains)
+        self.entities.update(other.entities)
+        self.cacheable = self.cacheable and other.cacheable
+
+
+class _CacheEntry(object):
+    """A cached result and the versions of the states it was rendered from."""
+
+    __slots__ = ['result', 'render_info', 'entities', 'domains', 'versions']
+
+    def __init__(self, result, render_info, states):
+        """Initialize the cache entry."""
+        self.result = result
+        self.render_info = render_info
+        self.entities = tuple(render_info.entities)
+        self.domains = tuple(render_info.domains)
+        self.versions = self._versions(states)
+
+    def _versions(self, states):
+        """Return the current versions of the states that were read."""
+        if self.render_info.all_states:
+            return states.version()
+
+        return (tuple(states.version(entity_id)
+                      for entity_id in self.entities),
+                tuple(states.domain_version(domain)
+                      for domain in self.domains))
+
+    def is_valid(self, states):
+        """Return if none of the states that were read has changed."""
+        return self._versions(states) == self.versions
+
+
 class Template(object):
     """Class to hold a template and manage caching and rendering."""
 
@@ -63,6 +137,7 @@ class Template(object):
         self.template = template
         self._compiled_code = None
         self._compiled = None
+        self._cache = OrderedDict()
         self.hass = hass
 
     def ensure_valid(self):
@@ -97,10 +172,69 @@ class Template(object):
         if variables is not None:
             kwargs.update(variables)
 
+        stats = self.hass.data.get(DATA_TEMPLATE_CACHE_STATS)
+        if stats is None:
+            stats = self.hass.data[DATA_TEMPLATE_CACHE_STATS] = Counter()
+
         try:
-            return self._compiled.render(kwargs).strip()
+            key = _freeze(kwargs)
+        except TypeError:
+            key = None
+
+        entry = None if key is None else self._cache.get(key)
+
+        if entry is not None and entry.is_valid(self.hass.states):
+            stats['hits'] += 1
+            self._cache.move_to_end(key)
+            if _RENDER.info is not None:
+                _RENDER.info.merge(entry.render_info)
+            return entry.result
+
+        render_info = RenderInfo(self)
+        outer_info, _RENDER.info = _RENDER.info, render_info
+
+        try:
+            result = self._compiled.render(kwargs).strip()
         except jinja2.TemplateError as err:
             raise TemplateError(err)
+        finally:
+            _RENDER.info = outer_info
+            if outer_info is not None:
+                outer_info.merge(render_info)
+
+        if key is None or not render_info.cacheable:
+            stats['uncacheable'] += 1
+            return result
+
+        stats['misses'] += 1
+        self._cache.pop(key, None)
+        if len(self._cache) >= CACHE_SIZE:
+            # Evict the least recently used result
+            self._cache.popitem(last=False)
+            stats['evictions'] += 1
+        self._cache[key] = _CacheEntry(result, render_info, self.hass.states)
+
+        return result
+
+    def async_render_to_info(self, variables=None, **kwargs):
+        """Render the template and record the states it reads.
+
+        Returns a RenderInfo with the result or the raised TemplateError and
+        the entities and domains that were read during the render.
+
+        This method must be run in the event loop.
+        """
+        render_info = RenderInfo(self)
+        outer_info, _RENDER.info = _RENDER.info, render_info
+
+        try:
+            render_info.result = self.async_render(variables, **kwargs)
+        except TemplateError as ex:
+            render_info.exception = ex
+        finally:
+            _RENDER.info = outer_info
+
+        return render_info
 
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
@@ -151,8 +285,8 @@ class Template(object):
         global_vars = ENV.make_globals({
             'closest': location_methods.closest,
             'distance': location_methods.distance,
-            'is_state': self.hass.states.is_state,
-            'is_state_attr': self.hass.states.is_state_attr,
+            'is_state': partial(_is_state, self.hass),
+            'is_state_attr': partial(_is_state_attr, self.hass),
             'states': AllStates(self.hass),
         })
 
@@ -168,6 +302,75 @@ class Template(object):
                 self.hass == other.hass)
 
 
+def _freeze(variables):
+    """Return a hashable cache key of the variables of a render.
+
+    Raises TypeError for variables that can change without being replaced,
+    like states and other objects.
+    """
+    if isinstance(variables, dict):
+        return frozenset((key, _freeze(value))
+                         for key, value in variables.items())
+    elif isinstance(variables, (list, tuple)):
+        return (type(variables),) + tuple(
+            _freeze(value) for value in variables)
+    elif isinstance(variables, _IMMUTABLE_TYPES):
+        return (type(variables), variables)
+
+    raise TypeError('Unable to use {} in a cache key'.format(
+        type(variables).__name__))
+
+
+def _collect_entity(entity_id):
+    """Record that the state of entity_id was read by the render."""
+    if _RENDER.info is not None:
+        _RENDER.info.entities.add(str(entity_id).lower())
+
+
+def _collect_domain(domain):
+    """Record that all states of a domain were read by the render."""
+    if _RENDER.info is not None:
+        _RENDER.info.domains.add(domain.lower())
+
+
+def _collect_all():
+    """Record that the render depends on all states."""
+    if _RENDER.info is not None:
+        _RENDER.info.all_states = True
+
+
+def _collect_uncacheable():
+    """Record that the render depends on more than the states."""
+    if _RENDER.info is not None:
+        _RENDER.info.cacheable = False
+
+
+def _uncacheable(func):
+    """Mark renders that call func as not cacheable.
+
+    Used for functions that do not only depend on states, like the time.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        """Mark the render and call func."""
+        _collect_uncacheable()
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _is_state(hass, entity_id, state):
+    """Test if an entity is in a specific state."""
+    _collect_entity(entity_id)
+    return hass.states.is_state(entity_id, state)
+
+
+def _is_state_attr(hass, entity_id, name, value):
+    """Test if an entity has an attribute with a specific value."""
+    _collect_entity(entity_id)
+    return hass.states.is_state_attr(entity_id, name, value)
+
+
 class AllStates(object):
     """Class to expose all HA states as attributes."""
 
@@ -181,11 +384,13 @@ class AllStates(object):
 
     def __iter__(self):
         """Return all states."""
+        _collect_all()
         return iter(sorted(self._hass.states.async_all(),
                            key=lambda state: state.entity_id))
 
     def __call__(self, entity_id):
         """Return the states."""
+        _collect_entity(entity_id)
         state = self._hass.states.get(entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
@@ -200,14 +405,14 @@ class DomainStates(object):
 
     def __getattr__(self, name):
         """Return the states."""
-        return self._hass.states.get('{}.{}'.format(self._domain, name))
+        entity_id = '{}.{}'.format(self._domain, name)
+        _collect_entity(entity_id)
+        return self._hass.states.get(entity_id)
 
     def __iter__(self):
         """Return the iteration over all the states."""
-        return iter(sorted(
-            (state for state in self._hass.states.async_all()
-             if state.domain == self._domain),
-            key=lambda state: state.entity_id))
+        _collect_domain(self._domain)
+        return iter(self._hass.states.async_all(self._domain))
 
 
 class LocationMethods(object):
@@ -232,6 +437,7 @@ class LocationMethods(object):
           closest(states.zone.school, 'group.children')
         """
         if len(args) == 1:
+            _collect_uncacheable()
             latitude = self._hass.config.latitude
             longitude = self._hass.config.longitude
             entities = args[0]
@@ -265,8 +471,11 @@ class LocationMethods(object):
 
             entities = args[2]
 
-        if isinstance(entities, (AllStates, DomainStates)):
-            states = list(entities)
+        if isinstance(entities, AllStates):
+            _collect_all()
+            entity_ids = None
+        elif isinstance(entities, DomainStates):
+            entity_ids = {state.entity_id for state in entities}
         else:
             if isinstance(entities, State):
                 gr_entity_id = entities.entity_id
@@ -275,10 +484,16 @@ class LocationMethods(object):
 
             group = get_component('group')
 
-            states = [self._hass.states.get(entity_id) for entity_id
-                      in group.expand_entity_ids(self._hass, [gr_entity_id])]
+            _collect_entity(gr_entity_id)
+            entity_ids = group.expand_entity_ids(self._hass, [gr_entity_id])
+
+            for entity_id in entity_ids:
+                _collect_entity(entity_id)
+
+            entity_ids = set(entity_ids)
 
-        return loc_helper.closest(latitude, longitude, states)
+        return loc_helper.async_closest(
+            self._hass, latitude, longitude, entity_ids)
 
     def distance(self, *args):
         """Calculate distance.
@@ -323,6 +538,7 @@ class LocationMethods(object):
             locations.append((latitude, longitude))
 
         if len(locations) == 1:
+            _collect_uncacheable()
             return self._hass.config.distance(*locations[0])
 
         return self._hass.config.units.length(
@@ -333,6 +549,7 @@ class LocationMethods(object):
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         elif isinstance(entity_id_or_state, str):
+            _collect_entity(entity_id_or_state)
             return self._hass.states.get(entity_id_or_state)
         return None
 
@@ -447,10 +664,10 @@ ENV.filters['timestamp_utc'] = timestamp_utc
 ENV.filters['is_defined'] = fail_when_undefined
 ENV.filters['max'] = max
 ENV.filters['min'] = min
-ENV.filters['random'] = random_every_time
+ENV.filters['random'] = _uncacheable(random_every_time)
 ENV.globals['float'] = forgiving_float
-ENV.globals['now'] = dt_util.now
-ENV.globals['utcnow'] = dt_util.utcnow
+ENV.globals['now'] = _uncacheable(dt_util.now)
+ENV.globals['utcnow'] = _uncacheable(dt_util.utcnow)
 ENV.globals['as_timestamp'] = forgiving_as_timestamp
-ENV.globals['relative_time'] = dt_util.get_age
+ENV.globals['relative_time'] = _uncacheable(dt_util.get_age)
 ENV.globals['strptime'] = strptime
@@ -41,29 +41,50 @@ _COMPONENT_CACHE = {}  # type: Dict[str, ModuleType]
 _LOGGER = logging.getLogger(__name__)
 
 
-def prepare(hass: 'HomeAssistant'):
+def prepare(hass: 'HomeAssistant', use_cache: bool=False):
     """Prepare the loading of components.
 
+    With use_cache the component index is kept in the startup cache.
+
     This method needs to run in an executor.
     """
     global PREPARED  # pylint: disable=global-statement
 
+    AVAILABLE_COMPONENTS.clear()
+
+    if use_cache:
+        from homeassistant import startup_cache
+
+        AVAILABLE_COMPONENTS.extend(startup_cache.cached(
+            hass.config.config_dir, startup_cache.KEY_COMPONENTS,
+            lambda: _find_components(hass)))
+    else:
+        AVAILABLE_COMPONENTS.extend(_find_components(hass)[0])
+
+    if os.path.isdir(hass.config.path("custom_components")):
+        # Ensure we can load custom components using Pythons import
+        sys.path.insert(0, hass.config.config_dir)
+
+    PREPARED = True
+
+
+def _find_components(hass: 'HomeAssistant'):
+    """Return the available components and the directories they are in.
+
+    This method needs to run in an executor.
+    """
     # Load the built-in components
     import homeassistant.components as components
 
-    AVAILABLE_COMPONENTS.clear()
-
-    AVAILABLE_COMPONENTS.extend(
+    found = [
         item[1] for item in
-        pkgutil.iter_modules(components.__path__, 'homeassistant.components.'))
+        pkgutil.iter_modules(components.__path__, 'homeassistant.components.')]
 
     # Look for available custom components
     custom_path = hass.config.path("custom_components")
+    paths = list(components.__path__) + [custom_path]
 
     if os.path.isdir(custom_path):
-        # Ensure we can load custom components using Pythons import
-        sys.path.insert(0, hass.config.config_dir)
-
         # We cannot use the same approach as for built-in components because
         # custom components might only contain a platform for a component.
         # ie custom_components/switch/some_platform.py. Using pkgutil would
@@ -76,13 +97,12 @@ def prepare(hass: 'HomeAssistant'):
             if fil == '__pycache__':
                 continue
             elif os.path.isdir(os.path.join(custom_path, fil)):
-                AVAILABLE_COMPONENTS.append('custom_components.{}'.format(fil))
+                found.append('custom_components.{}'.format(fil))
             else:
                 # For files we will strip out .py extension
-                AVAILABLE_COMPONENTS.append(
-                    'custom_components.{}'.format(fil[0:-3]))
+                found.append('custom_components.{}'.format(fil[0:-3]))
 
-    PREPARED = True
+    return found, (paths, {})
 
 
 def set_component(comp_name: str, component: ModuleType) -> None:
@@ -141,6 +141,55 @@ class JSONEncoder(json.JSONEncoder):
                 return json.JSONEncoder.default(self, obj)
 
 
+def state_to_json(state):
+    """Return the JSON representation of a state.
+
+    States are replaced instead of changed, so the representation is stored
+    on the state and shared by everything that sends it.
+    """
+    if state.json_cache is None:
+        state.json_cache = json.dumps(
+            state.as_dict(), sort_keys=True, cls=JSONEncoder)
+
+    return state.json_cache
+
+
+def states_to_json(states):
+    """Return the JSON representation of a list of states."""
+    return '[{}]'.format(', '.join(state_to_json(state) for state in states))
+
+
+def event_to_json(event):
+    """Return the JSON representation of an event.
+
+    The representation is stored on the event, so it is encoded once for
+    all listeners. States in the event data reuse their own representation.
+    """
+    if event.json_cache is not None:
+        return event.json_cache
+
+    event_dict = event.as_dict()
+
+    if not any(isinstance(value, ha.State)
+               for value in event_dict['data'].values()):
+        event.json_cache = json.dumps(
+            event_dict, sort_keys=True, cls=JSONEncoder)
+        return event.json_cache
+
+    data = event_dict.pop('data')
+    data_json = ', '.join(
+        '{}: {}'.format(
+            json.dumps(str(key)),
+            state_to_json(value) if isinstance(value, ha.State) else
+            json.dumps(value, sort_keys=True, cls=JSONEncoder))
+        for key, value in sorted(data.items()))
+
+    # 'data' sorts before the other keys of the event
+    event.json_cache = '{{"data": {{{}}}, {}'.format(
+        data_json, json.dumps(event_dict, sort_keys=True, cls=JSONEncoder)[1:])
+    return event.json_cache
+
+
 def validate_api(api):
     """Make a call to validate API."""
     try:
@@ -2,10 +2,13 @@
 import asyncio
 import argparse
 from contextlib import suppress
+from functools import partial
 import logging
 from timeit import default_timer as timer
 
 from homeassistant import core
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.helpers.event import async_track_state_change
 
 BENCHMARKS = {}
 
@@ -72,3 +75,194 @@ def async_million_events(hass):
     yield from event.wait()
 
     return timer() - start
+
+
+@benchmark
+@asyncio.coroutine
+def async_state_changed_helper(hass):
+    """Run state changes while the number of trackers grows."""
+    count = 0
+    events_per_round = 10**4
+    event = asyncio.Event(loop=hass.loop)
+    trackers = []
+
+    @core.callback
+    def listener(*args):
+        """Handle state changed event."""
+        nonlocal count
+        count += 1
+
+        if count == events_per_round:
+            event.set()
+
+    trackers.append(
+        async_track_state_change(hass, 'light.kitchen', listener))
+
+    start = timer()
+
+    for tracker_count in (1, 10, 100, 1000):
+        while len(trackers) < tracker_count:
+            trackers.append(async_track_state_change(
+                hass, 'light.other_{}'.format(len(trackers)), listener))
+
+        count = 0
+        event.clear()
+        round_start = timer()
+
+        for idx in range(events_per_round):
+            hass.states.async_set('light.kitchen', idx)
+
+        yield from event.wait()
+
+        print('{} trackers: {:.2f}us per state change'.format(
+            tracker_count,
+            (timer() - round_start) / events_per_round * 10**6))
+
+    for remove in trackers:
+        remove()
+
+    return timer() - start
+
+
+@benchmark
+@asyncio.coroutine
+def async_event_stream_fanout(hass):
+    """Encode state changes for a number of event stream subscribers."""
+    from homeassistant.remote import event_to_json
+
+    count = 0
+    subscribers = 15
+    events = 10**4
+    event = asyncio.Event(loop=hass.loop)
+    attributes = {'friendly_name': 'Kitchen', 'brightness': 100,
+                  'rgb_color': [255, 200, 100], 'supported_features': 63}
+
+    @core.callback
+    def listener(state_event):
+        """Encode the event like a subscriber would."""
+        nonlocal count
+        event_to_json(state_event)
+        count += 1
+
+        if count == events * subscribers:
+            event.set()
+
+    for _ in range(subscribers):
+        hass.bus.async_listen(EVENT_STATE_CHANGED, listener)
+
+    start = timer()
+
+    for idx in range(events):
+        hass.states.async_set('light.kitchen', idx, attributes)
+
+    yield from event.wait()
+
+    return timer() - start
+
+
+@benchmark
+@asyncio.coroutine
+def async_mqtt_message_router(hass):
+    """Route MQTT messages while the number of subscriptions grows."""
+    from homeassistant.components.mqtt import TopicRouter
+
+    messages_per_round = 10**4
+    router = TopicRouter(hass)
+
+    @core.callback
+    def listener(*args):
+        """Handle a received message."""
+        pass
+
+    router.async_add('home/kitchen/light/state', listener, 'utf-8')
+    subscriptions = 1
+
+    start = timer()
+
+    for subscription_count in (1, 10, 100, 1000):
+        while subscriptions < subscription_count:
+            router.async_add(
+                'home/room_{}/+/state'.format(subscriptions), listener,
+                'utf-8')
+            subscriptions += 1
+
+        round_start = timer()
+
+        for _ in range(messages_per_round):
+            router.async_route('home/kitchen/light/state', b'on', 0)
+
+        yield from asyncio.sleep(0, loop=hass.loop)
+
+        print('{} subscriptions: {:.0f} messages/s'.format(
+            subscription_count,
+            messages_per_round / (timer() - round_start)))
+
+    return timer() - start
+
+
+@benchmark
+@asyncio.coroutine
+def async_history_period(hass):
+    """Query a week of history from a generated database."""
+    from datetime import timedelta
+    import tempfile
+
+    from homeassistant import loader
+    from homeassistant.components import history, recorder
+    from homeassistant.components.recorder.models import (
+        RecorderRuns, States)
+    from homeassistant.setup import async_setup_component
+    import homeassistant.util.dt as dt_util
+
+    entities = 200
+    rows = 2 * 10**6
+    end = dt_util.utcnow()
+    start = end - timedelta(days=7)
+    step = (end - start) / (rows // entities)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hass.config.config_dir = tmpdir
+        loader.prepare(hass)
+        yield from async_setup_component(hass, recorder.DOMAIN, {
+            recorder.DOMAIN: {}})
+        instance = hass.data[recorder.DATA_INSTANCE]
+
+        def generate_rows():
+            """Insert the generated states."""
+            instance.engine.execute(RecorderRuns.__table__.insert(), {
+                'start': start - timedelta(days=1), 'end': end,
+                'created': start - timedelta(days=1)})
+
+            for idx in range(0, rows, 10**5):
+                instance.engine.execute(States.__table__.insert(), [{
+                    'domain': 'sensor',
+                    'entity_id': 'sensor.benchmark_{}'.format(
+                        row % entities),
+                    'state': str(row % 100),
+                    'attributes': '{"unit_of_measurement": "W", '
+                                  '"friendly_name": "Benchmark"}',
+                    'last_changed': start + step * (row // entities),
+                    'last_updated': start + step * (row // entities),
+                    'created': start + step * (row // entities),
+                } for row in range(idx, idx + 10**5)])
+
+        yield from hass.async_add_job(generate_rows)
+
+        queries = (
+            ('significant states', history.get_significant_states, {}),
+            ('state values', history.get_significant_state_values, {}),
+            ('state values 5m', history.get_significant_state_values,
+             {'resolution': timedelta(minutes=5)}),
+        )
+
+        total = 0
+
+        for name, query, kwargs in queries:
+            query_start = timer()
+            yield from hass.async_add_job(
+                partial(query, hass, start, end, **kwargs))
+            elapsed = timer() - query_start
+            total += elapsed
+            print('{} rows, {}: {:.2f}s'.format(rows, name, elapsed))
+
+    return total
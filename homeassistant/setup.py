@@ -15,13 +15,16 @@ import homeassistant.loader as loader
 import homeassistant.util.package as pkg_util
 from homeassistant.util.async import run_coroutine_threadsafe
 from homeassistant.const import (
-    EVENT_COMPONENT_LOADED, PLATFORM_FORMAT, CONSTRAINT_FILE)
+    EVENT_COMPONENT_LOADED, PLATFORM_FORMAT, CONSTRAINT_FILE,
+    DATA_SETUP_TIME)
 
 _LOGGER = logging.getLogger(__name__)
 
 ATTR_COMPONENT = 'component'
+ATTR_SETUP_TIME = 'setup_time'
 
 DATA_SETUP = 'setup_tasks'
+DATA_REQUIREMENTS = 'requirements_tasks'
 DATA_PIP_LOCK = 'pip_lock'
 
 SLOW_SETUP_WARNING = 10
@@ -61,6 +64,29 @@ def async_setup_component(hass: core.HomeAssistant, domain: str,
     return (yield from task)
 
 
+@asyncio.coroutine
+def async_process_component_requirements(hass: core.HomeAssistant,
+                                         domain: str, component) -> bool:
+    """Install the requirements of a component.
+
+    The installation is shared until the component is set up, so the
+    requirements can be installed before its dependencies are set up.
+
+    This method is a coroutine.
+    """
+    if hass.config.skip_pip or not hasattr(component, 'REQUIREMENTS'):
+        return True
+
+    requirements_tasks = hass.data.setdefault(DATA_REQUIREMENTS, {})
+
+    if domain not in requirements_tasks:
+        requirements_tasks[domain] = hass.async_add_job(
+            _async_process_requirements(
+                hass, domain, component.REQUIREMENTS))
+
+    return (yield from requirements_tasks[domain])
+
+
 @asyncio.coroutine
 def _async_process_requirements(hass: core.HomeAssistant, name: str,
                                 requirements) -> bool:
@@ -71,6 +97,19 @@ def _async_process_requirements(hass: core.HomeAssistant, name: str,
     if hass.config.skip_pip:
         return True
 
+    def find_missing():
+        """Return the requirements that are not installed."""
+        return [req for req in requirements
+                if not pkg_util.check_package_exists(
+                    req, hass.config.path('deps'))]
+
+    # Installed requirements are checked against the shared index of
+    # installed distributions, only installs have to wait for the lock
+    missing = yield from hass.async_add_job(find_missing)
+
+    if not missing:
+        return True
+
     pip_lock = hass.data.get(DATA_PIP_LOCK)
     if pip_lock is None:
         pip_lock = hass.data[DATA_PIP_LOCK] = asyncio.Lock(loop=hass.loop)
@@ -83,7 +122,7 @@ def _async_process_requirements(hass: core.HomeAssistant, name: str,
                 os.path.dirname(__file__), CONSTRAINT_FILE))
 
     with (yield from pip_lock):
-        for req in requirements:
+        for req in missing:
             ret = yield from hass.async_add_job(pip_install, req)
             if not ret:
                 _LOGGER.error("Not initializing %s because could not install "
@@ -159,12 +198,12 @@ def _async_setup_component(hass: core.HomeAssistant,
         log_error("Invalid config.")
         return False
 
-    if not hass.config.skip_pip and hasattr(component, 'REQUIREMENTS'):
-        req_success = yield from _async_process_requirements(
-            hass, domain, component.REQUIREMENTS)
-        if not req_success:
-            log_error("Could not install all requirements.")
-            return False
+    req_success = yield from async_process_component_requirements(
+        hass, domain, component)
+    hass.data.get(DATA_REQUIREMENTS, {}).pop(domain, None)
+    if not req_success:
+        log_error("Could not install all requirements.")
+        return False
 
     if hasattr(component, 'DEPENDENCIES'):
         dep_success = yield from _async_process_dependencies(
@@ -196,6 +235,7 @@ def _async_setup_component(hass: core.HomeAssistant,
         end = timer()
         warn_task.cancel()
     _LOGGER.info("Setup of domain %s took %.1f seconds.", domain, end - start)
+    hass.data.setdefault(DATA_SETUP_TIME, {})[domain] = end - start
 
     if result is False:
         log_error("Component failed to initialize.")
@@ -212,9 +252,10 @@ def _async_setup_component(hass: core.HomeAssistant,
     if domain in hass.data[DATA_SETUP]:
         hass.data[DATA_SETUP].pop(domain)
 
-    hass.bus.async_fire(
-        EVENT_COMPONENT_LOADED, {ATTR_COMPONENT: component.DOMAIN}
-    )
+    hass.bus.async_fire(EVENT_COMPONENT_LOADED, {
+        ATTR_COMPONENT: component.DOMAIN,
+        ATTR_SETUP_TIME: end - start,
+    })
 
     return True
 
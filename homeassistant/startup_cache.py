@@ -0,0 +1,132 @@
+"""
+Cache of the work that is repeated on every start.
+
+The parsed YAML configuration and the index of the available components
+are stored in a snapshot in the config directory, together with the state
+of every file, directory and environment variable they were read from. As
+long as none of them changed, the next start uses the snapshot instead of
+parsing the configuration and scanning the component packages again.
+"""
+import logging
+import os
+import pickle
+from timeit import default_timer as timer
+
+from homeassistant.const import __version__
+from homeassistant.util import yaml
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_FILE = '.startup_cache'
+
+# Increase when the format of the snapshot changes
+CACHE_VERSION = 1
+
+KEY_CONFIG = 'config'
+KEY_COMPONENTS = 'components'
+
+
+def load_config_file(config_path):
+    """Load a YAML configuration file, using the snapshot when valid.
+
+    This method needs to run in an executor.
+    """
+    # Prevent circular import
+    import homeassistant.config as conf_util
+
+    def load():
+        """Parse the configuration file and track what it was read from."""
+        with yaml.track_dependencies() as dependencies:
+            config = conf_util.load_yaml_config_file(config_path)
+
+        if not dependencies.cacheable:
+            return config, None
+
+        return config, (sorted(dependencies.paths), dependencies.env)
+
+    return cached(os.path.dirname(config_path), KEY_CONFIG, load)
+
+
+def cached(config_dir, key, load):
+    """Return the cached result of load or call it and cache its result.
+
+    load returns the result and its dependencies: a list of paths and a
+    dict of environment variables. Results without dependencies are not
+    cached.
+
+    This method needs to run in an executor.
+    """
+    path = os.path.join(config_dir, CACHE_FILE)
+    snapshot = _read_snapshot(path)
+    entry = snapshot.get(key)
+
+    if entry is not None and entry[0] == _signature(*entry[1]):
+        _LOGGER.debug("Using cached %s", key)
+        return entry[2]
+
+    start = timer()
+    result, dependencies = load()
+    _LOGGER.debug("Loaded %s in %.3fs", key, timer() - start)
+
+    if dependencies is None:
+        snapshot.pop(key, None)
+    else:
+        snapshot[key] = (_signature(*dependencies), dependencies, result)
+
+    _write_snapshot(path, snapshot)
+    return result
+
+
+def _signature(paths, env):
+    """Return the current state of the dependencies of a result."""
+    stats = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stats.append(None)
+        else:
+            stats.append((stat.st_mtime_ns, stat.st_size))
+
+    return stats, {name: os.environ.get(name) for name in env}
+
+
+def _read_snapshot(path):
+    """Read the snapshot, return an empty one when it can not be used."""
+    try:
+        with open(path, 'rb') as snapshot_file:
+            version, snapshot = pickle.load(snapshot_file)
+    except FileNotFoundError:
+        return {}
+    # Any error, as a corrupt pickle can raise nearly everything
+    except Exception:  # pylint: disable=broad-except
+        _LOGGER.warning("Unable to read the startup cache %s", path)
+        return {}
+
+    if version != (CACHE_VERSION, __version__):
+        return {}
+
+    return snapshot
+
+
+def _write_snapshot(path, snapshot):
+    """Write the snapshot, it can contain secrets so only the owner reads it.
+
+    The snapshot is written to a temporary file first, so an interrupted
+    write never leaves a partial snapshot behind.
+    """
+    temp_path = '{}.tmp'.format(path)
+
+    try:
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'wb') as snapshot_file:
+            pickle.dump(((CACHE_VERSION, __version__), snapshot),
+                        snapshot_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except (OSError, pickle.PicklingError) as err:
+        _LOGGER.warning("Unable to write the startup cache %s: %s", path, err)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
@@ -0,0 +1,85 @@
+"""Thread pool executors that keep track of how busy they are."""
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+from timeit import default_timer as timer
+
+
+class ExecutorPool(ThreadPoolExecutor):
+    """A named thread pool that records its saturation.
+
+    Besides running jobs, the pool counts how many jobs are running and
+    how long jobs waited in the queue before a worker picked them up.
+    """
+
+    def __init__(self, name, max_workers=None):
+        """Initialize the pool."""
+        kwargs = {}
+        if max_workers is None and sys.version_info[:2] < (3, 5):
+            max_workers = 10
+        if sys.version_info[:2] >= (3, 6):
+            kwargs['thread_name_prefix'] = 'SyncWorker_{}'.format(name)
+
+        super().__init__(max_workers, **kwargs)
+        self.name = name
+        self.submitted = 0
+        self.completed = 0
+        self.active = 0
+        self.max_active = 0
+        self.total_wait = 0
+        self.max_wait = 0
+        self._stats_lock = threading.Lock()
+
+    def resize(self, max_workers):
+        """Change the maximum number of workers.
+
+        Workers are started on demand, a smaller size does not stop the
+        workers that are already running.
+        """
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        self._max_workers = max_workers
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit a job and record when it starts and finishes."""
+        scheduled = timer()
+
+        def run_job():
+            """Run the job and track the busy workers."""
+            wait = timer() - scheduled
+
+            with self._stats_lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        with self._stats_lock:
+            self.submitted += 1
+
+        return super().submit(run_job)
+
+    def stats(self):
+        """Return a dict with the saturation of the pool."""
+        with self._stats_lock:
+            started = self.completed + self.active
+
+            return {
+                'max_workers': self._max_workers,
+                'workers': len(self._threads),
+                'active': self.active,
+                'max_active': self.max_active,
+                'queued': self._work_queue.qsize(),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'mean_wait': self.total_wait / started if started else 0,
+                'max_wait': self.max_wait,
+            }
@@ -6,7 +6,7 @@ import threading
 from subprocess import Popen, PIPE
 from urllib.parse import urlparse
 
-from typing import Optional
+from typing import Dict, List, Optional
 
 import pkg_resources
 
@@ -14,6 +14,10 @@ _LOGGER = logging.getLogger(__name__)
 
 INSTALL_LOCK = threading.Lock()
 
+# Installed distributions by project key, per lib dir (None is global)
+_INSTALLED = {}  # type: Dict[Optional[str], Dict[str, List]]
+_INSTALLED_LOCK = threading.Lock()
+
 
 def install_package(package: str, upgrade: bool=True,
                     target: Optional[str]=None,
@@ -39,6 +43,7 @@ def install_package(package: str, upgrade: bool=True,
 
         process = Popen(args, stdin=PIPE, stdout=PIPE, stderr=PIPE)
         _, stderr = process.communicate()
+        clear_installed_cache()
         if process.returncode != 0:
             _LOGGER.error("Unable to install package %s: %s",
                           package, stderr.decode('utf-8').lstrip().strip())
@@ -62,9 +67,40 @@ def check_package_exists(package: str, lib_dir: str) -> bool:
     # Check packages from lib dir
     if lib_dir is not None:
         if any(dist in req for dist in
-               pkg_resources.find_distributions(lib_dir)):
+               _installed_distributions(lib_dir).get(req.key, ())):
             return True
 
     # Check packages from global + virtual environment
-    # pylint: disable=not-an-iterable
-    return any(dist in req for dist in pkg_resources.working_set)
+    return any(dist in req for dist in
+               _installed_distributions(None).get(req.key, ()))
+
+
+def clear_installed_cache() -> None:
+    """Forget the installed distributions, so they are scanned again."""
+    with _INSTALLED_LOCK:
+        _INSTALLED.clear()
+
+
+def _installed_distributions(lib_dir: Optional[str]) -> Dict[str, List]:
+    """Return the distributions in lib_dir or globally by project key.
+
+    The distributions are scanned once and reused for every requirement
+    check until a package is installed.
+    """
+    with _INSTALLED_LOCK:
+        installed = _INSTALLED.get(lib_dir)
+
+        if installed is not None:
+            return installed
+
+        if lib_dir is None:
+            # pylint: disable=not-an-iterable
+            dists = pkg_resources.working_set
+        else:
+            dists = pkg_resources.find_distributions(lib_dir)
+
+        installed = _INSTALLED[lib_dir] = {}
+        for dist in dists:
+            installed.setdefault(dist.key, []).append(dist)
+
+        return installed
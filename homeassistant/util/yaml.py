@@ -3,7 +3,9 @@ import logging
 import os
 import sys
 import fnmatch
+import threading
 from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Union, List, Dict
 
 import yaml
@@ -20,6 +22,45 @@ _SECRET_YAML = 'secrets.yaml'
 __SECRET_CACHE = {}  # type: Dict
 
 
+class Dependencies(object):
+    """Files, directories and environment variables a YAML load read."""
+
+    def __init__(self):
+        """Initialize the dependencies."""
+        self.paths = set()
+        self.env = {}
+        self.cacheable = True
+
+
+class _LoadLocal(threading.local):
+    """Hold the Dependencies of the load that runs in the current thread."""
+
+    dependencies = None
+
+
+_LOAD = _LoadLocal()
+
+
+@contextmanager
+def track_dependencies():
+    """Record the dependencies of the YAML loaded in this context.
+
+    Yields a Dependencies object. Results that depend on the keyring are
+    marked as not cacheable.
+    """
+    dependencies = _LOAD.dependencies = Dependencies()
+    try:
+        yield dependencies
+    finally:
+        _LOAD.dependencies = None
+
+
+def _track_path(path: str) -> None:
+    """Record that a file or the listing of a directory was read."""
+    if _LOAD.dependencies is not None:
+        _LOAD.dependencies.paths.add(os.path.abspath(path))
+
+
 class NodeListClass(list):
     """Wrapper class to be able to add attributes on a list."""
 
@@ -58,6 +99,7 @@ class SafeLineLoader(yaml.SafeLoader):
 
 def load_yaml(fname: str) -> Union[List, Dict]:
     """Load a YAML file."""
+    _track_path(fname)
     try:
         with open(fname, encoding='utf-8') as conf_file:
             # If configuration file is empty YAML returns None
@@ -103,7 +145,9 @@ def _is_file_valid(name: str) -> bool:
 
 def _find_files(directory: str, pattern: str):
     """Recursively load files in a directory."""
+    _track_path(directory)
     for root, dirs, files in os.walk(directory, topdown=True):
+        _track_path(root)
         dirs[:] = [d for d in dirs if _is_file_valid(d)]
         for basename in files:
             if _is_file_valid(basename) and fnmatch.fnmatch(basename, pattern):
@@ -200,6 +244,8 @@ def _construct_seq(loader: SafeLineLoader, node: yaml.nodes.Node):
 def _env_var_yaml(loader: SafeLineLoader,
                   node: yaml.nodes.Node):
     """Load environment variables and embed it into the configuration YAML."""
+    if _LOAD.dependencies is not None:
+        _LOAD.dependencies.env[node.value] = os.environ.get(node.value)
     if node.value in os.environ:
         return os.environ[node.value]
     else:
@@ -210,6 +256,8 @@ def _env_var_yaml(loader: SafeLineLoader,
 def _load_secret_yaml(secret_path: str) -> Dict:
     """Load the secrets yaml from path."""
     secret_path = os.path.join(secret_path, _SECRET_YAML)
+    # Also tracked when missing, as adding it can change the result
+    _track_path(secret_path)
     if secret_path in __SECRET_CACHE:
         return __SECRET_CACHE[secret_path]
 
@@ -252,6 +300,8 @@ def _secret_yaml(loader: SafeLineLoader,
 
     if keyring:
         # do some keyring stuff
+        if _LOAD.dependencies is not None:
+            _LOAD.dependencies.cacheable = False
         pwd = keyring.get_password(_SECRET_NAMESPACE, node.value)
         if pwd:
             _LOGGER.debug("Secret %s retrieved from keyring", node.value)
@@ -3,10 +3,13 @@ from datetime import timedelta
 import unittest
 from unittest.mock import patch
 
+import voluptuous as vol
+
 from homeassistant.core import callback
 from homeassistant.setup import setup_component
 import homeassistant.util.dt as dt_util
 import homeassistant.components.automation as automation
+from homeassistant.components.automation import time
 
 from tests.common import (
     fire_time_changed, get_test_home_assistant, assert_setup_component,
@@ -224,6 +227,13 @@ class TestAutomationTime(unittest.TestCase):
         self.hass.block_till_done()
         self.assertEqual(0, len(self.calls))
 
+    def test_if_not_working_with_values_out_of_range(self):
+        """Test for failure if a value can never match."""
+        for key, value in (('hours', 24), ('minutes', 75), ('seconds', 60),
+                           ('seconds', '/two')):
+            with self.assertRaises(vol.Invalid):
+                time.TRIGGER_SCHEMA({'platform': 'time', key: value})
+
     def test_if_not_fires_using_wrong_at(self):
         """YAML translates time values to total seconds.
 
@@ -1,14 +1,16 @@
 """The tests for the camera component."""
 import asyncio
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from homeassistant.setup import setup_component
+from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.const import ATTR_ENTITY_PICTURE
 import homeassistant.components.camera as camera
 import homeassistant.components.http as http
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_values import EntityValues
 from homeassistant.util.async import run_coroutine_threadsafe
 
 from tests.common import (
@@ -105,3 +107,113 @@ class TestGetImage(object):
                 self.hass, 'camera.demo_camera'), self.hass.loop).result()
 
         assert len(aioclient_mock.mock_calls) == 1
+
+
+class MockCamera(camera.Camera):
+    """Camera that returns a list of images and counts the fetches."""
+
+    frame_interval = 0.01
+
+    def __init__(self, hass, images):
+        """Initialize the camera."""
+        super().__init__()
+        self.hass = hass
+        self.entity_id = 'camera.mock'
+        self.images = images
+        self.fetches = 0
+
+    @asyncio.coroutine
+    def async_camera_image(self):
+        """Return the next image."""
+        self.fetches += 1
+        yield from asyncio.sleep(0, loop=self.hass.loop)
+        return self.images[min(self.fetches, len(self.images)) - 1]
+
+
+@asyncio.coroutine
+def test_frame_broker_streams(hass):
+    """Test that all subscribers receive the frames of a single fetch."""
+    cam = MockCamera(hass, [b'one', b'one', b'two', None])
+    broker = cam.frame_broker
+
+    @asyncio.coroutine
+    def viewer():
+        """Return the frames of a stream until it ends."""
+        frames = []
+        sequence = broker.async_subscribe()
+        while True:
+            frame, sequence = yield from broker.async_next_frame(sequence)
+            frames.append(frame)
+            if frame is None:
+                return frames
+
+    frames = yield from asyncio.wait_for(asyncio.gather(
+        viewer(), viewer(), loop=hass.loop), 5, loop=hass.loop)
+
+    assert frames == [[b'one', b'two', None]] * 2
+    assert cam.fetches == 4
+
+    broker.async_unsubscribe()
+    assert broker.subscribers == 1
+    broker.async_unsubscribe()
+    assert broker._task is None
+
+    fetches = cam.fetches
+    yield from asyncio.sleep(0.05, loop=hass.loop)
+    assert cam.fetches == fetches
+
+
+@asyncio.coroutine
+def test_frame_broker_shares_fetch(hass):
+    """Test that concurrent requests for a frame share one fetch."""
+    cam = MockCamera(hass, [b'one', b'two'])
+    broker = cam.frame_broker
+
+    frames = yield from asyncio.gather(
+        broker.async_get_frame(), broker.async_get_frame(), loop=hass.loop)
+    assert frames == [b'one', b'one']
+    assert cam.fetches == 1
+
+    frame = yield from broker.async_get_frame()
+    assert frame == b'two'
+    assert broker.sequence == 2
+
+
+@asyncio.coroutine
+def test_get_frame_uses_broker(hass):
+    """Test that frames of local cameras are not fetched over the API."""
+    cam = MockCamera(hass, [b'one', None])
+    hass.data[camera.DOMAIN] = MagicMock(entities={cam.entity_id: cam})
+    hass.states.async_set(cam.entity_id, 'idle')
+
+    image = yield from camera.async_get_frame(hass, cam.entity_id)
+    assert image == b'one'
+
+    with pytest.raises(HomeAssistantError):
+        yield from camera.async_get_frame(hass, cam.entity_id)
+
+    # The entity is gone even though the camera object is still around
+    hass.states.async_remove(cam.entity_id)
+    with pytest.raises(HomeAssistantError):
+        yield from camera.async_get_frame(hass, cam.entity_id)
+    assert cam.fetches == 2
+
+
+def test_frame_interval_customize(hass):
+    """Test that the frame interval can be customized per camera."""
+    cam = camera.Camera()
+    cam.hass = hass
+    cam.entity_id = 'camera.front'
+    assert cam.frame_interval == camera.DEFAULT_FRAME_INTERVAL
+
+    hass.data[DATA_CUSTOMIZE] = EntityValues(
+        {'camera.front': {'frame_interval': '0.2'},
+         'camera.back': {'frame_interval': 0}},
+        {'camera': {'frame_interval': 2}})
+    assert cam.frame_interval == 0.2
+
+    cam.entity_id = 'camera.side'
+    assert cam.frame_interval == 2
+
+    cam.entity_id = 'camera.back'
+    assert cam.frame_interval == camera.DEFAULT_FRAME_INTERVAL
@@ -0,0 +1,168 @@
+"""The tests for the static file handling of the HTTP component."""
+# pylint: disable=protected-access
+import asyncio
+import gzip
+import os
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.setup import async_setup_component
+from homeassistant.components.http import static
+from homeassistant.components.http.const import KEY_STATIC_CACHE
+
+CONTENT = b'function test() { return "home assistant"; }\n' * 50
+
+
+@pytest.fixture
+def mock_static_client(hass, test_client, tmpdir):
+    """Start the HTTP component with a static folder and file."""
+    tmpdir.join('app.js').write_binary(CONTENT)
+    tmpdir.join('logo.png').write_binary(b'\x89PNG' * 100)
+
+    hass.loop.run_until_complete(async_setup_component(hass, 'http', {}))
+    hass.http.register_static_path('/assets', str(tmpdir))
+    hass.http.register_static_path(
+        '/single.js', str(tmpdir.join('app.js')))
+
+    return hass.loop.run_until_complete(test_client(hass.http.app))
+
+
+@asyncio.coroutine
+def test_serve_identity(mock_static_client):
+    """Test that a client without compression gets the file as is."""
+    resp = yield from mock_static_client.get(
+        '/assets/app.js', headers={'Accept-Encoding': 'identity'})
+
+    assert resp.status == 200
+    assert 'Content-Encoding' not in resp.headers
+    assert resp.headers['Vary'] == 'Accept-Encoding'
+    assert resp.headers['Cache-Control'] == 'public, max-age=2678400'
+    assert resp.headers['Content-Type'].endswith('/javascript')
+    assert (yield from resp.read()) == CONTENT
+
+
+@asyncio.coroutine
+def test_serve_gzip(mock_static_client):
+    """Test that the gzip variant is served when it is accepted."""
+    resp = yield from mock_static_client.get(
+        '/assets/app.js', headers={'Accept-Encoding': 'br;q=0, gzip'})
+
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['ETag'].endswith('-gzip"')
+    assert (yield from resp.read()) == CONTENT
+
+
+@asyncio.coroutine
+def test_precompressed_variant(mock_static_client, tmpdir):
+    """Test that a variant built at install time is used."""
+    tmpdir.join('app.js.gz').write_binary(gzip.compress(b'prebuilt'))
+
+    resp = yield from mock_static_client.get(
+        '/single.js', headers={'Accept-Encoding': 'gzip'})
+
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert (yield from resp.read()) == b'prebuilt'
+
+
+@asyncio.coroutine
+def test_not_compressible(mock_static_client):
+    """Test that images are not compressed."""
+    resp = yield from mock_static_client.get(
+        '/assets/logo.png', headers={'Accept-Encoding': 'gzip'})
+
+    assert resp.status == 200
+    assert 'Content-Encoding' not in resp.headers
+    assert (yield from resp.read()) == b'\x89PNG' * 100
+
+
+@asyncio.coroutine
+def test_if_none_match(mock_static_client):
+    """Test that a matching ETag returns not modified."""
+    resp = yield from mock_static_client.get(
+        '/assets/app.js', headers={'Accept-Encoding': 'gzip'})
+    etag = resp.headers['ETag']
+    yield from resp.release()
+
+    resp = yield from mock_static_client.get(
+        '/assets/app.js', headers={
+            'Accept-Encoding': 'gzip',
+            'If-None-Match': '"other", W/{}'.format(etag),
+        })
+    assert resp.status == 304
+    assert resp.headers['ETag'] == etag
+    yield from resp.release()
+
+    # A different encoding is a different representation
+    resp = yield from mock_static_client.get(
+        '/assets/app.js', headers={
+            'Accept-Encoding': 'identity',
+            'If-None-Match': etag,
+        })
+    assert resp.status == 200
+    assert (yield from resp.read()) == CONTENT
+
+
+@asyncio.coroutine
+def test_cache_invalidated_on_change(hass, mock_static_client, tmpdir):
+    """Test that a changed file is read again."""
+    cache = hass.http.app[KEY_STATIC_CACHE]
+
+    resp = yield from mock_static_client.get('/assets/app.js')
+    assert (yield from resp.read()) == CONTENT
+    resp = yield from mock_static_client.get('/assets/app.js')
+    yield from resp.release()
+
+    assert len(cache) == 1
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+
+    path = tmpdir.join('app.js')
+    path.write_binary(b'changed')
+    mtime = os.stat(str(path)).st_mtime + 10
+    os.utime(str(path), (mtime, mtime))
+
+    resp = yield from mock_static_client.get('/assets/app.js')
+    assert (yield from resp.read()) == b'changed'
+    assert cache.stats['misses'] == 2
+
+
+@asyncio.coroutine
+def test_large_file_not_cached(hass, mock_static_client, tmpdir):
+    """Test that files above the limit are streamed from disk."""
+    tmpdir.join('large.js').write_binary(b'a' * 2048)
+
+    with patch.object(static, 'MAX_CACHED_FILE_SIZE', 1024):
+        resp = yield from mock_static_client.get('/assets/large.js')
+
+    assert resp.status == 200
+    assert (yield from resp.read()) == b'a' * 2048
+    assert len(hass.http.app[KEY_STATIC_CACHE]) == 0
+
+
+def test_asset_cache_evicts_least_recently_used():
+    """Test that the cache stays below its size."""
+    cache = static.StaticAssetCache(max_size=25)
+
+    for name in 'abc':
+        cache.put(name, static.StaticAsset(
+            (0, 10), name, 'text/plain', {'identity': b'x' * 10}))
+        cache.get('a', (0, 10))
+
+    assert cache.get('b', (0, 10)) is None
+    assert cache.get('a', (0, 10)) is not None
+    assert cache.get('c', (0, 10)) is not None
+    assert cache.size == 20
+    assert cache.stats['evictions'] == 1
+    assert cache.stats['assets'] == 2
+
+
+def test_accepted_encodings():
+    """Test the parsing of the Accept-Encoding header."""
+    assert static._accepted_encodings('gzip, deflate, br') == {
+        'gzip', 'deflate', 'br'}
+    assert static._accepted_encodings('gzip;q=0.5, br;q=0, *;q=x') == {
+        'gzip'}
+    assert static._accepted_encodings('') == set()
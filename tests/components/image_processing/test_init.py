@@ -4,7 +4,6 @@ from unittest.mock import patch, PropertyMock
 from homeassistant.core import callback
 from homeassistant.const import ATTR_ENTITY_PICTURE
 from homeassistant.setup import setup_component
-from homeassistant.exceptions import HomeAssistantError
 import homeassistant.components.http as http
 import homeassistant.components.image_processing as ip
 
@@ -94,9 +93,9 @@ class TestImageProcessing(object):
         assert state.state == '1'
         assert state.attributes['image'] == b'Test'
 
-    @patch('homeassistant.components.camera.async_get_image',
-           side_effect=HomeAssistantError())
-    def test_get_image_without_exists_camera(self, mock_image):
+    @patch('homeassistant.components.camera.demo.DemoCamera.camera_image',
+           autospec=True, return_value=b'Test')
+    def test_get_image_without_exists_camera(self, mock_camera):
         """Try to get image without exists camera."""
         self.hass.states.remove('camera.demo_camera')
 
@@ -105,7 +104,7 @@ class TestImageProcessing(object):
 
         state = self.hass.states.get('image_processing.test')
 
-        assert mock_image.called
+        assert not mock_camera.called
         assert state.state == '0'
 
 
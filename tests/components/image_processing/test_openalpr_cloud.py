@@ -3,7 +3,6 @@ import asyncio
 from unittest.mock import patch, PropertyMock
 
 from homeassistant.core import callback
-from homeassistant.const import ATTR_ENTITY_PICTURE
 from homeassistant.setup import setup_component
 import homeassistant.components.image_processing as ip
 from homeassistant.components.image_processing.openalpr_cloud import (
@@ -131,11 +130,6 @@ class TestOpenAlprCloud(object):
                    new_callable=PropertyMock(return_value=False)):
             setup_component(self.hass, ip.DOMAIN, config)
 
-        state = self.hass.states.get('camera.demo_camera')
-        self.url = "{0}{1}".format(
-            self.hass.config.api.base_url,
-            state.attributes.get(ATTR_ENTITY_PICTURE))
-
         self.alpr_events = []
 
         @callback
@@ -157,9 +151,10 @@ class TestOpenAlprCloud(object):
         """Stop everything that was started."""
         self.hass.stop()
 
-    def test_openalpr_process_image(self, aioclient_mock):
+    @patch('homeassistant.components.camera.demo.DemoCamera.camera_image',
+           autospec=True, return_value=b'image')
+    def test_openalpr_process_image(self, mock_camera, aioclient_mock):
         """Setup and scan a picture and test plates from event."""
-        aioclient_mock.get(self.url, content=b'image')
         aioclient_mock.post(
             OPENALPR_API_URL, params=self.params,
             text=load_fixture('alpr_cloud.json'), status=200
@@ -170,7 +165,8 @@ class TestOpenAlprCloud(object):
 
         state = self.hass.states.get('image_processing.test_local')
 
-        assert len(aioclient_mock.mock_calls) == 2
+        assert mock_camera.called
+        assert len(aioclient_mock.mock_calls) == 1
         assert len(self.alpr_events) == 5
         assert state.attributes.get('vehicles') == 1
         assert state.state == 'H786P0J'
@@ -183,9 +179,11 @@ class TestOpenAlprCloud(object):
         assert event_data[0]['entity_id'] == \
             'image_processing.test_local'
 
-    def test_openalpr_process_image_api_error(self, aioclient_mock):
+    @patch('homeassistant.components.camera.demo.DemoCamera.camera_image',
+           autospec=True, return_value=b'image')
+    def test_openalpr_process_image_api_error(self, mock_camera,
+                                              aioclient_mock):
         """Setup and scan a picture and test api error."""
-        aioclient_mock.get(self.url, content=b'image')
         aioclient_mock.post(
             OPENALPR_API_URL, params=self.params,
             text="{'error': 'error message'}", status=400
@@ -194,12 +192,15 @@ class TestOpenAlprCloud(object):
         ip.scan(self.hass, entity_id='image_processing.test_local')
         self.hass.block_till_done()
 
-        assert len(aioclient_mock.mock_calls) == 2
+        assert mock_camera.called
+        assert len(aioclient_mock.mock_calls) == 1
         assert len(self.alpr_events) == 0
 
-    def test_openalpr_process_image_api_timeout(self, aioclient_mock):
+    @patch('homeassistant.components.camera.demo.DemoCamera.camera_image',
+           autospec=True, return_value=b'image')
+    def test_openalpr_process_image_api_timeout(self, mock_camera,
+                                                aioclient_mock):
         """Setup and scan a picture and test api error."""
-        aioclient_mock.get(self.url, content=b'image')
         aioclient_mock.post(
             OPENALPR_API_URL, params=self.params,
             exc=asyncio.TimeoutError()
@@ -208,5 +209,6 @@ class TestOpenAlprCloud(object):
         ip.scan(self.hass, entity_id='image_processing.test_local')
         self.hass.block_till_done()
 
-        assert len(aioclient_mock.mock_calls) == 2
+        assert mock_camera.called
+        assert len(aioclient_mock.mock_calls) == 1
         assert len(self.alpr_events) == 0
@@ -1,4 +1,5 @@
 """The tests for the MQTT component."""
+# pylint: disable=protected-access
 import asyncio
 from collections import namedtuple, OrderedDict
 import unittest
@@ -321,6 +322,60 @@ class TestMQTT(unittest.TestCase):
                 "topic: test-topic, Payload: 154",
                 test_handle.output[0])
 
+    def test_subscribe_topic_multiple_subscribers(self):
+        """Test that a message reaches every matching subscription."""
+        unsub_exact = mqtt.subscribe(
+            self.hass, 'test-topic/bier/on', self.record_calls)
+        unsub_level = mqtt.subscribe(
+            self.hass, 'test-topic/+/on', self.record_calls)
+        mqtt.subscribe(self.hass, 'test-topic/#', self.record_calls)
+        mqtt.subscribe(self.hass, 'test-topic/+', self.record_calls)
+
+        fire_mqtt_message(self.hass, 'test-topic/bier/on', 'test-payload')
+        self.hass.block_till_done()
+        self.assertEqual(3, len(self.calls))
+
+        unsub_exact()
+        unsub_level()
+
+        fire_mqtt_message(self.hass, 'test-topic/bier/on', 'test-payload')
+        self.hass.block_till_done()
+        self.assertEqual(4, len(self.calls))
+
+    def test_subscribe_decodes_payload_once_per_encoding(self):
+        """Test that the payload is decoded once for each encoding."""
+        mqtt.subscribe(self.hass, 'test-topic', self.record_calls)
+        mqtt.subscribe(self.hass, 'test-topic', self.record_calls)
+        mqtt.subscribe(self.hass, 'test-topic', self.record_calls, 0, None)
+
+        payload = mock.MagicMock()
+        payload.decode.return_value = 'test-payload'
+        fire_mqtt_message(self.hass, 'test-topic', payload)
+        self.hass.block_till_done()
+
+        self.assertEqual(3, len(self.calls))
+        self.assertEqual(1, payload.decode.call_count)
+        payloads = [call[1] for call in self.calls]
+        self.assertEqual(2, payloads.count('test-payload'))
+        self.assertIn(payload, payloads)
+
+    def test_topic_router_prunes_removed_subscriptions(self):
+        """Test that removing subscriptions cleans up the topic trie."""
+        router = mqtt.TopicRouter(self.hass)
+        remove = router.async_add('a/b/c', self.record_calls, 'utf-8')
+        remove_wildcard = router.async_add('a/#', self.record_calls, None)
+
+        self.assertEqual(2, len(router.match('a/b/c')))
+        self.assertEqual(1, len(router.match('a')))
+        self.assertEqual(0, len(router.match('b')))
+
+        remove()
+        self.assertEqual(1, len(router.match('a/b/c')))
+        self.assertNotIn('b', router._root.children['a'].children)
+
+        remove_wildcard()
+        self.assertEqual({}, router._root.children)
+
 
 class TestMQTTCallbacks(unittest.TestCase):
     """Test the MQTT callbacks."""
@@ -188,6 +188,31 @@ def test_saving_state_include_domain_exclude_entity(hass_recorder):
     assert hass.states.get('test.ok').state == 'state2'
 
 
+def test_saving_events_in_batch(hass_recorder):
+    """Test that events are committed together in one batch."""
+    hass = hass_recorder({'commit_max_events': 3})
+    instance = hass.data[DATA_INSTANCE]
+    # Only commit once the batch is full
+    instance.commit_interval = 600
+
+    hass.states.set('test.recorder', 'on')
+    hass.bus.fire('test_event')
+    hass.states.set('test.recorder', 'off')
+    hass.block_till_done()
+    instance.block_till_done()
+
+    assert instance.last_batch_size == 3
+    assert instance.pending_events == 0
+    assert instance.queue_depth == 0
+
+    with session_scope(hass=hass) as session:
+        db_states = list(session.query(States))
+        assert len(db_states) == 2
+        assert all(state.event_id is not None for state in db_states)
+        assert session.query(Events).filter_by(
+            event_type='test_event').count() == 1
+
+
 def test_recorder_setup_failure():
     """Test some exceptions."""
     hass = get_test_home_assistant()
@@ -2,12 +2,17 @@
 import json
 from datetime import datetime, timedelta
 import unittest
+from unittest.mock import patch
 
+import homeassistant.core as ha
 from homeassistant.components import recorder
 from homeassistant.components.recorder.const import DATA_INSTANCE
-from homeassistant.components.recorder.purge import purge_old_data
-from homeassistant.components.recorder.models import States, Events
+from homeassistant.components.recorder.purge import (
+    PurgeJob, purge_old_data)
+from homeassistant.components.recorder.models import (
+    States, Events, Statistics)
 from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
 from tests.common import get_test_home_assistant, init_recorder_component
 
 
@@ -107,3 +112,88 @@ class TestRecorderPurge(unittest.TestCase):
 
             # now we should only have 3 events left
             self.assertEqual(events.count(), 3)
+
+    def test_purge_keeps_statistics(self):
+        """Test that the statistics are kept when purging states."""
+        self.hass.states.set('sensor.power', 10)
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+        with session_scope(hass=self.hass) as session:
+            states = session.query(States)
+            statistics = session.query(Statistics)
+            self.assertEqual(states.count(), 1)
+            self.assertEqual(statistics.count(), 2)
+
+            with patch('homeassistant.components.recorder.purge.dt_util.'
+                       'utcnow',
+                       return_value=dt_util.utcnow() + timedelta(days=10)):
+                purge_old_data(self.hass.data[DATA_INSTANCE], 4)
+
+            self.assertEqual(states.count(), 0)
+            self.assertEqual(statistics.count(), 2)
+
+    def test_purge_in_chunks(self):
+        """Test that the purge job deletes the old rows in chunks."""
+        self._add_test_states()
+        self._add_test_events()
+        instance = self.hass.data[DATA_INSTANCE]
+        job = PurgeJob(4)
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_CHUNK_SIZE', 2):
+            chunks = 1
+            while not job.run_chunk(instance):
+                chunks += 1
+
+        self.assertEqual(job.deleted_states, 3)
+        self.assertEqual(job.deleted_events, 2)
+        # 2 state chunks, 1 event chunk, an empty chunk for both and vacuum
+        self.assertEqual(chunks, 6)
+
+        with session_scope(hass=self.hass) as session:
+            self.assertEqual(session.query(States).count(), 2)
+            self.assertEqual(session.query(Events).filter(
+                Events.event_type.like("EVENT_TEST%")).count(), 3)
+
+    def test_recorder_requeues_purge(self):
+        """Test that the recorder processes a purge job between events."""
+        self._add_test_states()
+        instance = self.hass.data[DATA_INSTANCE]
+        instance.commit_interval = 0.2
+        calls = []
+        run_chunk = PurgeJob.run_chunk
+        commit_pending = instance._commit_pending
+
+        def mock_run_chunk(job, instance):
+            """Record the events that are pending during a chunk."""
+            calls.append(('chunk', len(instance._pending)))
+            return run_chunk(job, instance)
+
+        def mock_commit_pending():
+            """Record the number of committed events."""
+            if instance._pending:
+                calls.append(('commit', len(instance._pending)))
+            commit_pending()
+
+        with patch('homeassistant.components.recorder.purge.'
+                   'PURGE_CHUNK_SIZE', 1), \
+                patch.object(PurgeJob, 'run_chunk', mock_run_chunk), \
+                patch.object(instance, '_commit_pending',
+                             mock_commit_pending):
+            for _ in range(2):
+                instance.queue.put(ha.Event('EVENT_TEST_PURGE'))
+            instance.queue.put(PurgeJob(4))
+            instance.block_till_done()
+
+        self.assertIsNone(instance.purge_job)
+
+        # The events are recorded between the chunks and are committed
+        # together at the commit interval, not before every chunk
+        chunks = [pending for call, pending in calls if call == 'chunk']
+        self.assertEqual(calls.count(('commit', 2)), 1)
+        self.assertEqual(len(chunks), 6)
+        self.assertIn(2, chunks)
+
+        with session_scope(hass=self.hass) as session:
+            self.assertEqual(session.query(States).count(), 2)
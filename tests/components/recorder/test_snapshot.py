@@ -0,0 +1,94 @@
+"""The tests for the recorder state snapshot."""
+from datetime import timedelta
+import unittest
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import LastStates
+from homeassistant.components.recorder.snapshot import get_snapshot_states
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+
+class TestRecorderSnapshot(unittest.TestCase):
+    """Test the snapshot of the last recorded states."""
+
+    def setUp(self):  # pylint: disable=invalid-name
+        """Setup things to be run when tests are started."""
+        self.hass = get_test_home_assistant()
+        init_recorder_component(self.hass)
+        self.hass.start()
+        self.instance = self.hass.data[DATA_INSTANCE]
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """Stop everything that was started."""
+        self.hass.stop()
+
+    def _wait_recording_done(self):
+        """Block till recording is done."""
+        self.hass.block_till_done()
+        self.instance.block_till_done()
+
+    def _snapshot(self):
+        """Return the snapshot rows as dicts."""
+        with session_scope(hass=self.hass) as session:
+            return {row.entity_id: (row.state, row.run_id)
+                    for row in session.query(LastStates)}
+
+    def test_write_interval(self):
+        """Test that changed states are written once the interval passed."""
+        self.hass.states.set('light.kitchen', 'on')
+        self._wait_recording_done()
+        assert self._snapshot() == {}
+        assert 'light.kitchen' in self.instance.snapshot.pending
+
+        self.instance.snapshot.interval = 0
+        self.hass.states.set('light.kitchen', 'off')
+        self.hass.states.set('switch.fan', 'on')
+        self._wait_recording_done()
+
+        run_id = self.instance.run_info.run_id
+        assert self._snapshot() == {
+            'light.kitchen': ('off', run_id),
+            'switch.fan': ('on', run_id),
+        }
+        assert self.instance.snapshot.pending == {}
+
+    def test_final_write_removes_old_runs(self):
+        """Test that the final write drops entities of older runs."""
+        with session_scope(hass=self.hass) as session:
+            session.add(LastStates(entity_id='light.old', run_id=-1,
+                                   state='on', attributes='{}'))
+
+        self.hass.states.set('light.kitchen', 'on')
+        self._wait_recording_done()
+        self.instance.snapshot.write(self.instance, final=True)
+
+        assert self._snapshot() == {
+            'light.kitchen': ('on', self.instance.run_info.run_id)}
+
+    def test_get_snapshot_states(self):
+        """Test that later states complete the snapshot."""
+        run = self.instance.run_info
+        assert get_snapshot_states(self.hass, run, dt_util.utcnow()) is None
+
+        self.instance.snapshot.interval = 0
+        self.hass.states.set('light.kitchen', 'on')
+        self.hass.states.set('switch.fan', 'on')
+        self._wait_recording_done()
+
+        # Recorded after the last write, like after a crash
+        self.instance.snapshot.interval = 3600
+        self.instance.snapshot.write(self.instance, final=True)
+        self.hass.states.set('light.kitchen', 'off', {'brightness': 10})
+        self._wait_recording_done()
+
+        states = get_snapshot_states(
+            self.hass, run, dt_util.utcnow() + timedelta(seconds=1))
+        states = {state.entity_id: state for state in states}
+
+        assert states['light.kitchen'].state == 'off'
+        assert states['light.kitchen'].attributes == {'brightness': 10}
+        assert states['switch.fan'].state == 'on'
+        assert self.hass.states.get('switch.fan') == states['switch.fan']
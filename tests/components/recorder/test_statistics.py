@@ -0,0 +1,106 @@
+"""The tests for the recorder statistics."""
+from datetime import datetime, timedelta
+import unittest
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import (
+    States, Statistics, process_timestamp)
+from homeassistant.components.recorder.statistics import (
+    PERIOD_DAY, PERIOD_HOUR, compile_statistics, period_start)
+from homeassistant.components.recorder.util import session_scope
+import homeassistant.util.dt as dt_util
+
+from tests.common import get_test_home_assistant, init_recorder_component
+
+
+class TestRecorderStatistics(unittest.TestCase):
+    """Test the statistics rollups of the recorder."""
+
+    def setUp(self):  # pylint: disable=invalid-name
+        """Setup things to be run when tests are started."""
+        self.hass = get_test_home_assistant()
+        init_recorder_component(self.hass)
+        self.hass.start()
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """Stop everything that was started."""
+        self.hass.stop()
+
+    def _statistics(self, period):
+        """Return the statistics of a period as dicts."""
+        with session_scope(hass=self.hass) as session:
+            return [{
+                'entity_id': row.entity_id,
+                'start': process_timestamp(row.start),
+                'min': row.min,
+                'mean': row.mean,
+                'max': row.max,
+                'last': row.last,
+                'count': row.count,
+            } for row in session.query(Statistics).filter(
+                Statistics.period == period).order_by(Statistics.entity_id)]
+
+    def test_compile_recorded_states(self):
+        """Test that numeric sensor states are rolled up when recorded."""
+        for state in ('10', '20', 'unknown'):
+            self.hass.states.set('sensor.power', state)
+        self.hass.states.set('light.kitchen', '5')
+
+        self.hass.block_till_done()
+        self.hass.data[DATA_INSTANCE].block_till_done()
+
+        now = dt_util.utcnow()
+
+        for period in (PERIOD_HOUR, PERIOD_DAY):
+            assert self._statistics(period) == [{
+                'entity_id': 'sensor.power',
+                'start': period_start(period, now),
+                'min': 10,
+                'mean': 15,
+                'max': 20,
+                'last': 20,
+                'count': 2,
+            }]
+
+    def test_merge_batches(self):
+        """Test that the rollups of later batches are merged."""
+        instance = self.hass.data[DATA_INSTANCE]
+        hour = datetime(2017, 6, 1, 12, tzinfo=dt_util.UTC)
+
+        def states(*values):
+            """Return unsaved sensor states recorded at the given minutes."""
+            return [States(domain='sensor', entity_id='sensor.temperature',
+                           state=str(value),
+                           last_updated=hour + timedelta(minutes=minute))
+                    for minute, value in values]
+
+        compile_statistics(instance, states((0, 20), (10, 24)))
+        compile_statistics(instance, states((20, 18), (70, 30)))
+
+        assert self._statistics(PERIOD_HOUR) == [{
+            'entity_id': 'sensor.temperature',
+            'start': hour,
+            'min': 18,
+            'mean': 62 / 3,
+            'max': 24,
+            'last': 18,
+            'count': 3,
+        }, {
+            'entity_id': 'sensor.temperature',
+            'start': hour + timedelta(hours=1),
+            'min': 30,
+            'mean': 30,
+            'max': 30,
+            'last': 30,
+            'count': 1,
+        }]
+
+        assert self._statistics(PERIOD_DAY) == [{
+            'entity_id': 'sensor.temperature',
+            'start': hour.replace(hour=0),
+            'min': 18,
+            'mean': 23,
+            'max': 30,
+            'last': 30,
+            'count': 4,
+        }]
@@ -136,6 +136,73 @@ class TestHistoryStatsSensor(unittest.TestCase):
         self.assertEqual(sensor3.state, 2)
         self.assertEqual(sensor4.state, 50)
 
+    def test_measure_numeric(self):
+        """Test the min, mean and max of a numeric entity."""
+        start = Template('{{ as_timestamp(now()) - 3600 }}', self.hass)
+        week_start = Template('{{ as_timestamp(now()) - 7 * 86400 }}',
+                              self.hass)
+        end = Template('{{ now() }}', self.hass)
+
+        fake_values = {
+            'sensor.power': [
+                {'state': '10'}, {'state': 'unknown'}, {'state': '30'},
+            ]
+        }
+        fake_statistics = {
+            'sensor.power': [
+                {'count': 3, 'min': 5, 'mean': 10, 'max': 20},
+                {'count': 1, 'min': 50, 'mean': 50, 'max': 50},
+            ]
+        }
+
+        sensor1 = HistoryStatsSensor(
+            self.hass, 'sensor.power', None, start, end, None, 'mean', 'Test')
+        sensor2 = HistoryStatsSensor(
+            self.hass, 'sensor.power', None, week_start, end, None, 'mean',
+            'Test')
+        sensor3 = HistoryStatsSensor(
+            self.hass, 'sensor.power', None, week_start, end, None, 'max',
+            'Test')
+
+        with patch('homeassistant.components.history.'
+                   'get_significant_state_values', return_value=fake_values):
+            with patch('homeassistant.components.history.get_statistics',
+                       return_value=fake_statistics) as mock_statistics:
+                sensor1.update()
+                sensor2.update()
+                sensor3.update()
+
+        self.assertEqual(sensor1.state, 20)
+        self.assertEqual(sensor2.state, 20)
+        self.assertEqual(sensor3.state, 50)
+        self.assertEqual(mock_statistics.call_count, 2)
+
+    def test_numeric_without_state(self):
+        """Test that the state is only optional for numeric types."""
+        self.init_recorder()
+        config = {
+            'history': {
+            },
+            'sensor': [{
+                'platform': 'history_stats',
+                'entity_id': 'sensor.power',
+                'name': 'Mean',
+                'type': 'mean',
+                'start': '{{ now() }}',
+                'duration': '01:00',
+            }, {
+                'platform': 'history_stats',
+                'entity_id': 'binary_sensor.test_id',
+                'name': 'Time',
+                'start': '{{ now() }}',
+                'duration': '01:00',
+            }]
+        }
+
+        setup_component(self.hass, 'sensor', config)
+        self.assertIsNotNone(self.hass.states.get('sensor.mean'))
+        self.assertIsNone(self.hass.states.get('sensor.time'))
+
     def test_wrong_date(self):
         """Test when start or end value is not a timestamp or a date."""
         good = Template('{{ now() }}', self.hass)
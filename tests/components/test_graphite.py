@@ -7,9 +7,8 @@ from unittest.mock import patch
 from homeassistant.setup import setup_component
 import homeassistant.core as ha
 import homeassistant.components.graphite as graphite
-from homeassistant.const import (
-    EVENT_STATE_CHANGED, EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP,
-    STATE_ON, STATE_OFF)
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_ON, STATE_OFF
+from homeassistant.const import DATA_EXPORTERS
 from tests.common import get_test_home_assistant
 
 
@@ -50,7 +49,7 @@ class TestGraphite(unittest.TestCase):
         self.assertTrue(setup_component(self.hass, graphite.DOMAIN, config))
         self.assertEqual(mock_gf.call_count, 1)
         self.assertEqual(
-            mock_gf.call_args, mock.call(self.hass, 'foo', 123, 'me')
+            mock_gf.call_args[0][:4], (self.hass, 'foo', 123, 'me')
         )
         self.assertEqual(mock_socket.call_count, 1)
         self.assertEqual(
@@ -80,39 +79,28 @@ class TestGraphite(unittest.TestCase):
     def test_subscribe(self):
         """Test the subscription."""
         fake_hass = mock.MagicMock()
-        gf = graphite.GraphiteFeeder(fake_hass, 'foo', 123, 'ha')
-        fake_hass.bus.listen_once.has_calls([
-            mock.call(EVENT_HOMEASSISTANT_START, gf.start_listen),
-            mock.call(EVENT_HOMEASSISTANT_STOP, gf.shutdown),
-        ])
+        with patch('homeassistant.components.graphite.setup_exporter'):
+            gf = graphite.GraphiteFeeder(fake_hass, 'foo', 123, 'ha')
         self.assertEqual(fake_hass.bus.listen.call_count, 1)
         self.assertEqual(
             fake_hass.bus.listen.call_args,
             mock.call(EVENT_STATE_CHANGED, gf.event_listener)
         )
 
-    def test_start(self):
-        """Test the start."""
-        with mock.patch.object(self.gf, 'start') as mock_start:
-            self.gf.start_listen('event')
-            self.assertEqual(mock_start.call_count, 1)
-            self.assertEqual(mock_start.call_args, mock.call())
-
-    def test_shutdown(self):
-        """Test the shutdown."""
-        with mock.patch.object(self.gf, '_queue') as mock_queue:
-            self.gf.shutdown('event')
-            self.assertEqual(mock_queue.put.call_count, 1)
+    @patch('time.time')
+    def test_event_listener(self, mock_time):
+        """Test the event listener queues one item per line."""
+        mock_time.return_value = 12345
+        state = ha.State('domain.entity', STATE_ON, {'foo': 1.0})
+        with mock.patch.object(self.gf, '_exporter') as mock_exporter:
+            self.gf.event_listener(mock.MagicMock(
+                data={'entity_id': 'entity', 'new_state': state}))
+            self.gf.event_listener(mock.MagicMock(
+                data={'entity_id': 'entity', 'new_state': None}))
             self.assertEqual(
-                mock_queue.put.call_args, mock.call(self.gf._quit_object)
-            )
-
-    def test_event_listener(self):
-        """Test the event listener."""
-        with mock.patch.object(self.gf, '_queue') as mock_queue:
-            self.gf.event_listener('foo')
-            self.assertEqual(mock_queue.put.call_count, 1)
-            self.assertEqual(mock_queue.put.call_args, mock.call('foo'))
+                sorted(mock_exporter.put.call_args_list),
+                [mock.call('ha.entity.foo 1.000000 12345'),
+                 mock.call('ha.entity.state 1.000000 12345')])
 
     @patch('time.time')
     def test_report_attributes(self, mock_time):
@@ -132,10 +120,8 @@ class TestGraphite(unittest.TestCase):
             ]
 
         state = mock.MagicMock(state=0, attributes=attrs)
-        with mock.patch.object(self.gf, '_send_to_graphite') as mock_send:
-            self.gf._report_attributes('entity', state)
-            actual = mock_send.call_args_list[0][0][0].split('\n')
-            self.assertEqual(sorted(expected), sorted(actual))
+        actual = self.gf._report_attributes('entity', state)
+        self.assertEqual(sorted(expected), sorted(actual))
 
     @patch('time.time')
     def test_report_with_string_state(self, mock_time):
@@ -147,46 +133,30 @@ class TestGraphite(unittest.TestCase):
             ]
 
         state = mock.MagicMock(state='above_horizon', attributes={'foo': 1.0})
-        with mock.patch.object(self.gf, '_send_to_graphite') as mock_send:
-            self.gf._report_attributes('entity', state)
-            actual = mock_send.call_args_list[0][0][0].split('\n')
-            self.assertEqual(sorted(expected), sorted(actual))
+        actual = self.gf._report_attributes('entity', state)
+        self.assertEqual(sorted(expected), sorted(actual))
 
     @patch('time.time')
     def test_report_with_binary_state(self, mock_time):
         """Test the reporting with binary state."""
         mock_time.return_value = 12345
         state = ha.State('domain.entity', STATE_ON, {'foo': 1.0})
-        with mock.patch.object(self.gf, '_send_to_graphite') as mock_send:
-            self.gf._report_attributes('entity', state)
-            expected = ['ha.entity.foo 1.000000 12345',
-                        'ha.entity.state 1.000000 12345']
-            actual = mock_send.call_args_list[0][0][0].split('\n')
-            self.assertEqual(sorted(expected), sorted(actual))
+        expected = ['ha.entity.foo 1.000000 12345',
+                    'ha.entity.state 1.000000 12345']
+        actual = self.gf._report_attributes('entity', state)
+        self.assertEqual(sorted(expected), sorted(actual))
 
         state.state = STATE_OFF
-        with mock.patch.object(self.gf, '_send_to_graphite') as mock_send:
-            self.gf._report_attributes('entity', state)
-            expected = ['ha.entity.foo 1.000000 12345',
-                        'ha.entity.state 0.000000 12345']
-            actual = mock_send.call_args_list[0][0][0].split('\n')
-            self.assertEqual(sorted(expected), sorted(actual))
-
-    @patch('time.time')
-    def test_send_to_graphite_errors(self, mock_time):
-        """Test the sending with errors."""
-        mock_time.return_value = 12345
-        state = ha.State('domain.entity', STATE_ON, {'foo': 1.0})
-        with mock.patch.object(self.gf, '_send_to_graphite') as mock_send:
-            mock_send.side_effect = socket.error
-            self.gf._report_attributes('entity', state)
-            mock_send.side_effect = socket.gaierror
-            self.gf._report_attributes('entity', state)
+        expected = ['ha.entity.foo 1.000000 12345',
+                    'ha.entity.state 0.000000 12345']
+        actual = self.gf._report_attributes('entity', state)
+        self.assertEqual(sorted(expected), sorted(actual))
 
     @patch('socket.socket')
     def test_send_to_graphite(self, mock_socket):
-        """Test the sending of data."""
-        self.gf._send_to_graphite('foo')
+        """Test that the connection is reused between batches."""
+        self.gf._send_to_graphite(['foo', 'bar'])
+        self.gf._send_to_graphite(['baz'])
         self.assertEqual(mock_socket.call_count, 1)
         self.assertEqual(
             mock_socket.call_args,
@@ -195,51 +165,48 @@ class TestGraphite(unittest.TestCase):
         sock = mock_socket.return_value
         self.assertEqual(sock.connect.call_count, 1)
         self.assertEqual(sock.connect.call_args, mock.call(('foo', 123)))
+        self.assertEqual(sock.sendall.call_args_list, [
+            mock.call('foo\nbar\n'.encode('ascii')),
+            mock.call('baz\n'.encode('ascii')),
+        ])
+        self.assertFalse(sock.close.called)
+
+    @patch('socket.socket')
+    def test_send_to_graphite_errors(self, mock_socket):
+        """Test that the connection is reopened after an error."""
+        sock = mock_socket.return_value
+        sock.sendall.side_effect = socket.error
+        with self.assertRaises(socket.error):
+            self.gf._send_to_graphite(['foo'])
+        self.assertEqual(sock.close.call_count, 1)
+
+        sock.sendall.side_effect = None
+        self.gf._send_to_graphite(['foo'])
+        self.assertEqual(mock_socket.call_count, 2)
+
+        self.gf._close()
+        mock_socket.reset_mock()
+        sock.connect.side_effect = socket.gaierror
+        with self.assertRaises(socket.gaierror):
+            self.gf._send_to_graphite(['foo'])
+        self.assertEqual(sock.close.call_count, 1)
+
+    @patch('time.time')
+    @patch('socket.socket')
+    def test_export(self, mock_socket, mock_time):
+        """Test that queued lines are sent in one batch."""
+        mock_time.return_value = 12345
+        self.gf.event_listener(mock.MagicMock(data={
+            'entity_id': 'entity',
+            'new_state': ha.State('domain.entity', '1', {})}))
+        self.gf.event_listener(mock.MagicMock(data={
+            'entity_id': 'other',
+            'new_state': ha.State('domain.other', '2', {})}))
+        self.hass.data[DATA_EXPORTERS][graphite.DOMAIN].flush()
+
+        sock = mock_socket.return_value
         self.assertEqual(sock.sendall.call_count, 1)
         self.assertEqual(
-            sock.sendall.call_args, mock.call('foo'.encode('ascii'))
-        )
-        self.assertEqual(sock.send.call_count, 1)
-        self.assertEqual(sock.send.call_args, mock.call('\n'.encode('ascii')))
-        self.assertEqual(sock.close.call_count, 1)
-        self.assertEqual(sock.close.call_args, mock.call())
-
-    def test_run_stops(self):
-        """Test the stops."""
-        with mock.patch.object(self.gf, '_queue') as mock_queue:
-            mock_queue.get.return_value = self.gf._quit_object
-            self.assertEqual(None, self.gf.run())
-            self.assertEqual(mock_queue.get.call_count, 1)
-            self.assertEqual(mock_queue.get.call_args, mock.call())
-            self.assertEqual(mock_queue.task_done.call_count, 1)
-            self.assertEqual(mock_queue.task_done.call_args, mock.call())
-
-    def test_run(self):
-        """Test the running."""
-        runs = []
-        event = mock.MagicMock(event_type=EVENT_STATE_CHANGED,
-                               data={'entity_id': 'entity',
-                                     'new_state': mock.MagicMock()})
-
-        def fake_get():
-            if len(runs) >= 2:
-                return self.gf._quit_object
-            elif runs:
-                runs.append(1)
-                return mock.MagicMock(event_type='somethingelse',
-                                      data={'new_event': None})
-            else:
-                runs.append(1)
-                return event
-
-        with mock.patch.object(self.gf, '_queue') as mock_queue:
-            with mock.patch.object(self.gf, '_report_attributes') as mock_r:
-                mock_queue.get.side_effect = fake_get
-                self.gf.run()
-                # Twice for two events, once for the stop
-                self.assertEqual(3, mock_queue.task_done.call_count)
-                self.assertEqual(mock_r.call_count, 1)
-                self.assertEqual(
-                    mock_r.call_args,
-                    mock.call('entity', event.data['new_state'])
-                )
+            sock.sendall.call_args,
+            mock.call('ha.entity.state 1.000000 12345\n'
+                      'ha.other.state 2.000000 12345\n'.encode('ascii')))
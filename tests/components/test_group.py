@@ -10,6 +10,7 @@ from homeassistant.const import (
     STATE_ON, STATE_OFF, STATE_HOME, STATE_UNKNOWN, ATTR_ICON, ATTR_HIDDEN,
     ATTR_ASSUMED_STATE, STATE_NOT_HOME)
 import homeassistant.components.group as group
+from homeassistant.helpers.event import DATA_STATE_CHANGE_INDEX
 
 from tests.common import get_test_home_assistant, assert_setup_component
 
@@ -337,7 +338,9 @@ class TestComponentsGroup(unittest.TestCase):
 
         assert sorted(self.hass.states.entity_ids()) == \
             ['group.empty_group', 'group.second_group', 'group.test_group']
-        assert self.hass.bus.listeners['state_changed'] == 3
+        assert self.hass.bus.listeners['state_changed'] == 1
+        assert sorted(self.hass.data[DATA_STATE_CHANGE_INDEX]) == \
+            ['hello.world', 'light.bowl', 'sensor.happy']
 
         with patch('homeassistant.config.load_yaml_config_file', return_value={
                 'group': {
@@ -351,6 +354,8 @@ class TestComponentsGroup(unittest.TestCase):
 
         assert self.hass.states.entity_ids() == ['group.hello']
         assert self.hass.bus.listeners['state_changed'] == 1
+        assert list(self.hass.data[DATA_STATE_CHANGE_INDEX]) == \
+            ['light.bowl']
 
     def test_stopping_a_group(self):
         """Test that a group correctly removes itself."""
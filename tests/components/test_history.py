@@ -1,13 +1,16 @@
 """The tests the History component."""
 # pylint: disable=protected-access,invalid-name
+import asyncio
 from datetime import timedelta
 import unittest
 from unittest.mock import patch, sentinel
+from urllib.parse import quote
 
-from homeassistant.setup import setup_component
+from homeassistant.setup import async_setup_component, setup_component
 import homeassistant.core as ha
 import homeassistant.util.dt as dt_util
 from homeassistant.components import history, recorder
+from homeassistant.components.recorder import statistics
 
 from tests.common import (
     init_recorder_component, mock_http_component, mock_state_change_event,
@@ -145,6 +148,111 @@ class TestComponentHistory(unittest.TestCase):
             self.hass, zero, four, filters=history.Filters())
         assert states == hist
 
+    def test_get_significant_state_values(self):
+        """Test that only the values of significant state changes return."""
+        zero, four, states = self.record_states()
+        expected = {
+            entity_id: [{'state': state.state,
+                         'last_changed': state.last_changed}
+                        for state in entity_states]
+            for entity_id, entity_states in states.items()}
+
+        # Attribute changes of the significant domains are returned too
+        for entity_id in ('thermostat.test', 'thermostat.test2'):
+            expected[entity_id] = [{
+                'state': state.state,
+                'attributes': dict(state.attributes),
+                'last_changed': state.last_changed,
+                'last_updated': state.last_updated,
+            } for state in states[entity_id]]
+
+        hist = history.get_significant_state_values(
+            self.hass, zero, four, filters=history.Filters())
+        assert expected == hist
+
+        hist = history.get_significant_state_values(
+            self.hass, zero, four, 'media_player.test')
+        assert {'media_player.test': expected['media_player.test']} == hist
+
+    def test_get_significant_state_values_resolution(self):
+        """Test that state values are downsampled into buckets."""
+        self.init_recorder()
+        entity_id = 'sensor.power'
+
+        def set_state(state):
+            """Set the state."""
+            self.hass.states.set(entity_id, state)
+            self.wait_recording_done()
+
+        zero = dt_util.utcnow()
+        one = zero + timedelta(seconds=1)
+        three = zero + timedelta(seconds=3)
+        five = zero + timedelta(seconds=5)
+
+        with patch('homeassistant.components.recorder.dt_util.utcnow',
+                   return_value=one):
+            set_state(1)
+            set_state('unknown')
+            set_state(3)
+
+        with patch('homeassistant.components.recorder.dt_util.utcnow',
+                   return_value=three):
+            set_state(10)
+            set_state('nan')
+
+        hist = history.get_significant_state_values(
+            self.hass, zero, five, resolution=timedelta(seconds=2))
+
+        assert hist == {entity_id: [
+            {'start': zero, 'state': '3', 'count': 3,
+             'min': 1, 'max': 3, 'mean': 2},
+            {'start': zero + timedelta(seconds=2), 'state': 'nan', 'count': 2,
+             'min': 10, 'max': 10, 'mean': 10},
+        ]}
+
+    def test_parse_resolution(self):
+        """Test parsing the resolution of a history request."""
+        assert history._parse_resolution('30s') == timedelta(seconds=30)
+        assert history._parse_resolution('5m') == timedelta(minutes=5)
+        assert history._parse_resolution('1h') == timedelta(hours=1)
+        assert history._parse_resolution('7d') == timedelta(days=7)
+        assert history._parse_resolution('0m') is None
+        assert history._parse_resolution('5 minutes') is None
+
+    def test_get_statistics(self):
+        """Test reading the long-term statistics."""
+        self.init_recorder()
+
+        for state in (10, 20, 60):
+            self.hass.states.set('sensor.power', state)
+        self.hass.states.set('sensor.temperature', 21)
+        self.wait_recording_done()
+
+        now = dt_util.utcnow()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+
+        hist = history.get_statistics(
+            self.hass, now - timedelta(hours=1), now + timedelta(hours=1),
+            'sensor.power')
+
+        assert hist == {'sensor.power': [
+            {'start': hour, 'count': 3, 'min': 10, 'mean': 30, 'max': 60,
+             'last': 60},
+        ]}
+
+        hist = history.get_statistics(
+            self.hass, now, period=statistics.PERIOD_DAY)
+
+        assert sorted(hist) == ['sensor.power', 'sensor.temperature']
+        assert hist['sensor.temperature'][0]['start'] == hour.replace(hour=0)
+
+        filters = history.Filters()
+        filters.excluded_entities = ['sensor.power']
+
+        hist = history.get_statistics(self.hass, now, filters=filters)
+
+        assert sorted(hist) == ['sensor.temperature']
+
     def test_get_significant_states_entity_id(self):
         """Test that only significant states are returned for one entity."""
         zero, four, states = self.record_states()
@@ -429,3 +537,43 @@ class TestComponentHistory(unittest.TestCase):
             set_state(therm, 22, attributes={'current_temperature': 21,
                                              'hidden': True})
         return zero, four, states
+
+
+@asyncio.coroutine
+def test_history_view_state_values(hass, test_client):
+    """Test requesting downsampled state values over HTTP."""
+    assert (yield from async_setup_component(hass, 'http', {}))
+    hass.config.components |= set(['frontend', 'recorder'])
+    with patch('homeassistant.components.history.register_built_in_panel'):
+        assert (yield from async_setup_component(
+            hass, history.DOMAIN, {history.DOMAIN: {}}))
+
+    start = dt_util.utcnow()
+    client = yield from test_client(hass.http.app)
+    calls = []
+
+    def mock_values(*args):
+        """Record the call and return a bucket."""
+        calls.append(args)
+        return {'sensor.power': [{
+            'start': start, 'state': '3', 'count': 2,
+            'min': 1.0, 'max': 3.0, 'mean': 2.0}]}
+
+    with patch('homeassistant.components.history.'
+               'get_significant_state_values', mock_values):
+        resp = yield from client.get(
+            '/api/history/period/{}?resolution=5m'.format(
+                quote(start.isoformat())))
+        assert resp.status == 200
+        assert (yield from resp.json()) == {'sensor.power': [{
+            'start': start.isoformat(), 'state': '3', 'count': 2,
+            'min': 1.0, 'max': 3.0, 'mean': 2.0}]}
+        assert calls[-1][1] == start
+        assert calls[-1][5] == timedelta(minutes=5)
+
+        resp = yield from client.get('/api/history/period?no_attributes')
+        assert resp.status == 200
+        assert calls[-1][5] is None
+
+    resp = yield from client.get('/api/history/period?resolution=5 minutes')
+    assert resp.status == 400
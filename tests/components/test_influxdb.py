@@ -8,6 +8,7 @@ import influxdb as influx_client
 from homeassistant.setup import setup_component
 import homeassistant.components.influxdb as influxdb
 from homeassistant.const import EVENT_STATE_CHANGED, STATE_OFF, STATE_ON
+from homeassistant.const import DATA_EXPORTERS
 
 from tests.common import get_test_home_assistant
 
@@ -106,6 +107,10 @@ class TestInfluxDB(unittest.TestCase):
         assert setup_component(self.hass, influxdb.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
 
+    def _flush(self):
+        """Wait until the queued points are written."""
+        self.hass.data[DATA_EXPORTERS][influxdb.DOMAIN].flush()
+
     def test_event_listener(self, mock_client):
         """Test the event listener."""
         self._setup()
@@ -179,6 +184,7 @@ class TestInfluxDB(unittest.TestCase):
                     },
                 }]
             self.handler_method(event)
+            self._flush()
             self.assertEqual(
                 mock_client.return_value.write_points.call_count, 1
             )
@@ -213,6 +219,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             self.assertEqual(
                 mock_client.return_value.write_points.call_count, 1
             )
@@ -233,6 +240,7 @@ class TestInfluxDB(unittest.TestCase):
         mock_client.return_value.write_points.side_effect = \
             influx_client.exceptions.InfluxDBClientError('foo')
         self.handler_method(event)
+        self._flush()
 
     def test_event_listener_states(self, mock_client):
         """Test the event listener against ignored states."""
@@ -255,6 +263,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             if state_state == 1:
                 self.assertEqual(
                     mock_client.return_value.write_points.call_count, 1
@@ -288,6 +297,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             if entity_id == 'ok':
                 self.assertEqual(
                     mock_client.return_value.write_points.call_count, 1
@@ -322,6 +332,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             if domain == 'ok':
                 self.assertEqual(
                     mock_client.return_value.write_points.call_count, 1
@@ -366,6 +377,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             if entity_id == 'included':
                 self.assertEqual(
                     mock_client.return_value.write_points.call_count, 1
@@ -411,6 +423,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             if domain == 'fake':
                 self.assertEqual(
                     mock_client.return_value.write_points.call_count, 1
@@ -476,6 +489,7 @@ class TestInfluxDB(unittest.TestCase):
                     },
                 }]
             self.handler_method(event)
+            self._flush()
             self.assertEqual(
                 mock_client.return_value.write_points.call_count, 1
             )
@@ -518,6 +532,7 @@ class TestInfluxDB(unittest.TestCase):
                 },
             }]
             self.handler_method(event)
+            self._flush()
             if entity_id == 'ok':
                 self.assertEqual(
                     mock_client.return_value.write_points.call_count, 1
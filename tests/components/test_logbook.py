@@ -1,18 +1,20 @@
 """The tests for the logbook component."""
 # pylint: disable=protected-access,invalid-name
+import asyncio
 import logging
 from datetime import timedelta
 import unittest
 from unittest.mock import patch
+from urllib.parse import quote
 
-from homeassistant.components import sun
+from homeassistant.components import recorder, sun
 import homeassistant.core as ha
 from homeassistant.const import (
     EVENT_STATE_CHANGED, EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP,
     ATTR_HIDDEN, STATE_NOT_HOME, STATE_ON, STATE_OFF)
 import homeassistant.util.dt as dt_util
 from homeassistant.components import logbook
-from homeassistant.setup import setup_component
+from homeassistant.setup import async_setup_component, setup_component
 
 from tests.common import (
     mock_http_component, init_recorder_component, get_test_home_assistant)
@@ -526,6 +528,111 @@ class TestComponentLogbook(unittest.TestCase):
             entries[0], name=name, message=message,
             domain='sun', entity_id=entity_id)
 
+    def test_get_events_filtered_in_sql(self):
+        """Test that only logbook events of included entities are loaded."""
+        start = dt_util.utcnow() - timedelta(minutes=1)
+
+        for entity_id in ('light.a', 'light.b', 'switch.c'):
+            self.hass.states.set(entity_id, STATE_ON)
+            self.hass.states.set(entity_id, STATE_OFF)
+        self.hass.bus.fire('some_other_event')
+        self.hass.block_till_done()
+        self.hass.data[recorder.DATA_INSTANCE].block_till_done()
+
+        config = logbook.CONFIG_SCHEMA({
+            ha.DOMAIN: {},
+            logbook.DOMAIN: {logbook.CONF_EXCLUDE: {
+                logbook.CONF_ENTITIES: ['light.b'],
+                logbook.CONF_DOMAINS: ['switch'], }}})[logbook.DOMAIN]
+        end = dt_util.utcnow() + timedelta(minutes=1)
+
+        events = list(logbook._get_events(self.hass, start, end, config))
+
+        # Small batches return the same events
+        with patch.object(logbook, 'QUERY_BATCH_SIZE', 1):
+            batched = list(logbook._get_events(self.hass, start, end, config))
+
+        self.assertEqual([event.time_fired for event in events],
+                         [event.time_fired for event in batched])
+        self.assertTrue(all(event.event_type in logbook.LOGBOOK_EVENTS
+                            for event in events))
+        self.assertEqual(
+            ['light.a', 'light.a'],
+            [event.data['entity_id'] for event in events
+             if event.event_type == EVENT_STATE_CHANGED])
+
+    def test_entity_filter_query_matches_exclude_events(self):
+        """Test that the SQL filter keeps the same events as Python."""
+        from homeassistant.components.recorder.models import States
+        from homeassistant.components.recorder.util import session_scope
+
+        entity_ids = ['light.a', 'light.b', 'switch.c', 'switch.d',
+                      'sensor.e']
+        with session_scope(hass=self.hass) as session:
+            for entity_id in entity_ids:
+                session.add(States(entity_id=entity_id,
+                                   domain=entity_id.split('.')[0]))
+
+        configs = [
+            {},
+            {logbook.CONF_EXCLUDE: {
+                logbook.CONF_ENTITIES: ['light.a'],
+                logbook.CONF_DOMAINS: ['switch']}},
+            {logbook.CONF_INCLUDE: {
+                logbook.CONF_ENTITIES: ['switch.c'],
+                logbook.CONF_DOMAINS: ['light']}},
+            {logbook.CONF_INCLUDE: {
+                logbook.CONF_ENTITIES: ['switch.c'],
+                logbook.CONF_DOMAINS: ['light', 'sensor']},
+             logbook.CONF_EXCLUDE: {
+                 logbook.CONF_ENTITIES: ['light.b'],
+                 logbook.CONF_DOMAINS: ['sensor']}},
+            {logbook.CONF_INCLUDE: {logbook.CONF_ENTITIES: ['sensor.e']}},
+        ]
+        point = dt_util.utcnow()
+
+        for config in configs:
+            config = logbook.CONFIG_SCHEMA({
+                ha.DOMAIN: {}, logbook.DOMAIN: config})[logbook.DOMAIN]
+            events = [self.create_state_changed_event(point, entity_id, 1)
+                      for entity_id in entity_ids]
+            expected = sorted(event.data['entity_id'] for event
+                              in logbook._exclude_events(events, config))
+
+            query = logbook._entity_filter_query(config, States)
+            with session_scope(hass=self.hass) as session:
+                rows = session.query(States.entity_id)
+                if query is not None:
+                    rows = rows.filter(query)
+                result = sorted(row.entity_id for row in rows)
+
+            self.assertEqual(expected, result)
+
+    def test_get_page(self):
+        """Test that pages end after the group that reached the limit."""
+        point_a = dt_util.utcnow().replace(minute=2)
+        point_b = point_a.replace(minute=20)
+        point_c = point_a.replace(minute=40)
+
+        events = [self.create_state_changed_event(point, entity_id, 'on')
+                  for point, entity_id in ((point_a, 'light.a'),
+                                           (point_a, 'light.b'),
+                                           (point_b, 'light.a'),
+                                           (point_c, 'light.a'))]
+        groups = logbook._humanify_groups(iter(events))
+
+        entries, cursor = logbook._get_page(groups, 1)
+        self.assertEqual(2, len(entries))
+        self.assertEqual(point_a, cursor)
+
+        entries, cursor = logbook._get_page(groups, 1)
+        self.assertEqual(1, len(entries))
+        self.assertEqual(point_b, cursor)
+
+        entries, cursor = logbook._get_page(groups, 5)
+        self.assertEqual(1, len(entries))
+        self.assertIsNone(cursor)
+
     def assert_entry(self, entry, when=None, name=None, message=None,
                      domain=None, entity_id=None):
         """Assert an entry is what is expected."""
@@ -559,3 +666,49 @@ class TestComponentLogbook(unittest.TestCase):
             'old_state': state,
             'new_state': state,
         }, time_fired=event_time_fired)
+
+
+@asyncio.coroutine
+def test_logbook_view(hass, test_client):
+    """Test streaming and paging the logbook over HTTP."""
+    assert (yield from async_setup_component(hass, 'http', {}))
+    hass.config.components |= set(['frontend', 'recorder'])
+    with patch('homeassistant.components.logbook.register_built_in_panel'):
+        assert (yield from async_setup_component(
+            hass, logbook.DOMAIN, {logbook.DOMAIN: {}}))
+
+    start = dt_util.utcnow().replace(minute=2)
+    events = [
+        ha.Event(EVENT_HOMEASSISTANT_START, time_fired=start),
+        ha.Event(logbook.EVENT_LOGBOOK_ENTRY, {
+            logbook.ATTR_NAME: 'Alarm',
+            logbook.ATTR_MESSAGE: 'is triggered',
+        }, time_fired=start.replace(minute=20)),
+    ]
+    client = yield from test_client(hass.http.app)
+
+    with patch('homeassistant.components.logbook._get_events',
+               side_effect=lambda *args: iter(events)) as mock_get:
+        end_time = quote((start + timedelta(hours=1)).isoformat())
+        resp = yield from client.get('/api/logbook/{}?end_time={}'.format(
+            start.isoformat(), end_time))
+        assert resp.status == 200
+        entries = yield from resp.json()
+        assert [entry['message'] for entry in entries] == \
+            ['started', 'is triggered']
+        assert mock_get.call_args[0][1:3] == \
+            (start, start + timedelta(hours=1))
+
+        resp = yield from client.get('/api/logbook?limit=1')
+        assert resp.status == 200
+        entries = yield from resp.json()
+        assert [entry['message'] for entry in entries] == ['started']
+        assert 'rel="next"' in resp.headers['Link']
+
+        next_url = resp.headers['Link'][1:resp.headers['Link'].index('>')]
+        yield from client.get(next_url)
+        assert mock_get.call_args[0][1] == start
+
+    for query in ('limit=0', 'limit=abc', 'cursor=abc', 'end_time=abc'):
+        resp = yield from client.get('/api/logbook?{}'.format(query))
+        assert resp.status == 400
@@ -0,0 +1,91 @@
+"""The tests for the performance component."""
+# pylint: disable=protected-access
+import asyncio
+from unittest.mock import patch
+
+from homeassistant.core import callback
+from homeassistant.setup import async_setup_component
+from homeassistant.components import performance
+
+
+@asyncio.coroutine
+def test_instrumentation(hass, test_client):
+    """Test that jobs are timed while instrumentation is enabled."""
+    assert (yield from async_setup_component(
+        hass, performance.DOMAIN, {performance.DOMAIN: {}}))
+    instrumentation = hass.data[performance.DATA_PERFORMANCE]
+    orig_async_add_job = hass.async_add_job
+    orig_async_run_job = hass.async_run_job
+
+    calls = []
+
+    @callback
+    def listener(event):
+        """Record the event."""
+        calls.append(event)
+
+    def executor_job():
+        """Record the executor call."""
+        calls.append(None)
+
+    hass.bus.async_listen('test_event', listener)
+
+    yield from hass.services.async_call(
+        performance.DOMAIN, performance.SERVICE_INSTRUMENT,
+        {performance.ATTR_ENABLED: True}, blocking=True)
+    assert instrumentation.enabled
+    assert hass.async_add_job is not orig_async_add_job
+
+    hass.bus.async_fire('test_event')
+    hass.bus.async_fire('test_event')
+    yield from hass.async_add_job(executor_job)
+    yield from hass.async_block_till_done()
+    assert len(calls) == 3
+
+    client = yield from test_client(hass.http.app)
+    resp = yield from client.get(performance.URL_API_PERFORMANCE)
+    assert resp.status == 200
+    report = yield from resp.json()
+
+    jobs = {job['name']: job for job in report['jobs']}
+    listener_name = '{}.{}'.format(__name__, listener.__qualname__)
+    executor_name = '{}.{}'.format(__name__, executor_job.__qualname__)
+    assert jobs[listener_name]['count'] == 2
+    assert jobs[executor_name]['count'] == 1
+    assert report['enabled']
+    assert performance.DOMAIN in report['setup_times']
+    executor = report['executors']['default']
+    assert executor['max_active'] >= 1
+    assert executor['active'] == 0
+    assert executor['completed'] == executor['submitted']
+
+    yield from hass.services.async_call(
+        performance.DOMAIN, performance.SERVICE_INSTRUMENT,
+        {performance.ATTR_ENABLED: False}, blocking=True)
+    assert not instrumentation.enabled
+    assert hass.async_add_job == orig_async_add_job
+    assert hass.async_run_job == orig_async_run_job
+
+    hass.bus.async_fire('test_event')
+    yield from hass.async_block_till_done()
+    assert len(calls) == 4
+    assert instrumentation.jobs[listener_name].count == 2
+
+
+@asyncio.coroutine
+def test_profile(hass):
+    """Test that the profile service writes a cProfile dump."""
+    assert (yield from async_setup_component(
+        hass, performance.DOMAIN, {performance.DOMAIN: {}}))
+
+    with patch('homeassistant.components.performance.cProfile.Profile') \
+            as mock_profile:
+        yield from hass.services.async_call(
+            performance.DOMAIN, performance.SERVICE_PROFILE,
+            {performance.ATTR_SECONDS: 0}, blocking=True)
+
+    profiler = mock_profile.return_value
+    assert profiler.enable.call_count == 1
+    assert profiler.disable.call_count == 1
+    assert profiler.dump_stats.call_count == 1
+    assert not hass.data[performance.DATA_PERFORMANCE].profiling
@@ -1,10 +1,12 @@
 """The tests for the Splunk component."""
+import json
 import unittest
 from unittest import mock
 
 from homeassistant.setup import setup_component
 import homeassistant.components.splunk as splunk
 from homeassistant.const import STATE_ON, STATE_OFF, EVENT_STATE_CHANGED
+from homeassistant.const import DATA_EXPORTERS
 
 from tests.common import get_test_home_assistant
 
@@ -55,9 +57,8 @@ class TestSplunk(unittest.TestCase):
 
     def _setup(self, mock_requests):
         """Test the setup."""
-        self.mock_post = mock_requests.post
-        self.mock_request_exception = Exception
-        mock_requests.exceptions.RequestException = self.mock_request_exception
+        self.mock_post = mock_requests.Session.return_value.post
+        self.mock_post.return_value.status_code = 200
         config = {
             'splunk': {
                 'host': 'host',
@@ -69,12 +70,11 @@ class TestSplunk(unittest.TestCase):
         self.hass.bus.listen = mock.MagicMock()
         setup_component(self.hass, splunk.DOMAIN, config)
         self.handler_method = self.hass.bus.listen.call_args_list[0][0][1]
+        self.exporter = self.hass.data[DATA_EXPORTERS][splunk.DOMAIN]
 
     @mock.patch.object(splunk, 'requests')
-    @mock.patch('json.dumps')
-    def test_event_listener(self, mock_dump, mock_requests):
+    def test_event_listener(self, mock_requests):
         """Test event listener."""
-        mock_dump.side_effect = lambda x: x
         self._setup(mock_requests)
 
         valid = {'1': 1,
@@ -103,13 +103,46 @@ class TestSplunk(unittest.TestCase):
             payload = {'host': 'http://host:8088/services/collector/event',
                        'event': body}
             self.handler_method(event)
+            self.exporter.flush()
             self.assertEqual(self.mock_post.call_count, 1)
+            args, kwargs = self.mock_post.call_args
+            self.assertEqual(args, (payload['host'],))
+            self.assertEqual(json.loads(kwargs.pop('data')), payload)
             self.assertEqual(
-                self.mock_post.call_args,
-                mock.call(
-                    payload['host'], data=payload,
-                    headers={'Authorization': 'Splunk secret'},
-                    timeout=10
-                )
+                kwargs,
+                {'headers': {'Authorization': 'Splunk secret'}, 'timeout': 10}
             )
             self.mock_post.reset_mock()
+
+    @mock.patch.object(splunk, 'requests')
+    def test_event_batch(self, mock_requests):
+        """Test that queued events are posted in one request."""
+        self._setup(mock_requests)
+
+        for value in ('1', '2'):
+            state = mock.MagicMock(state=value, domain='fake',
+                                   object_id='entity', attributes={})
+            self.handler_method(
+                mock.MagicMock(data={'new_state': state}, time_fired=12345))
+        self.exporter.flush()
+
+        self.assertEqual(self.mock_post.call_count, 1)
+        events = [json.loads(line)['event'][0]['value'] for line
+                  in self.mock_post.call_args[1]['data'].split('\n')]
+        self.assertEqual(events, [1, 2])
+
+    @mock.patch.object(splunk, 'requests')
+    def test_client_error_not_retried(self, mock_requests):
+        """Test that a rejected batch is dropped."""
+        self._setup(mock_requests)
+        self.mock_post.return_value.status_code = 400
+
+        state = mock.MagicMock(state='1', domain='fake', object_id='entity',
+                               attributes={})
+        self.handler_method(
+            mock.MagicMock(data={'new_state': state}, time_fired=12345))
+        self.exporter.flush()
+
+        self.assertEqual(self.mock_post.call_count, 1)
+        self.assertFalse(
+            self.mock_post.return_value.raise_for_status.called)
@@ -1,7 +1,9 @@
 """The tests for the TTS component."""
+from collections import Counter
 import ctypes
 import os
 import shutil
+import time
 from unittest.mock import patch, PropertyMock
 
 import pytest
@@ -14,6 +16,7 @@ from homeassistant.components.media_player import (
     SERVICE_PLAY_MEDIA, MEDIA_TYPE_MUSIC, ATTR_MEDIA_CONTENT_ID,
     ATTR_MEDIA_CONTENT_TYPE, DOMAIN as DOMAIN_MP)
 from homeassistant.setup import setup_component
+from homeassistant.util.async import run_coroutine_threadsafe
 
 from tests.common import (
     get_test_home_assistant, get_test_instance_port, assert_setup_component,
@@ -76,6 +79,19 @@ class TestTTS(object):
         assert not self.hass.services.has_service(tts.DOMAIN, 'demo_say')
         assert not self.hass.services.has_service(tts.DOMAIN, 'clear_cache')
 
+    def test_setup_component_without_cache_and_memory(self):
+        """Setup the demo platform without any place to keep speech."""
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+                'cache': False,
+                'memory_size': 0,
+            }
+        }
+
+        assert not setup_component(self.hass, tts.DOMAIN, config)
+        assert not self.hass.services.has_service(tts.DOMAIN, 'demo_say')
+
     def test_setup_component_and_test_service(self):
         """Setup the demo platform and call service."""
         calls = mock_service(self.hass, DOMAIN_MP, SERVICE_PLAY_MEDIA)
@@ -562,3 +578,118 @@ class TestTTS(object):
         req = requests.get(url)
         assert req.status_code == 200
         assert req.content == demo_data
+
+    def test_setup_component_and_test_prerender(self):
+        """Setup demo platform and prerender messages into the cache."""
+        calls = mock_service(self.hass, DOMAIN_MP, SERVICE_PLAY_MEDIA)
+
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+            }
+        }
+
+        with assert_setup_component(1, tts.DOMAIN):
+            setup_component(self.hass, tts.DOMAIN, config)
+
+        self.hass.services.call(tts.DOMAIN, 'demo_prerender', {
+            tts.ATTR_MESSAGES: ["I person is on front of your door.", "bla"],
+        }, blocking=True)
+        self.hass.block_till_done()
+
+        assert len(calls) == 0
+        assert os.path.isfile(os.path.join(
+            self.default_tts_cache,
+            "265944c108cbb00b2a621be5930513e03a0bb2cd_en_-_demo.mp3"))
+        assert self.hass.data[tts.DATA_TTS_CACHE_STATS]['entries'] == 2
+
+    def test_setup_component_load_cache_from_index(self):
+        """Setup component and load the file cache from the index."""
+        config = {
+            tts.DOMAIN: {
+                'platform': 'demo',
+                'cache': True,
+            }
+        }
+
+        with assert_setup_component(1, tts.DOMAIN):
+            setup_component(self.hass, tts.DOMAIN, config)
+
+        self.hass.services.call(tts.DOMAIN, 'demo_prerender', {
+            tts.ATTR_MESSAGES: "I person is on front of your door.",
+        })
+        self.hass.block_till_done()
+
+        key = "265944c108cbb00b2a621be5930513e03a0bb2cd_en_-_demo"
+        manager = tts.SpeechManager(self.hass)
+
+        with patch('os.listdir') as mock_listdir:
+            run_coroutine_threadsafe(manager.async_init_cache(
+                True, tts.DEFAULT_CACHE_DIR, 300), self.hass.loop).result()
+
+        assert not mock_listdir.called
+        assert manager.file_cache == {key: key + '.mp3'}
+
+        # Files that are not in the index are found after a new scan
+        with open(os.path.join(self.default_tts_cache,
+                               key.replace('_en_', '_de_') + '.mp3'),
+                  'wb'):
+            pass
+        os.utime(self.default_tts_cache, ns=(0, 0))
+        manager = tts.SpeechManager(self.hass)
+        run_coroutine_threadsafe(manager.async_init_cache(
+            True, tts.DEFAULT_CACHE_DIR, 300), self.hass.loop).result()
+
+        assert len(manager.file_cache) == 2
+
+
+def test_memory_cache():
+    """Test the size bound and expiry of the memory cache."""
+    stats = Counter()
+    cache = tts.MemoryCache(10, 300, stats)
+
+    def entry(data):
+        """Return a cache entry."""
+        return {tts.MEM_CACHE_FILENAME: 'file', tts.MEM_CACHE_VOICE: data}
+
+    cache.put('a', entry(b'1234'))
+    cache.put('b', entry(b'1234'))
+    assert cache.get('a') is not None
+    cache.put('c', entry(b'1234'))
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.size == 8
+    assert stats == Counter(hits=1, misses=1, evictions=1, entries=2,
+                            bytes=8)
+
+    # Larger than the whole cache
+    cache.put('d', entry(b'12345678901'))
+    assert 'd' not in cache
+
+    # Pinned entries stay until they are unpinned, even when too large
+    cache.pin('c')
+    cache.put('d', entry(b'12345678901'), pin=True)
+    assert 'a' not in cache
+    assert 'c' in cache
+    assert 'd' in cache
+    cache.unpin('d')
+    cache.put('e', entry(b'1'))
+    assert 'd' not in cache
+    assert cache.size == 5
+
+    cache.clear()
+    cache.put('a', entry(b'1234'))
+    cache.put('c', entry(b'1234'))
+
+    with patch('homeassistant.components.tts.time.monotonic',
+               return_value=time.monotonic() + 301):
+        assert cache.get('a') is None
+
+    assert stats['expired'] == 1
+    assert len(cache) == 1
+
+    cache.clear()
+    assert cache.size == 0
+    assert stats['entries'] == 0
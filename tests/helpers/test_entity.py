@@ -6,7 +6,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 import homeassistant.helpers.entity as entity
-from homeassistant.const import ATTR_HIDDEN, ATTR_DEVICE_CLASS
+from homeassistant.const import (
+    ATTR_HIDDEN, ATTR_DEVICE_CLASS, CONF_MIN_UPDATE_INTERVAL)
 from homeassistant.config import DATA_CUSTOMIZE
 from homeassistant.helpers.entity_values import EntityValues
 
@@ -191,3 +192,48 @@ def test_warn_slow_update_with_exception(hass):
         assert mock_call().cancel.called
 
         assert update_call
+
+
+@asyncio.coroutine
+def test_min_update_interval(hass):
+    """Test that state writes within min_update_interval are coalesced."""
+    now = 0
+
+    class PowerEntity(entity.Entity):
+        entity_id = 'sensor.power'
+        state = None
+
+    ent = PowerEntity()
+    ent.hass = hass
+    hass.data[DATA_CUSTOMIZE] = EntityValues(
+        {}, {'sensor': {CONF_MIN_UPDATE_INTERVAL: 5}})
+
+    with patch.object(hass.loop, 'time', side_effect=lambda: now):
+        for value in range(1, 5):
+            now = value - 1
+            ent.state = value
+            yield from ent.async_update_ha_state()
+
+        state = hass.states.get('sensor.power')
+        assert state.state == '1'
+        assert CONF_MIN_UPDATE_INTERVAL not in state.attributes
+        assert hass.data[entity.DATA_SUPPRESSED_UPDATES]['sensor.power'] == 2
+
+        now = 5
+        # Run the loop until the timer of the window is handled
+        yield from asyncio.sleep(0, loop=hass.loop)
+        yield from hass.async_block_till_done()
+        assert hass.states.get('sensor.power').state == '4'
+
+        # The next window starts at the coalesced write
+        now = 6
+        ent.state = 5
+        yield from ent.async_update_ha_state()
+        assert hass.states.get('sensor.power').state == '4'
+
+        now = 10
+        # Run the loop until the timer of the window is handled
+        yield from asyncio.sleep(0, loop=hass.loop)
+        yield from hass.async_block_till_done()
+        assert hass.states.get('sensor.power').state == '5'
+        assert hass.data[entity.DATA_SUPPRESSED_UPDATES]['sensor.power'] == 2
@@ -3,6 +3,7 @@
 import asyncio
 from collections import OrderedDict
 import logging
+import time
 import unittest
 from unittest.mock import patch, Mock, MagicMock
 from datetime import timedelta
@@ -367,7 +368,7 @@ class TestHelpersEntityComponent(unittest.TestCase):
             mock_setup.call_args[0]
 
     @patch('homeassistant.helpers.entity_component.'
-           'async_track_time_interval')
+           'async_track_point_in_utc_time')
     def test_set_scan_interval_via_config(self, mock_track):
         """Test the setting of the scan interval via configuration."""
         def platform_setup(hass, config, add_devices, discovery_info=None):
@@ -378,20 +379,22 @@ class TestHelpersEntityComponent(unittest.TestCase):
                              MockPlatform(platform_setup))
 
         component = EntityComponent(_LOGGER, DOMAIN, self.hass)
+        now = dt_util.utcnow()
 
-        component.setup({
-            DOMAIN: {
-                'platform': 'platform',
-                'scan_interval': timedelta(seconds=30),
-            }
-        })
+        with patch('homeassistant.util.dt.utcnow', return_value=now):
+            component.setup({
+                DOMAIN: {
+                    'platform': 'platform',
+                    'scan_interval': timedelta(seconds=30),
+                }
+            })
 
-        self.hass.block_till_done()
+            self.hass.block_till_done()
         assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        assert now + timedelta(seconds=30) == mock_track.call_args[0][2]
 
     @patch('homeassistant.helpers.entity_component.'
-           'async_track_time_interval')
+           'async_track_point_in_utc_time')
     def test_set_scan_interval_via_platform(self, mock_track):
         """Test the setting of the scan interval via platform."""
         def platform_setup(hass, config, add_devices, discovery_info=None):
@@ -404,16 +407,18 @@ class TestHelpersEntityComponent(unittest.TestCase):
         loader.set_component('test_domain.platform', platform)
 
         component = EntityComponent(_LOGGER, DOMAIN, self.hass)
+        now = dt_util.utcnow()
 
-        component.setup({
-            DOMAIN: {
-                'platform': 'platform',
-            }
-        })
+        with patch('homeassistant.util.dt.utcnow', return_value=now):
+            component.setup({
+                DOMAIN: {
+                    'platform': 'platform',
+                }
+            })
 
-        self.hass.block_till_done()
+            self.hass.block_till_done()
         assert mock_track.called
-        assert timedelta(seconds=30) == mock_track.call_args[0][2]
+        assert now + timedelta(seconds=30) == mock_track.call_args[0][2]
 
     def test_set_entity_namespace_via_config(self):
         """Test setting an entity namespace."""
@@ -578,3 +583,198 @@ def test_platform_not_ready(hass):
         yield from hass.async_block_till_done()
         assert len(platform1_setup.mock_calls) == 3
         assert 'test_domain.mod1' in hass.config.components
+
+
+@asyncio.coroutine
+def test_polling_is_staggered(hass):
+    """Test that the polls of a platform are spread over the interval."""
+    component = EntityComponent(
+        _LOGGER, DOMAIN, hass, timedelta(seconds=20))
+    entities = [EntityTest(should_poll=True) for _ in range(4)]
+    updates = []
+
+    for idx, ent in enumerate(entities):
+        ent.update = lambda idx=idx: updates.append(idx)
+
+    now = dt_util.utcnow()
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        yield from component.async_add_entities(entities)
+
+    for seconds, expected in ((4, []), (5, [0]), (10, [0, 1]),
+                              (20, [0, 1, 2, 3])):
+        async_fire_time_changed(hass, now + timedelta(seconds=seconds))
+        yield from hass.async_block_till_done()
+        assert updates == expected
+
+
+@asyncio.coroutine
+def test_polling_uses_one_timer(hass):
+    """Test that the polls of a platform share a single time listener."""
+    component = EntityComponent(
+        _LOGGER, DOMAIN, hass, timedelta(seconds=20))
+    entities = [EntityTest(should_poll=True) for _ in range(10)]
+    listeners = hass.bus.async_listeners().get(ha.EVENT_TIME_CHANGED, 0)
+    now = dt_util.utcnow()
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        yield from component.async_add_entities(entities)
+
+    assert hass.bus.async_listeners()[ha.EVENT_TIME_CHANGED] == listeners + 1
+
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    yield from hass.async_block_till_done()
+    assert hass.bus.async_listeners()[ha.EVENT_TIME_CHANGED] == listeners + 1
+
+    yield from component.async_reset()
+    assert hass.bus.async_listeners().get(
+        ha.EVENT_TIME_CHANGED, 0) == listeners
+
+
+@asyncio.coroutine
+def test_polling_backs_off_unavailable_entities(hass):
+    """Test that failing or unavailable entities are polled less often."""
+    component = EntityComponent(
+        _LOGGER, DOMAIN, hass, timedelta(seconds=10))
+    ent = EntityTest(should_poll=True, available=False)
+    ent.update = Mock()
+    now = dt_util.utcnow()
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        yield from component.async_add_entities([ent])
+
+    def poll_at(seconds):
+        """Fire the time and return the number of updates."""
+        with patch('homeassistant.util.dt.utcnow',
+                   return_value=now + timedelta(seconds=seconds)):
+            async_fire_time_changed(hass, now + timedelta(seconds=seconds))
+            yield from hass.async_block_till_done()
+        return ent.update.call_count
+
+    # Polls at 10, then 20 and 40 seconds later
+    assert (yield from poll_at(10)) == 1
+    assert (yield from poll_at(29)) == 1
+    assert (yield from poll_at(30)) == 2
+    assert (yield from poll_at(69)) == 2
+    assert (yield from poll_at(70)) == 3
+
+    # Recovered entities changed and are polled sooner once
+    ent._values['available'] = True
+    assert (yield from poll_at(150)) == 4
+    assert (yield from poll_at(155)) == 5
+    assert (yield from poll_at(164)) == 5
+
+    ent.update.side_effect = Exception('Fake error')
+    assert (yield from poll_at(165)) == 6
+    assert (yield from poll_at(184)) == 6
+    assert (yield from poll_at(185)) == 7
+
+
+@asyncio.coroutine
+def test_polling_faster_after_change(hass):
+    """Test that an entity is polled sooner after it changed."""
+    component = EntityComponent(
+        _LOGGER, DOMAIN, hass, timedelta(seconds=20))
+    ent = EntityTest(should_poll=True)
+    ent.update = Mock()
+    now = dt_util.utcnow()
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        yield from component.async_add_entities([ent])
+
+    def poll_at(seconds):
+        """Fire the time and return the number of updates."""
+        with patch('homeassistant.util.dt.utcnow',
+                   return_value=now + timedelta(seconds=seconds)):
+            async_fire_time_changed(hass, now + timedelta(seconds=seconds))
+            yield from hass.async_block_till_done()
+        return ent.update.call_count
+
+    assert (yield from poll_at(20)) == 1
+    ent._values['name'] = 'changed'
+    assert (yield from poll_at(40)) == 2
+    assert (yield from poll_at(49)) == 2
+    assert (yield from poll_at(50)) == 3
+    assert (yield from poll_at(69)) == 3
+    assert (yield from poll_at(70)) == 4
+
+
+@asyncio.coroutine
+def test_polling_parallel_updates(hass):
+    """Test that sync updates are limited by PARALLEL_UPDATES."""
+    active = []
+    max_active = []
+
+    def update():
+        """Record the number of running updates."""
+        active.append(None)
+        max_active.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+
+    def platform_setup(hass, config, add_devices, discovery_info=None):
+        """Test the platform setup."""
+        entities = [EntityTest(should_poll=True) for _ in range(4)]
+        for ent in entities:
+            ent.update = update
+        add_devices(entities)
+
+    platform = MockPlatform(platform_setup)
+    platform.PARALLEL_UPDATES = 2
+    loader.set_component('test_domain.platform', platform)
+
+    component = EntityComponent(_LOGGER, DOMAIN, hass)
+    now = dt_util.utcnow()
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        yield from component.async_setup({
+            DOMAIN: {
+                'platform': 'platform',
+            }
+        })
+        yield from hass.async_block_till_done()
+
+    async_fire_time_changed(hass, now + DEFAULT_SCAN_INTERVAL)
+    yield from hass.async_block_till_done()
+
+    assert len(max_active) == 4
+    assert max(max_active) == 2
+
+
+@asyncio.coroutine
+def test_poll_latency_histogram(hass):
+    """Test that the duration of updates is recorded per platform."""
+    component = EntityComponent(
+        _LOGGER, DOMAIN, hass, timedelta(seconds=20))
+    ent = EntityTest(should_poll=True)
+    ent.update = Mock()
+    now = dt_util.utcnow()
+
+    with patch('homeassistant.util.dt.utcnow', return_value=now):
+        yield from component.async_add_entities([ent])
+
+    async_fire_time_changed(hass, now + timedelta(seconds=20))
+    yield from hass.async_block_till_done()
+
+    histogram = hass.data[entity_component.DATA_POLL_LATENCY][DOMAIN]
+    report = histogram.as_dict()
+    assert report['count'] == 1
+    assert report['buckets']['+Inf'] == 1
+    assert report['buckets']['0.1'] == 1
+
+
+def test_latency_histogram_buckets():
+    """Test the cumulative buckets of the latency histogram."""
+    histogram = entity_component.LatencyHistogram()
+
+    for seconds in (0.05, 0.3, 0.3, 60):
+        histogram.add(seconds)
+
+    report = histogram.as_dict()
+    assert report['count'] == 4
+    assert report['max'] == 60
+    assert report['buckets']['0.1'] == 1
+    assert report['buckets']['0.25'] == 1
+    assert report['buckets']['0.5'] == 3
+    assert report['buckets']['30'] == 3
+    assert report['buckets']['+Inf'] == 4
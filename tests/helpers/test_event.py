@@ -8,7 +8,7 @@ from astral import Astral
 
 from homeassistant.setup import setup_component
 import homeassistant.core as ha
-from homeassistant.const import MATCH_ALL
+from homeassistant.const import EVENT_STATE_CHANGED, MATCH_ALL
 from homeassistant.helpers.event import (
     track_point_in_utc_time,
     track_point_in_time,
@@ -17,8 +17,11 @@ from homeassistant.helpers.event import (
     track_state_change,
     track_time_interval,
     track_template,
+    track_template_result,
     track_sunrise,
     track_sunset,
+    _next_time_match,
+    DATA_TIME_PATTERN_SCHEDULER,
 )
 from homeassistant.helpers.template import Template
 from homeassistant.components import sun
@@ -191,6 +194,38 @@ class TestEventHelpers(unittest.TestCase):
         self.assertEqual(5, len(wildcard_runs))
         self.assertEqual(6, len(wildercard_runs))
 
+    def test_track_state_change_index(self):
+        """Test that state change listeners share one indexed bus listener."""
+        runs = []
+
+        def run_callback(entity_id, old_state, new_state):
+            runs.append(entity_id)
+
+        remove_bowl = track_state_change(
+            self.hass, ['light.Bowl', 'light.bowl'], run_callback)
+        remove_all = track_state_change(self.hass, MATCH_ALL, run_callback)
+
+        self.assertEqual(
+            1, self.hass.bus.listeners.get(EVENT_STATE_CHANGED))
+
+        self.hass.states.set('light.Bowl', 'on')
+        self.hass.states.set('switch.kitchen', 'on')
+        self.hass.block_till_done()
+        self.assertEqual(
+            ['light.bowl', 'light.bowl', 'switch.kitchen'], sorted(runs))
+
+        remove_bowl()
+        self.hass.states.set('light.Bowl', 'off')
+        self.hass.block_till_done()
+        self.assertEqual(4, len(runs))
+
+        remove_all()
+        self.assertIsNone(self.hass.bus.listeners.get(EVENT_STATE_CHANGED))
+
+        self.hass.states.set('light.Bowl', 'on')
+        self.hass.block_till_done()
+        self.assertEqual(4, len(runs))
+
     def test_track_template(self):
         """Test tracking template."""
         specific_runs = []
@@ -262,6 +297,68 @@ class TestEventHelpers(unittest.TestCase):
         self.assertEqual(2, len(wildcard_runs))
         self.assertEqual(2, len(wildercard_runs))
 
+    def test_track_template_result(self):
+        """Test that only the states read by the last render are tracked."""
+        runs = []
+
+        template_branch = Template(
+            "{% if is_state('input_boolean.use_a', 'on') %}"
+            "{{ states.sensor.a.state }}{% else %}"
+            "{{ states('sensor.b') }}{% endif %}", self.hass)
+
+        self.hass.states.set('input_boolean.use_a', 'on')
+        self.hass.states.set('sensor.a', '1')
+        self.hass.states.set('sensor.b', '2')
+
+        @ha.callback
+        def run_callback(entity_id, old_state, new_state, render_info):
+            runs.append((entity_id, render_info.result))
+
+        remove = track_template_result(
+            self.hass, template_branch, run_callback)
+
+        self.hass.states.set('sensor.b', '3')
+        self.hass.states.set('switch.unrelated', 'on')
+        self.hass.block_till_done()
+        self.assertEqual([], runs)
+
+        self.hass.states.set('sensor.a', '4')
+        self.hass.block_till_done()
+        self.assertEqual([('sensor.a', '4')], runs)
+
+        self.hass.states.set('input_boolean.use_a', 'off')
+        self.hass.states.set('sensor.a', '5')
+        self.hass.states.set('sensor.b', '6')
+        self.hass.block_till_done()
+        self.assertEqual([
+            ('sensor.a', '4'), ('input_boolean.use_a', '3'),
+            ('sensor.b', '6')], runs)
+
+        remove()
+        self.hass.states.set('sensor.b', '7')
+        self.hass.block_till_done()
+        self.assertEqual(3, len(runs))
+        self.assertIsNone(self.hass.bus.listeners.get(EVENT_STATE_CHANGED))
+
+    def test_track_template_result_domain(self):
+        """Test that iterating a domain tracks the states of the domain."""
+        runs = []
+
+        template_count = Template(
+            "{{ states.sensor | list | length }}", self.hass)
+
+        @ha.callback
+        def run_callback(entity_id, old_state, new_state, render_info):
+            runs.append(render_info.result)
+
+        track_template_result(self.hass, template_count, run_callback)
+
+        self.hass.states.set('switch.unrelated', 'on')
+        self.hass.states.set('sensor.a', '1')
+        self.hass.states.set('sensor.b', '2')
+        self.hass.block_till_done()
+        self.assertEqual(['1', '2'], runs)
+
     def test_track_time_interval(self):
         """Test tracking time interval."""
         specific_runs = []
@@ -520,6 +617,101 @@ class TestEventHelpers(unittest.TestCase):
         self.hass.block_till_done()
         self.assertEqual(2, len(specific_runs))
 
+    def test_periodic_tasks_share_time_listener(self):
+        """Test that time patterns are scheduled by one bus listener."""
+        runs = []
+
+        unsub_minute = track_utc_time_change(
+            self.hass, lambda x: runs.append('minute'), second=0)
+        unsub_hour = track_time_change(
+            self.hass, lambda x: runs.append('hour'), minute=0, second=0)
+
+        self.assertEqual(
+            1, self.hass.bus.listeners.get(ha.EVENT_TIME_CHANGED))
+
+        with patch('homeassistant.util.dt.DEFAULT_TIME_ZONE', dt_util.UTC):
+            self._send_time_changed(datetime(2014, 5, 24, 11, 59, 59))
+            self._send_time_changed(datetime(2014, 5, 24, 12, 0, 0))
+            self._send_time_changed(datetime(2014, 5, 24, 12, 0, 1))
+            self._send_time_changed(datetime(2014, 5, 24, 12, 1, 0))
+            self.hass.block_till_done()
+
+        self.assertEqual(['minute', 'hour', 'minute'], runs)
+
+        unsub_minute()
+        unsub_hour()
+
+        self.assertIsNone(self.hass.bus.listeners.get(ha.EVENT_TIME_CHANGED))
+
+    def test_next_time_match(self):
+        """Test finding the next time a pattern matches."""
+        start = datetime(2014, 5, 24, 12, 0, 30, 500)
+
+        self.assertEqual(
+            datetime(2014, 5, 24, 12, 0, 30),
+            _next_time_match(start, MATCH_ALL, MATCH_ALL, MATCH_ALL,
+                             MATCH_ALL, MATCH_ALL, MATCH_ALL))
+        self.assertEqual(
+            datetime(2014, 5, 24, 12, 5, 0),
+            _next_time_match(start, MATCH_ALL, MATCH_ALL, MATCH_ALL,
+                             MATCH_ALL, '/5', (0,)))
+        self.assertEqual(
+            datetime(2014, 5, 25, 7, 30, 0),
+            _next_time_match(start, MATCH_ALL, MATCH_ALL, MATCH_ALL,
+                             (7,), (30,), (0,)))
+        self.assertEqual(
+            datetime(2015, 2, 1, 0, 0, 0),
+            _next_time_match(start, MATCH_ALL, (2,), (1,),
+                             (0,), (0,), (0,)))
+        self.assertEqual(
+            datetime(2016, 2, 29, 0, 0, 0),
+            _next_time_match(start, MATCH_ALL, (2,), (29,),
+                             (0,), (0,), (0,)))
+        self.assertIsNone(
+            _next_time_match(start, (2013,), MATCH_ALL, MATCH_ALL,
+                             MATCH_ALL, MATCH_ALL, MATCH_ALL))
+        self.assertIsNone(
+            _next_time_match(start, '/two', MATCH_ALL, MATCH_ALL,
+                             MATCH_ALL, MATCH_ALL, MATCH_ALL))
+        self.assertEqual(
+            datetime(2014, 7, 31, 23, 59, 0),
+            _next_time_match(start, MATCH_ALL, (2, 7), (31,),
+                             (23,), (59,), '/29'))
+        self.assertEqual(
+            datetime(2015, 1, 1, 0, 0, 0),
+            _next_time_match(datetime(2014, 12, 31, 23, 59, 59, 5),
+                             MATCH_ALL, MATCH_ALL, MATCH_ALL, MATCH_ALL,
+                             MATCH_ALL, (0,)))
+        self.assertIsNone(
+            _next_time_match(start, MATCH_ALL, (2,), (30,),
+                             MATCH_ALL, MATCH_ALL, MATCH_ALL))
+        self.assertIsNone(
+            _next_time_match(start, MATCH_ALL, MATCH_ALL, MATCH_ALL,
+                             MATCH_ALL, MATCH_ALL, '/seconds'))
+
+    def test_time_change_out_of_range(self):
+        """Test that patterns that can never match are rejected."""
+        for kwargs in ({'second': 60}, {'minute': 75}, {'hour': [1, 24]},
+                       {'day': 0}, {'month': 13}):
+            with self.assertRaises(ValueError):
+                track_utc_time_change(self.hass, lambda x: None, **kwargs)
+
+    def test_removed_time_pattern_listeners_are_dropped(self):
+        """Test that removed listeners do not pile up in the heap."""
+        unsubs = [track_utc_time_change(self.hass, lambda x: None,
+                                        hour=5, minute=0, second=0)
+                  for _ in range(10)]
+        self._send_time_changed(datetime(2014, 5, 24, 12, 0, 0))
+        self.hass.block_till_done()
+        scheduler = self.hass.data[DATA_TIME_PATTERN_SCHEDULER]
+        self.assertEqual(10, len(scheduler._heaps[False]))
+
+        # The heap is compacted when half of it was removed
+        for unsub in unsubs[:6]:
+            unsub()
+
+        self.assertEqual(5, len(scheduler._heaps[False]))
+
     def test_periodic_task_wrong_input(self):
         """Test periodic tasks with wrong input."""
         specific_runs = []
@@ -0,0 +1,158 @@
+"""Test the batch exporter helper."""
+import json
+import threading
+from unittest.mock import patch
+
+from homeassistant.helpers import exporter
+
+from tests.common import get_test_home_assistant
+
+
+class SendRecorder(object):
+    """Record the batches that are sent."""
+
+    def __init__(self, failures=0):
+        """Initialize the recorder."""
+        self.batches = []
+        self.failures = failures
+        self.event = threading.Event()
+
+    def __call__(self, batch):
+        """Record a batch, fail the first failures calls."""
+        if self.failures:
+            self.failures -= 1
+            raise OSError('fail')
+        self.batches.append(batch)
+        self.event.set()
+
+
+def test_batch_by_size():
+    """Test that a full batch is sent without waiting for the interval."""
+    send = SendRecorder()
+    exp = exporter.BatchExporter('test', send, batch_size=2,
+                                 batch_interval=60)
+    exp.start()
+
+    for item in range(3):
+        exp.put(item)
+
+    assert send.event.wait(5)
+    assert send.batches == [[0, 1]]
+
+    exp.flush()
+    assert send.batches == [[0, 1], [2]]
+    assert exp.stats()['sent'] == 3
+    assert exp.stats()['batches'] == 2
+
+    exp.stop()
+    exp.join(5)
+    assert not exp.is_alive()
+
+
+def test_batch_by_interval():
+    """Test that a partial batch is sent after the interval."""
+    send = SendRecorder()
+    exp = exporter.BatchExporter('test', send, batch_size=100,
+                                 batch_interval=0.01)
+    exp.start()
+    exp.put('a')
+    exp.put('b')
+
+    assert send.event.wait(5)
+    assert send.batches == [['a', 'b']]
+    exp.stop()
+    exp.join(5)
+
+
+@patch('homeassistant.helpers.exporter.RETRY_DELAY', 0.01)
+def test_retry():
+    """Test that a failed batch is retried."""
+    send = SendRecorder(failures=2)
+    exp = exporter.BatchExporter('test', send)
+    exp.start()
+    exp.put('a')
+    exp.flush()
+
+    assert send.batches == [['a']]
+    assert exp.stats()['retries'] == 2
+    exp.stop()
+    exp.join(5)
+
+
+def test_drop_when_full():
+    """Test that the oldest items are dropped from a full buffer."""
+    exp = exporter.BatchExporter('test', SendRecorder(), queue_size=2)
+
+    for item in range(3):
+        exp.put(item)
+
+    assert list(exp._buffer) == [1, 2]
+    assert exp.stats()['dropped'] == 1
+    assert exp.stats()['queued'] == 2
+
+
+def test_spill_and_restore(tmpdir):
+    """Test that overflowing items are spilled and restored in order."""
+    spill_path = str(tmpdir.join('spill'))
+    send = SendRecorder()
+    exp = exporter.BatchExporter('test', send, queue_size=2,
+                                 spill_path=spill_path)
+
+    for item in range(4):
+        exp.put({'value': item})
+    exp._spill_overflow()
+
+    assert exp.stats()['spilled'] == 2
+    with open(spill_path) as spill:
+        assert [json.loads(line) for line in spill] == [
+            {'value': 0}, {'value': 1}]
+
+    exp._buffer.clear()
+    exp._restore_spill()
+    assert list(exp._buffer) == [{'value': 0}, {'value': 1}]
+    assert not tmpdir.join('spill').check()
+
+    exp.start()
+    exp.flush()
+    assert send.batches == [[{'value': 0}, {'value': 1}]]
+    exp.stop()
+    exp.join(5)
+
+
+def test_stop_spills_failed_batch(tmpdir):
+    """Test that a batch that fails at shutdown is spilled."""
+    spill_path = str(tmpdir.join('spill'))
+    closed = []
+    exp = exporter.BatchExporter(
+        'test', SendRecorder(failures=1), batch_interval=60,
+        spill_path=spill_path, close=lambda: closed.append(True))
+    exp.put('a')
+    exp.start()
+    exp.stop()
+    exp.join(5)
+
+    assert not exp.is_alive()
+    assert closed == [True]
+    assert exp.stats()['spilled'] == 1
+    with open(spill_path) as spill:
+        assert spill.read() == '"a"\n'
+
+
+def test_setup_exporter():
+    """Test that the exporter is registered and stopped with hass."""
+    hass = get_test_home_assistant()
+    send = SendRecorder()
+
+    exp = exporter.setup_exporter(
+        hass, 'test', send, exporter.EXPORTER_SCHEMA({'spill_to_disk': True}))
+
+    assert hass.data[exporter.DATA_EXPORTERS] == {'test': exp}
+    assert exp.spill_path == hass.config.path('.test.spill')
+    assert exp.batch_size == exporter.DEFAULT_BATCH_SIZE
+    assert exp.is_alive()
+
+    exp.put('a')
+    hass.stop()
+
+    assert not exp.is_alive()
+    assert send.batches == [['a']]
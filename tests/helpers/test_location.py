@@ -1,9 +1,15 @@
 """Tests Home Assistant location helpers."""
+import random
 import unittest
 
+from homeassistant.components.zone import async_active_zone
 from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE
-from homeassistant.core import State
+from homeassistant.core import State, callback
 from homeassistant.helpers import location
+from homeassistant.util import location as loc_util
+from homeassistant.util.async import run_callback_threadsafe
+
+from tests.common import get_test_home_assistant
 
 
 class TestHelpersLocation(unittest.TestCase):
@@ -57,3 +63,144 @@ class TestHelpersLocation(unittest.TestCase):
 
         self.assertEqual(
             state, location.closest(123.45, 123.45, [state, state2]))
+
+
+class TestLocationIndex(unittest.TestCase):
+    """Test the spatial index of states and zones."""
+
+    def setUp(self):  # pylint: disable=invalid-name
+        """Setup things to be run when tests are started."""
+        self.hass = get_test_home_assistant()
+
+    def tearDown(self):  # pylint: disable=invalid-name
+        """Stop everything that was started."""
+        self.hass.stop()
+
+    def test_closest_matches_scan(self):
+        """Test that the index finds the same state as a full scan."""
+        rand = random.Random(1)
+        index = location.LocationIndex()
+        states = []
+
+        for idx in range(300):
+            latitude = 52 + rand.uniform(-1, 1) * (0.02 if idx % 2 else 2)
+            longitude = 5 + rand.uniform(-1, 1) * (0.02 if idx % 2 else 2)
+            state = State('device_tracker.dev{}'.format(idx), 'home', {
+                ATTR_LATITUDE: latitude, ATTR_LONGITUDE: longitude})
+            states.append(state)
+            index.update(state.entity_id, state)
+
+        for _ in range(50):
+            latitude = 52 + rand.uniform(-3, 3)
+            longitude = 5 + rand.uniform(-3, 3)
+            self.assertEqual(
+                location.closest(latitude, longitude, states).entity_id,
+                index.closest(latitude, longitude))
+
+        subset = {state.entity_id for state in states[::7]}
+        self.assertEqual(
+            location.closest(52, 5, [state for state in states
+                                     if state.entity_id in subset]).entity_id,
+            index.closest(52, 5, subset))
+
+    def test_closest_far_away(self):
+        """Test that states outside the searched rings are found."""
+        index = location.LocationIndex()
+        for entity_id, latitude, longitude in (
+                ('test.far', -33.9, 151.2), ('test.other', -37.8, 144.9),
+                ('test.pole', 89.5, 0.5), ('test.dateline', 10.0, -179.9)):
+            index.update(entity_id, State(entity_id, 'on', {
+                ATTR_LATITUDE: latitude, ATTR_LONGITUDE: longitude}))
+
+        self.assertEqual('test.far', index.closest(52.3, 4.9, {'test.far'}))
+        self.assertEqual('test.other', index.closest(-37, 145))
+        self.assertEqual('test.pole', index.closest(88.0, 120.0))
+        self.assertEqual('test.dateline', index.closest(10.0, 179.95))
+        self.assertIsNone(index.closest(52.3, 4.9, set()))
+
+    def test_zones_near(self):
+        """Test the zone candidates of a point."""
+        index = location.LocationIndex()
+        zones = {
+            'zone.home': (52.0, 5.0, 100, False),
+            'zone.work': (52.05, 5.1, 200, False),
+            'zone.passive': (52.0, 5.0, 100, True),
+            'zone.country': (52.0, 5.0, 200000, False),
+        }
+        for entity_id, (lat, lon, radius, passive) in zones.items():
+            index.update(entity_id, State(entity_id, 'zoning', {
+                ATTR_LATITUDE: lat, ATTR_LONGITUDE: lon,
+                'radius': radius, 'passive': passive}))
+
+        self.assertEqual({'zone.home', 'zone.country'},
+                         index.zones_near(52.0001, 5.0001))
+        self.assertEqual({'zone.work', 'zone.country'},
+                         index.zones_near(52.05, 5.1))
+        self.assertIn('zone.work', index.zones_near(52.0, 5.0, 10000))
+        self.assertEqual(set(zones) - {'zone.passive'},
+                         index.zones_near(52.0, 5.0, 500000))
+
+        # Every zone that contains a point has to be a candidate
+        rand = random.Random(2)
+        for _ in range(200):
+            lat = 52 + rand.uniform(-0.1, 0.1)
+            lon = 5 + rand.uniform(-0.2, 0.2)
+            radius = rand.choice((0, 50, 5000))
+            for entity_id, zone in zones.items():
+                if (not zone[3] and loc_util.distance(
+                        lat, lon, zone[0], zone[1]) - radius < zone[2]):
+                    self.assertIn(entity_id,
+                                  index.zones_near(lat, lon, radius))
+
+        index.update('zone.work', None)
+        index.update('zone.country', None)
+        self.assertEqual(set(), index.zones_near(52.05, 5.1))
+        self.assertEqual({'zone.home', 'zone.passive'}, set(index.zones))
+
+    def test_index_follows_state_changes(self):
+        """Test that the index is updated when states change."""
+        self.hass.states.set('test.moving', 'on', {
+            ATTR_LATITUDE: 52.0, ATTR_LONGITUDE: 5.0})
+        self.hass.block_till_done()
+
+        index = self.hass.data.get(location.DATA_LOCATION_INDEX)
+        self.assertIsNone(index)
+        self.assertEqual('test.moving', location.async_closest(
+            self.hass, 52.0, 5.0).entity_id)
+        index = self.hass.data[location.DATA_LOCATION_INDEX]
+
+        self.hass.states.set('test.moving', 'on', {
+            ATTR_LATITUDE: 53.0, ATTR_LONGITUDE: 6.0})
+        self.hass.states.set('test.other', 'on', {
+            ATTR_LATITUDE: 52.1, ATTR_LONGITUDE: 5.1})
+        self.assertEqual({'test.moving': (53.0, 6.0),
+                          'test.other': (52.1, 5.1)}, index.locations)
+
+        self.hass.states.set('test.other', 'on')
+        self.hass.states.remove('test.moving')
+        self.assertEqual({}, index.locations)
+
+    def test_index_is_current_in_the_same_tick(self):
+        """Test that lookups see a state set in the same callback."""
+        self.hass.states.set('test.far', 'on', {
+            ATTR_LATITUDE: 40.0, ATTR_LONGITUDE: 5.0})
+        self.hass.states.set('zone.home', 'zoning', {
+            ATTR_LATITUDE: 52.0, ATTR_LONGITUDE: 5.0, 'radius': 100})
+        run_callback_threadsafe(
+            self.hass.loop, location.async_get_location_index,
+            self.hass).result()
+
+        @callback
+        def set_and_lookup():
+            """Move the states and look them up before any event runs."""
+            self.hass.states.async_set('test.near', 'on', {
+                ATTR_LATITUDE: 52.0, ATTR_LONGITUDE: 5.0})
+            self.hass.states.async_set('zone.home', 'zoning', {
+                ATTR_LATITUDE: 40.0, ATTR_LONGITUDE: 5.0, 'radius': 100})
+            self.hass.states.async_set('zone.work', 'zoning', {
+                ATTR_LATITUDE: 52.0005, ATTR_LONGITUDE: 5.0, 'radius': 100})
+            return (location.async_closest(self.hass, 52.0, 5.0).entity_id,
+                    async_active_zone(self.hass, 52.0, 5.0).entity_id)
+
+        self.assertEqual(('test.near', 'zone.work'), run_callback_threadsafe(
+            self.hass.loop, set_and_lookup).result())
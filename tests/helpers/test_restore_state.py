@@ -31,6 +31,8 @@ def test_caching_data(hass):
 
     with patch('homeassistant.helpers.restore_state.last_recorder_run',
                return_value=MagicMock(end=dt_util.utcnow())), \
+            patch('homeassistant.helpers.restore_state.get_snapshot_states',
+                  return_value=None), \
             patch('homeassistant.helpers.restore_state.get_states',
                   return_value=states), \
             patch('homeassistant.helpers.restore_state.wait_connection_ready',
@@ -51,6 +53,33 @@ def test_caching_data(hass):
     assert DATA_RESTORE_CACHE not in hass.data
 
 
+@asyncio.coroutine
+def test_caching_data_from_snapshot(hass):
+    """Test that the cache is filled from the state snapshot."""
+    mock_component(hass, 'recorder')
+    hass.state = CoreState.starting
+
+    states = [
+        State('input_boolean.b0', 'on'),
+        State('input_boolean.b1', 'on', {'hidden': True}),
+        State('zone.home', 'zoning'),
+    ]
+
+    with patch('homeassistant.helpers.restore_state.last_recorder_run',
+               return_value=MagicMock(end=dt_util.utcnow())), \
+            patch('homeassistant.helpers.restore_state.get_snapshot_states',
+                  return_value=states), \
+            patch('homeassistant.helpers.restore_state.get_states') \
+            as mock_get_states, \
+            patch('homeassistant.helpers.restore_state.wait_connection_ready',
+                  return_value=mock_coro(True)):
+        state = yield from async_get_last_state(hass, 'input_boolean.b0')
+
+    assert state == states[0]
+    assert hass.data[DATA_RESTORE_CACHE] == {'input_boolean.b0': states[0]}
+    assert not mock_get_states.called
+
+
 def _add_data_in_last_run(hass, entities):
     """Add test data in the last recorder_run."""
     # pylint: disable=protected-access
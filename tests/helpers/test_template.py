@@ -1,4 +1,5 @@
 """Test Home Assistant template helper methods."""
+from collections import Counter
 from datetime import datetime
 import unittest
 import random
@@ -655,6 +656,125 @@ class TestHelpersTemplate(unittest.TestCase):
             'None',
             template.Template('{{ closest(states) }}', self.hass).render())
 
+    def test_render_to_info(self):
+        """Test that the states read during a render are recorded."""
+        self.hass.states.set('sensor.a', '1')
+        self.hass.states.set('light.kitchen', 'on')
+
+        info = template.Template(
+            "{{ states.sensor.a.state }} {{ states('sensor.B') }} "
+            "{{ is_state('light.kitchen', 'on') }} "
+            "{{ states.light | list | length }}", self.hass
+        ).async_render_to_info()
+
+        self.assertEqual('1 unknown True 1', info.result)
+        self.assertIsNone(info.exception)
+        self.assertEqual({'sensor.a', 'sensor.b', 'light.kitchen'},
+                         info.entities)
+        self.assertEqual({'light'}, info.domains)
+        self.assertFalse(info.all_states)
+        self.assertTrue(info.matches('light.new'))
+        self.assertTrue(info.matches('sensor.a'))
+        self.assertFalse(info.matches('sensor.c'))
+
+        info = template.Template(
+            "{{ states | list | length }}", self.hass).async_render_to_info()
+        self.assertTrue(info.all_states)
+        self.assertTrue(info.matches('sensor.c'))
+
+        info = template.Template(
+            "{{ states.sensor.missing.state.lower() }}",
+            self.hass).async_render_to_info()
+        self.assertIsNone(info.result)
+        self.assertIsInstance(info.exception, TemplateError)
+        self.assertEqual({'sensor.missing'}, info.entities)
+
+    def test_render_to_info_closest_group(self):
+        """Test that closest records the group and its members."""
+        self.hass.states.set('test_domain.object', 'happy', {
+            'latitude': self.hass.config.latitude + 0.1,
+            'longitude': self.hass.config.longitude + 0.1,
+        })
+        group.Group.create_group(
+            self.hass, 'location group', ['test_domain.object'])
+
+        info = template.Template(
+            '{{ closest("group.location_group").entity_id }}',
+            self.hass).async_render_to_info()
+
+        self.assertEqual('test_domain.object', info.result)
+        self.assertEqual({'group.location_group', 'test_domain.object'},
+                         info.entities)
+
+    def test_render_cache(self):
+        """Test that results are cached until a state that was read changes."""
+        tpl = template.Template(
+            "{{ states('sensor.a') }} {{ states.light | list | count }} "
+            "{{ x }}", self.hass)
+        stats = self.hass.data.setdefault(
+            template.DATA_TEMPLATE_CACHE_STATS, Counter())
+
+        self.hass.states.set('sensor.a', '1')
+        self.assertEqual('1 0 2', tpl.render(x=2))
+        self.assertEqual('1 0 2', tpl.render(x=2))
+        self.assertEqual('1 0 3', tpl.render(x=3))
+        self.assertEqual({'hits': 1, 'misses': 2}, stats)
+
+        self.hass.states.set('switch.unrelated', 'on')
+        self.assertEqual('1 0 2', tpl.render(x=2))
+        self.assertEqual(2, stats['hits'])
+
+        self.hass.states.set('sensor.a', '2')
+        self.assertEqual('2 0 2', tpl.render(x=2))
+        self.hass.states.set('light.kitchen', 'on')
+        self.assertEqual('2 1 2', tpl.render(x=2))
+        self.hass.states.remove('light.kitchen')
+        self.assertEqual('2 0 2', tpl.render(x=2))
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(5, stats['misses'])
+
+        # Cached results still report the states that were read
+        info = tpl.async_render_to_info(x=2)
+        self.assertEqual(3, stats['hits'])
+        self.assertEqual({'sensor.a'}, info.entities)
+        self.assertEqual({'light'}, info.domains)
+
+    @patch('homeassistant.helpers.template.CACHE_SIZE', 2)
+    def test_render_cache_evicts_least_recently_used(self):
+        """Test that a full cache only evicts the least recently used."""
+        tpl = template.Template("{{ x }}", self.hass)
+        stats = self.hass.data.setdefault(
+            template.DATA_TEMPLATE_CACHE_STATS, Counter())
+
+        tpl.render(x=1)
+        tpl.render(x=2)
+        tpl.render(x=1)
+        tpl.render(x=3)
+        self.assertEqual({'hits': 1, 'misses': 3, 'evictions': 1}, stats)
+
+        tpl.render(x=1)
+        tpl.render(x=3)
+        self.assertEqual(3, stats['hits'])
+        tpl.render(x=2)
+        self.assertEqual(4, stats['misses'])
+
+    def test_render_cache_uncacheable(self):
+        """Test that renders depending on more than states are not cached."""
+        stats = self.hass.data.setdefault(
+            template.DATA_TEMPLATE_CACHE_STATS, Counter())
+        self.hass.states.set('sensor.a', '1')
+
+        with patch('random.choice', side_effect=['a', 'b']):
+            tpl = template.Template("{{ ['a', 'b'] | random }}", self.hass)
+            self.assertEqual('a', tpl.render())
+            self.assertEqual('b', tpl.render())
+
+        tpl = template.Template('{{ x.state }}', self.hass)
+        state = self.hass.states.get('sensor.a')
+        self.assertEqual('1', tpl.render(x=state))
+
+        self.assertEqual({'uncacheable': 3}, stats)
+
     def test_extract_entities_none_exclude_stuff(self):
         """Test extract entities function with none or exclude stuff."""
         self.assertEqual(MATCH_ALL, template.extract_entities(None))
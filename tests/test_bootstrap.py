@@ -6,10 +6,10 @@ from unittest.mock import Mock, patch
 import logging
 
 import homeassistant.config as config_util
-from homeassistant import bootstrap
+from homeassistant import bootstrap, loader, setup
 import homeassistant.util.dt as dt_util
 
-from tests.common import patch_yaml_files, get_test_config_dir
+from tests.common import MockModule, patch_yaml_files, get_test_config_dir
 
 ORIG_TIMEZONE = dt_util.DEFAULT_TIME_ZONE
 VERSION_PATH = os.path.join(get_test_config_dir(), config_util.VERSION_FILE)
@@ -52,3 +52,70 @@ def test_home_assistant_core_config_validation(hass):
         }
     }, hass)
     assert result is None
+
+
+@asyncio.coroutine
+def test_setup_components_along_dependency_graph(hass):
+    """Test that only the global components hold up the others."""
+    hass.config.skip_pip = False
+    order = []
+    global_ready = asyncio.Event(loop=hass.loop)
+    first_ready = asyncio.Event(loop=hass.loop)
+
+    def mock_async_setup(domain, ready=None):
+        """Return a setup that records its order and waits for ready."""
+        @asyncio.coroutine
+        def async_setup(hass, config):
+            """Record the setup and wait till ready."""
+            order.append(domain)
+            if ready is not None:
+                yield from ready.wait()
+            order.append(domain + ' done')
+            return True
+        return async_setup
+
+    loader.set_component('comp_global', MockModule(
+        'comp_global', async_setup=mock_async_setup(
+            'comp_global', global_ready)))
+    loader.set_component('comp_first', MockModule(
+        'comp_first', async_setup=mock_async_setup(
+            'comp_first', first_ready)))
+    loader.set_component('comp_a', MockModule(
+        'comp_a', requirements=['comp_a==1.0'],
+        async_setup=mock_async_setup('comp_a')))
+    loader.set_component('comp_b', MockModule(
+        'comp_b', dependencies=['comp_first'],
+        async_setup=mock_async_setup('comp_b')))
+
+    def mock_install(req, **kwargs):
+        """Record the install."""
+        order.append('install ' + req)
+        return True
+
+    with patch('homeassistant.util.package.check_package_exists',
+               return_value=False), \
+            patch('homeassistant.util.package.install_package',
+                  side_effect=mock_install), \
+            patch('homeassistant.bootstrap.GLOBAL_DEPENDENCIES',
+                  set(['comp_global'])), \
+            patch('homeassistant.bootstrap.FIRST_INIT_COMPONENT',
+                  set(['comp_first'])):
+        task = hass.async_add_job(bootstrap._async_setup_components(
+            hass, {'comp_global', 'comp_first', 'comp_a', 'comp_b'}, {}))
+        yield from asyncio.sleep(0.1, loop=hass.loop)
+
+        # Requirements are installed before the global components are done
+        assert order == ['comp_global', 'install comp_a==1.0']
+
+        global_ready.set()
+        yield from asyncio.sleep(0.1, loop=hass.loop)
+
+        # comp_a does not wait for comp_first, comp_b depends on it
+        assert order[2:] == ['comp_global done', 'comp_first', 'comp_a',
+                             'comp_a done']
+
+        first_ready.set()
+        yield from task
+
+    assert order[6:] == ['comp_first done', 'comp_b', 'comp_b done']
+    assert 'comp_a' not in hass.data[setup.DATA_REQUIREMENTS]
@@ -371,6 +371,12 @@ class TestConfig(unittest.TestCase):
                 CONF_UNIT_SYSTEM: CONF_UNIT_SYSTEM_IMPERIAL,
                 'time_zone': 'America/New_York',
                 'whitelist_external_dirs': '/tmp',
+                'executors': {
+                    'slow': {
+                        'max_workers': 2,
+                        'components': 'sensor.command_line',
+                    },
+                },
             }), self.hass.loop).result()
 
         assert self.hass.config.latitude == 60
@@ -381,6 +387,7 @@ class TestConfig(unittest.TestCase):
         assert self.hass.config.time_zone.zone == 'America/New_York'
         assert len(self.hass.config.whitelist_external_dirs) == 2
         assert '/tmp' in self.hass.config.whitelist_external_dirs
+        assert self.hass.get_executor('slow')._max_workers == 2
 
     def test_loading_configuration_temperature_unit(self):
         """Test backward compatibility when loading core config."""
@@ -3,7 +3,9 @@
 import asyncio
 import logging
 import os
+import threading
 import unittest
+from functools import partial
 from unittest.mock import patch, MagicMock, sentinel
 from datetime import datetime, timedelta
 from tempfile import TemporaryDirectory
@@ -13,7 +15,8 @@ import pytest
 
 import homeassistant.core as ha
 from homeassistant.exceptions import InvalidEntityFormatError
-from homeassistant.util.async import run_coroutine_threadsafe
+from homeassistant.util.async import (
+    run_callback_threadsafe, run_coroutine_threadsafe)
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import (METRIC_SYSTEM)
 from homeassistant.const import (
@@ -225,6 +228,49 @@ class TestHomeAssistant(unittest.TestCase):
         with pytest.raises(ValueError):
             self.hass.add_job(None, 'test_arg')
 
+    def test_executor_pools(self):
+        """Test that executor jobs are routed to the named pools."""
+        def pool_name(module):
+            """Return the name of the pool for a job of a module."""
+            def job():
+                """Test job."""
+            job.__module__ = module
+            return self.hass.executor_for_job(partial(job, 1)).name
+
+        assert pool_name(__name__) == ha.EXECUTOR_DEFAULT
+        assert pool_name('homeassistant.components.light') == \
+            ha.EXECUTOR_DEFAULT
+        assert pool_name('homeassistant.components.light.hue') == \
+            ha.EXECUTOR_IO
+        assert pool_name('custom_components.sensor.test') == ha.EXECUTOR_IO
+        assert pool_name('homeassistant.components.recorder.purge') == \
+            ha.EXECUTOR_DB
+        assert self.hass.executors[ha.EXECUTOR_DEFAULT] is self.hass.executor
+
+        self.hass.configure_executor(
+            'slow', 2, ['sensor.command_line', 'light'])
+        assert pool_name('homeassistant.components.sensor.command_line') == \
+            'slow'
+        assert pool_name('homeassistant.components.sensor.rest') == \
+            ha.EXECUTOR_IO
+        assert pool_name('homeassistant.components.light.hue') == 'slow'
+        assert self.hass.executors['slow']._max_workers == 2
+
+        self.hass.configure_executor(ha.EXECUTOR_IO, 3)
+        assert self.hass.executors[ha.EXECUTOR_IO]._max_workers == 3
+
+        calls = []
+
+        def job():
+            """Record the thread that runs the job."""
+            calls.append(threading.current_thread().name)
+
+        job.__module__ = 'homeassistant.components.sensor.command_line'
+        self.hass.add_job(job)
+        self.hass.block_till_done()
+        assert len(calls) == 1
+        assert self.hass.executors['slow'].stats()['completed'] == 1
+
 
 class TestEvent(unittest.TestCase):
     """A Test Event class."""
@@ -490,6 +536,29 @@ class TestStateMachine(unittest.TestCase):
         self.assertFalse(self.states.is_state('light.Bowl', 'off'))
         self.assertFalse(self.states.is_state('light.Non_existing', 'on'))
 
+    def test_version(self):
+        """Test that versions increase when a state is set or removed."""
+        version = self.states.version()
+        light_version = self.states.version('light.bowl')
+        self.assertEqual(light_version, self.states.domain_version('light'))
+        self.assertEqual(0, self.states.version('light.non_existing'))
+
+        self.states.set('light.Bowl', 'on')
+        self.assertEqual(version, self.states.version())
+        self.assertEqual(light_version, self.states.version('light.bowl'))
+
+        self.states.set('light.Bowl', 'off')
+        self.assertLess(light_version, self.states.version('light.BOWL'))
+        self.assertLess(version, self.states.version())
+
+        switch_version = self.states.version('switch.ac')
+        self.states.remove('switch.AC')
+        self.assertLess(switch_version, self.states.version('switch.ac'))
+        self.assertEqual(self.states.version('switch.ac'),
+                         self.states.domain_version('switch'))
+        self.assertEqual(self.states.version('switch.ac'),
+                         self.states.version())
+
     def test_is_state_attr(self):
         """Test is_state_attr method."""
         self.states.set("light.Bowl", "on", {"brightness": 100})
@@ -518,6 +587,48 @@ class TestStateMachine(unittest.TestCase):
         states = sorted(state.entity_id for state in self.states.all())
         self.assertEqual(['light.bowl', 'switch.ac'], states)
 
+    def test_domain_index(self):
+        """Test that domain lookups are sorted and follow set and remove."""
+        self.states.set('light.Kitchen', 'on')
+        self.states.set('light.attic', 'off')
+        self.states.set('light.bowl', 'off')
+
+        self.assertEqual(['light.attic', 'light.bowl', 'light.kitchen'],
+                         self.states.entity_ids('LIGHT'))
+        self.assertEqual(
+            ['light.attic', 'light.bowl', 'light.kitchen'],
+            [state.entity_id for state in self.states.all('light')])
+        self.assertEqual('off', self.states.all('light')[1].state)
+
+        self.states.remove('light.bowl')
+        self.states.remove('switch.ac')
+
+        self.assertEqual(['light.attic', 'light.kitchen'],
+                         self.states.entity_ids('light'))
+        self.assertEqual([], self.states.entity_ids('switch'))
+        self.assertEqual([], self.states.all('switch'))
+
+    def test_observer(self):
+        """Test that observers are called before the state changed event."""
+        calls = []
+
+        @ha.callback
+        def observer(entity_id, new_state):
+            calls.append((entity_id, new_state and new_state.state))
+
+        remove = run_callback_threadsafe(
+            self.hass.loop, self.states.async_add_observer, observer).result()
+
+        self.states.set('light.Bowl', 'on')
+        self.states.set('light.Bowl', 'off')
+        self.states.remove('light.bowl')
+        self.assertEqual([('light.bowl', 'off'), ('light.bowl', None)],
+                         calls)
+
+        run_callback_threadsafe(self.hass.loop, remove).result()
+        self.states.set('light.bowl', 'on')
+        self.assertEqual(2, len(calls))
+
     def test_remove(self):
         """Test remove method."""
         events = []
@@ -1,5 +1,6 @@
 """Test Home Assistant remote methods and classes."""
 # pylint: disable=protected-access
+import json
 import unittest
 
 from homeassistant import remote, setup, core as ha
@@ -203,3 +204,31 @@ class TestRemoteMethods(unittest.TestCase):
 
         now = dt_util.utcnow()
         self.assertEqual(now.isoformat(), ha_json_enc.default(now))
+
+    def test_state_and_event_to_json(self):
+        """Test that states and events are encoded once."""
+        old_state = ha.State('light.kitchen', 'off')
+        new_state = ha.State('light.kitchen', 'on', {'brightness': 100})
+        event = ha.Event(EVENT_STATE_CHANGED, {
+            'entity_id': 'light.kitchen',
+            'old_state': old_state,
+            'new_state': new_state,
+        })
+
+        event_json = remote.event_to_json(event)
+
+        self.assertEqual(json.loads(event_json), json.loads(json.dumps(
+            event.as_dict(), cls=remote.JSONEncoder)))
+        self.assertIs(event_json, remote.event_to_json(event))
+        self.assertIn(remote.state_to_json(new_state), event_json)
+        self.assertIs(new_state.json_cache,
+                      remote.state_to_json(new_state))
+
+        self.assertEqual(
+            json.loads(remote.states_to_json([old_state, new_state])),
+            [json.loads(json.dumps(state.as_dict(), cls=remote.JSONEncoder))
+             for state in (old_state, new_state)])
+
+        event = ha.Event('test_event', {'number': 5})
+        self.assertEqual(json.loads(remote.event_to_json(event)), json.loads(
+            json.dumps(event.as_dict(), cls=remote.JSONEncoder)))
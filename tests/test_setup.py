@@ -9,7 +9,8 @@ import logging
 import voluptuous as vol
 
 from homeassistant.core import callback
-from homeassistant.const import EVENT_HOMEASSISTANT_START
+from homeassistant.const import (
+    EVENT_COMPONENT_LOADED, EVENT_HOMEASSISTANT_START)
 import homeassistant.config as config_util
 from homeassistant import setup, loader
 import homeassistant.util.dt as dt_util
@@ -427,3 +428,49 @@ def test_component_warn_slow_setup(hass):
         assert logger_method == setup._LOGGER.warning
 
         assert mock_call().cancel.called
+
+
+@asyncio.coroutine
+def test_component_setup_time(hass):
+    """Test that the setup time is recorded and sent with the event."""
+    events = []
+
+    @callback
+    def component_loaded(event):
+        """Record the event."""
+        events.append(event)
+
+    hass.bus.async_listen(EVENT_COMPONENT_LOADED, component_loaded)
+    loader.set_component('test_component1', MockModule('test_component1'))
+
+    assert (yield from setup.async_setup_component(
+        hass, 'test_component1', {}))
+    yield from hass.async_block_till_done()
+
+    setup_time = hass.data[setup.DATA_SETUP_TIME]['test_component1']
+    assert setup_time >= 0
+    assert len(events) == 1
+    assert events[0].data == {
+        setup.ATTR_COMPONENT: 'test_component1',
+        setup.ATTR_SETUP_TIME: setup_time,
+    }
+
+
+@asyncio.coroutine
+def test_only_missing_requirements_installed(hass):
+    """Test that installed requirements skip the pip lock and install."""
+    hass.config.skip_pip = False
+
+    with mock.patch('homeassistant.util.package.check_package_exists',
+                    side_effect=lambda req, _: req == 'installed==1.0'), \
+            mock.patch('homeassistant.util.package.install_package',
+                       return_value=True) as mock_install:
+        assert (yield from setup._async_process_requirements(
+            hass, 'test', ['installed==1.0']))
+        assert setup.DATA_PIP_LOCK not in hass.data
+        assert not mock_install.called
+
+        assert (yield from setup._async_process_requirements(
+            hass, 'test', ['installed==1.0', 'missing==1.0']))
+        assert len(mock_install.mock_calls) == 1
+        assert mock_install.mock_calls[0][1] == ('missing==1.0',)
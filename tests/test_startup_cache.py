@@ -0,0 +1,144 @@
+"""Test the startup cache."""
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from homeassistant import config as config_util, loader, startup_cache
+
+from tests.common import get_test_home_assistant
+
+
+class TestStartupCache(unittest.TestCase):
+    """Test the startup cache."""
+
+    # pylint: disable=invalid-name
+    def setUp(self):
+        """Create a config directory."""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.config_dir = self.tempdir.name
+        self.config_path = os.path.join(self.config_dir, 'configuration.yaml')
+
+        self._write('configuration.yaml',
+                    'homeassistant:\n'
+                    '  name: !secret name\n'
+                    'sensor: !include sensor.yaml\n'
+                    'group: !include_dir_merge_named groups\n'
+                    'http:\n'
+                    '  api_password: !env_var STARTUP_CACHE_PASSWORD\n')
+        self._write('secrets.yaml', 'name: Home\n')
+        self._write('sensor.yaml', '- platform: demo\n')
+        os.mkdir(os.path.join(self.config_dir, 'groups'))
+        self._write(os.path.join('groups', 'kitchen.yaml'),
+                    'kitchen:\n  entities: light.kitchen\n')
+
+        self.env = patch.dict(os.environ, {'STARTUP_CACHE_PASSWORD': 'abc'})
+        self.env.start()
+
+    # pylint: disable=invalid-name
+    def tearDown(self):
+        """Remove the config directory."""
+        self.env.stop()
+        self.tempdir.cleanup()
+
+    def _write(self, name, content):
+        """Write a file to the config directory."""
+        with open(os.path.join(self.config_dir, name), 'w') as fil:
+            fil.write(content)
+
+    def _load(self):
+        """Load the config and return it with the number of YAML parses."""
+        with patch('homeassistant.config.load_yaml_config_file',
+                   wraps=config_util.load_yaml_config_file) as mock_load:
+            config = startup_cache.load_config_file(self.config_path)
+
+        return config, mock_load.call_count
+
+    def test_config_cache(self):
+        """Test that the config is only parsed when a source changed."""
+        config, parses = self._load()
+        self.assertEqual(1, parses)
+        self.assertEqual('Home', config['homeassistant']['name'])
+        self.assertEqual('abc', config['http']['api_password'])
+        self.assertEqual(0o600, os.stat(os.path.join(
+            self.config_dir, startup_cache.CACHE_FILE)).st_mode & 0o777)
+
+        cached, parses = self._load()
+        self.assertEqual(0, parses)
+        self.assertEqual(config, cached)
+        # The references for error messages are kept
+        self.assertEqual(5, cached['http'].__line__)
+        self.assertEqual(self.config_path, cached['http'].__config_file__)
+
+        self._write('sensor.yaml', '- platform: template\n')
+        config, parses = self._load()
+        self.assertEqual(1, parses)
+        self.assertEqual('template', config['sensor'][0]['platform'])
+
+        self._write(os.path.join('groups', 'living_room.yaml'),
+                    'living_room:\n  entities: light.living_room\n')
+        config, parses = self._load()
+        self.assertEqual(1, parses)
+        self.assertEqual(['kitchen', 'living_room'],
+                         sorted(config['group']))
+
+        os.environ['STARTUP_CACHE_PASSWORD'] = 'def'
+        config, parses = self._load()
+        self.assertEqual(1, parses)
+        self.assertEqual('def', config['http']['api_password'])
+
+        self.assertEqual(0, self._load()[1])
+
+    def test_invalid_cache(self):
+        """Test that an unreadable or outdated snapshot is ignored."""
+        self._load()
+        cache_path = os.path.join(self.config_dir, startup_cache.CACHE_FILE)
+
+        with patch('homeassistant.startup_cache.CACHE_VERSION', 0):
+            self.assertEqual(1, self._load()[1])
+
+        self._write(startup_cache.CACHE_FILE, 'corrupt')
+        config, parses = self._load()
+        self.assertEqual(1, parses)
+        self.assertEqual('Home', config['homeassistant']['name'])
+        self.assertTrue(os.path.isfile(cache_path))
+        self.assertEqual(0, self._load()[1])
+
+    def test_keyring_secret_not_cached(self):
+        """Test that configs with keyring secrets are not cached."""
+        os.remove(os.path.join(self.config_dir, 'secrets.yaml'))
+
+        with patch('homeassistant.util.yaml.keyring') as mock_keyring:
+            mock_keyring.get_password.return_value = 'Keyring home'
+            for _ in range(2):
+                config, parses = self._load()
+                self.assertEqual(1, parses)
+                self.assertEqual('Keyring home',
+                                 config['homeassistant']['name'])
+
+    def test_component_index_cache(self):
+        """Test that the component index is cached until a change."""
+        hass = get_test_home_assistant()
+        hass.config.config_dir = self.config_dir
+        sys_path = list(sys.path)
+
+        try:
+            with patch('homeassistant.loader._find_components',
+                       wraps=loader._find_components) as mock_find:
+                loader.prepare(hass, use_cache=True)
+                expected = list(loader.AVAILABLE_COMPONENTS)
+                loader.prepare(hass, use_cache=True)
+                self.assertEqual(1, mock_find.call_count)
+                self.assertEqual(expected, loader.AVAILABLE_COMPONENTS)
+
+                os.mkdir(os.path.join(self.config_dir, 'custom_components'))
+                self._write(os.path.join('custom_components', 'beer.py'), '')
+                loader.prepare(hass, use_cache=True)
+                self.assertEqual(2, mock_find.call_count)
+                self.assertIn('custom_components.beer',
+                              loader.AVAILABLE_COMPONENTS)
+        finally:
+            hass.stop()
+            sys.path[:] = sys_path
+            loader.prepare(hass)
@@ -0,0 +1,54 @@
+"""Test Home Assistant executor pools."""
+import threading
+
+import pytest
+
+from homeassistant.util.executor import ExecutorPool
+
+
+def test_pool_stats():
+    """Test that the pool records its saturation."""
+    pool = ExecutorPool('test', 2)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    def job(value):
+        """Block until the job is released."""
+        started.release()
+        release.wait()
+        return value
+
+    try:
+        futures = [pool.submit(job, idx) for idx in range(3)]
+        assert started.acquire(timeout=5)
+        assert started.acquire(timeout=5)
+
+        stats = pool.stats()
+        assert stats['max_workers'] == 2
+        assert stats['workers'] == 2
+        assert stats['submitted'] == 3
+        assert stats['active'] == 2
+        assert stats['queued'] == 1
+    finally:
+        release.set()
+
+    assert [future.result(5) for future in futures] == [0, 1, 2]
+    pool.shutdown()
+
+    stats = pool.stats()
+    assert stats['active'] == 0
+    assert stats['max_active'] == 2
+    assert stats['completed'] == 3
+    assert stats['max_wait'] >= stats['mean_wait'] > 0
+
+
+def test_pool_resize():
+    """Test changing the size of the pool."""
+    pool = ExecutorPool('test', 1)
+    pool.resize(4)
+    assert pool.stats()['max_workers'] == 4
+
+    with pytest.raises(ValueError):
+        pool.resize(0)
+
+    pool.shutdown()
@@ -139,3 +139,20 @@ class TestPackageUtilCheckPackageExists(unittest.TestCase):
     def test_check_package_zip(self):
         """Test for an installed zip package."""
         self.assertFalse(package.check_package_exists(TEST_ZIP_REQ, None))
+
+    def test_check_package_scans_once(self):
+        """Test that installed distributions are scanned once."""
+        package.clear_installed_cache()
+        installed_package = list(pkg_resources.working_set)[0].project_name
+
+        with patch('homeassistant.util.package.pkg_resources.'
+                   'find_distributions', return_value=[]) as mock_find:
+            self.assertTrue(
+                package.check_package_exists(installed_package, 'lib'))
+            self.assertFalse(package.check_package_exists(TEST_NEW_REQ,
+                                                          'lib'))
+            self.assertEqual(1, mock_find.call_count)
+
+            package.clear_installed_cache()
+            package.check_package_exists(TEST_NEW_REQ, 'lib')
+            self.assertEqual(2, mock_find.call_count)